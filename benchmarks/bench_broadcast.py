@@ -0,0 +1,118 @@
+"""Diffusion simulée vers N abonnés avec un faux client (sans Telegram).
+
+Les abonnés sont dans un vrai SQLiteUserStore (en mémoire); le faux client
+simule la latence réseau, des utilisateurs ayant bloqué le bot, des
+erreurs transitoires et des FloodWait. Deux diffusions sont lancées: la
+seconde doit ignorer les bloqués découverts par la première.
+
+    python benchmarks/bench_broadcast.py [abonnés] [débit/s] [workers]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broadcast import Broadcaster
+from telegram_sender import TokenBucket
+from user_store import SQLiteUserStore
+
+
+class FakeFloodWait(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"flood {seconds}s")
+        self.seconds = seconds
+
+
+class FakeBlocked(Exception):
+    pass
+
+
+class FakeClient:
+    """Latence ~2 ms; 2 % de bloqués, 0,5 % d'erreurs transitoires, FloodWait rares"""
+
+    def __init__(self, blocked, seed=1):
+        self.random = random.Random(seed)
+        self.blocked = blocked
+        self.calls = 0
+        self.delivered = {}
+
+    async def send_message(self, chat, text):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.random.uniform(0.001, 0.003))
+        if chat in self.blocked:
+            raise FakeBlocked(chat)
+        if call % 20000 == 0:
+            raise FakeFloodWait(1)
+        if self.random.random() < 0.005:
+            raise ConnectionError("réseau")
+        self.delivered[chat] = self.delivered.get(chat, 0) + 1
+
+
+def populate(store, count):
+    now = datetime.now()
+    rows = {}
+    for user_id in range(1, count + 1):
+        data = {'registered': True, 'nom': f"user{user_id}"}
+        if user_id % 4:
+            data['subscription_end'] = (now + timedelta(days=30)).isoformat()
+        else:
+            data['vip_expires_at'] = (now + timedelta(hours=1)).isoformat()
+        rows[user_id] = data
+    # Quelques inactifs (abonnement terminé) pour vérifier la sélection
+    for user_id in range(count + 1, count + count // 10 + 1):
+        rows[user_id] = {'registered': True, 'subscription_end': (now - timedelta(days=1)).isoformat()}
+    with store._lock, store._conn:
+        from user_store import _UPSERT_SQL, _to_row
+        store._conn.executemany(_UPSERT_SQL, [_to_row(user_id, data) for user_id, data in rows.items()])
+
+
+async def run(count, rate, workers):
+    store = SQLiteUserStore(':memory:')
+    populate(store, count)
+    blocked = set(random.Random(2).sample(range(1, count + 1), count // 50))
+    client = FakeClient(blocked)
+
+    broadcaster = Broadcaster(
+        client,
+        recipients=lambda: store.aactive_users(datetime.now().isoformat()),
+        on_blocked=lambda user_id, reason: store.amark_blocked(user_id, datetime.now().isoformat(), reason),
+        workers=workers, bucket=TokenBucket(rate, rate),
+        chat_interval=0.0, backoff=0.05, flood_errors=(FakeFloodWait,), blocked_errors=(FakeBlocked,)
+    )
+    broadcaster.start()
+
+    for round_index in range(2):
+        started = time.perf_counter()
+        broadcast = await broadcaster.broadcast(f"🎰 PRÉDICTION #{100 + round_index}")
+        selected = time.perf_counter() - started
+        await broadcast.done
+        summary = broadcast.summary()
+        print(f"Diffusion #{summary['id']}: {summary['total']} destinataires (sélection {selected * 1000:.0f} ms), "
+              f"{summary['sent']} envoyés, {summary['blocked']} bloqués, {summary['failed']} échecs, "
+              f"{summary['retries']} nouvelles tentatives, {summary['duration']:.2f}s "
+              f"({summary['sent'] / summary['duration']:.0f} msg/s)")
+
+    await broadcaster.stop()
+    stored_blocked = store._fetch("SELECT COUNT(*) FROM blocked_users")[0][0]
+    duplicates = sum(1 for n in client.delivered.values() if n > 2)
+    print(f"Bloqués enregistrés: {stored_blocked}/{len(blocked)}, FloodWait: {broadcaster.flood_waits}, "
+          f"doublons: {duplicates}")
+    store.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(count, rate, workers))
+
+
+if __name__ == '__main__':
+    main()
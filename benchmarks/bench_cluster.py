@@ -0,0 +1,112 @@
+"""Mode multi-processus avec une fausse passerelle (sans Telegram).
+
+Démarre K processus, répartit N tables, envoie des messages source
+synthétiques, tue un processus en cours de route et vérifie que toutes les
+tables continuent de produire des prédictions.
+
+    python benchmarks/bench_cluster.py [workers] [tables] [rounds]
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import logging
+import tempfile
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cluster import Supervisor
+
+SUITS = ['♥', '♠', '♦', '♣']
+
+
+class FakeMessage:
+    def __init__(self, message_id):
+        self.id = message_id
+
+
+class FakeSender:
+    """Compte les envois par canal de prédiction"""
+
+    def __init__(self):
+        self.sent = Counter()
+        self.edits = 0
+        self._ids = 0
+
+    async def send_message(self, chat, text):
+        self._ids += 1
+        self.sent[chat] += 1
+        return FakeMessage(self._ids)
+
+    async def send_notice(self, chat, text):
+        return await self.send_message(chat, text)
+
+    async def edit_message(self, chat, message_id, text):
+        self.edits += 1
+
+
+def game_text(number, index):
+    suit = SUITS[index % 4]
+    return f"#N{number}. 9({suit}K♣2) - ✅"
+
+
+async def run(workers, tables, rounds, directory):
+    sender = FakeSender()
+    supervisor = Supervisor(workers, sender, settings={
+        'tables_dir': directory,
+        'log_level': logging.WARNING,
+        'timeouts': {'prediction_timeout': None, 'idle_timeout': None},
+    })
+    for index in range(tables):
+        supervisor.add_table({
+            'name': f't{index}', 'source_channel_id': -1000 - index, 'prediction_channel_id': -5000 - index,
+        })
+    supervisor.start()
+    await asyncio.sleep(2)  # démarrage des processus (spawn)
+
+    ownership = Counter(supervisor._owner.values())
+    print(f"Répartition initiale: {dict(sorted(ownership.items()))}")
+
+    started = time.perf_counter()
+    message_id = 0
+    killed = False
+    for round_index in range(rounds):
+        number = 6 + round_index
+        message_id += 1
+        for index in range(tables):
+            supervisor.dispatch(-1000 - index, message_id, game_text(number, index + round_index))
+        if not killed and round_index == rounds // 2:
+            victim = supervisor._workers[0].process
+            victim.kill()
+            killed = True
+            print(f"💥 Processus 0 tué (pid {victim.pid}) au tour {round_index}")
+        await asyncio.sleep(0.02)
+    await asyncio.sleep(3)
+    elapsed = time.perf_counter() - started
+
+    ownership = Counter(supervisor._owner.values())
+    summaries = await supervisor.status()
+    await supervisor.stop()
+
+    silent = [index for index in range(tables) if sender.sent[-5000 - index] == 0]
+    print(f"Répartition finale: {dict(sorted(ownership.items()))} (pannes: {supervisor.deaths})")
+    print(f"{tables * rounds} messages en {elapsed:.2f}s, {sum(sender.sent.values())} envois, {sender.edits} éditions")
+    print(f"Tables actives au statut: {len(summaries)}/{tables}, tables sans prédiction: {len(silent)}")
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    tables = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+    logging.basicConfig(level=logging.WARNING)
+    directory = tempfile.mkdtemp(prefix='bench_cluster_')
+    try:
+        asyncio.run(run(workers, tables, rounds, directory))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Tempête d'éditions: coût CPU par jeu avec et sans EditCoalescer.
+
+Rejoue un historique (format de replay.py) où chaque jeu est réécrit de
+nombreuses fois (⏰ pendant la distribution, puis ✅, puis réécritures
+identiques). Sans fichier, un historique synthétique est généré.
+Compare le chemin direct (chaque édition au moteur) au filtre d'éditions,
+vérifie que le bilan est identique et que les éditions finales ne sont
+pas retardées.
+
+    python benchmarks/bench_edit_storm.py [historique.jsonl] [jeux]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import ReplaySender, SimulatedClock, read_history
+from prediction_engine import PredictionEngine, new_pause_config
+from game_tables import LAST_GAME_NUMBER
+from edit_coalescer import EditCoalescer, is_intermediate
+
+SUITS = ['♠️', '♥️', '♦️', '♣️']
+CARDS = ['A', 'K', 'Q', 'J', '2', '3', '4', '5', '6', '7', '8', '9']
+
+
+def synthetic_history(games, seed=7, first_number=None):
+    """[(id, texte, édition, ts)]: ~14 éditions ⏰ puis 1 finale et 2 copies par jeu
+
+    Sans `first_number`, les numéros tournent de #6 à #1435; sinon ils suivent
+    le canal réel à partir de `first_number` (#1440 puis retour à #1).
+    """
+    rng = random.Random(seed)
+    records = []
+    ts = 1738700000.0
+    for index in range(games):
+        if first_number is None:
+            number = 6 + index % 1430
+        else:
+            number = (first_number - 1 + index) % LAST_GAME_NUMBER + 1
+        message_id = index + 1
+        cards = [f"{rng.choice(CARDS)}{rng.choice(SUITS)}" for _ in range(3)]
+        records.append((message_id, f"⏰#N{number}. 0({cards[0]}", False, ts))
+        for step in range(rng.randint(10, 18)):
+            ts += rng.uniform(0.5, 1.5)
+            partial = ''.join(cards[:1 + step % 3])
+            records.append((message_id, f"⏰#N{number}. {step % 10}({partial}) - {step}(...)", True, ts))
+        final = f"#N{number}. ✅ 3({''.join(cards)}) - 5({rng.choice(CARDS)}{rng.choice(SUITS)})"
+        for _ in range(3):
+            ts += 1.0
+            records.append((message_id, final, True, ts))
+        ts += 5.0
+    return records
+
+
+async def run(records, mode):
+    """mode: 'direct', 'coalesce' ou 'harness' (boucle de rejeu seule, sans moteur)"""
+    clock = SimulatedClock()
+    engine = PredictionEngine(ReplaySender(), 0, new_pause_config([60]), now=clock.now,
+                              monotonic=clock.monotonic)
+    engine.start()
+    final_delays = []
+    arrivals = {}
+
+    def submit(message_id, message_text, is_edit=True):
+        if is_edit and not is_intermediate(message_text) and (message_id, message_text) in arrivals:
+            final_delays.append(time.perf_counter() - arrivals.pop((message_id, message_text)))
+        if mode != 'harness':
+            engine.submit(message_id, message_text, is_edit)
+
+    coalescer = EditCoalescer(submit, lambda: engine.is_full)
+    started = time.process_time()
+    for message_id, text, is_edit, ts in records:
+        clock.current = ts
+        if not is_edit:
+            submit(message_id, text, False)
+            coalescer.seen(message_id, text)
+        elif mode == 'coalesce':
+            if not is_intermediate(text):
+                arrivals.setdefault((message_id, text), time.perf_counter())
+            coalescer.edit(message_id, text)
+        else:
+            submit(message_id, text)
+        # Le moteur traite chaque message avant le suivant (horloge simulée cohérente)
+        await engine.queue.join()
+    cpu = time.process_time() - started
+    coalescer.stop()
+    await engine.stop()
+    return cpu, engine.stats, coalescer, final_delays
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+    games = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 1000
+    records = list(read_history(path)) if path else synthetic_history(games)
+    games = len({message_id for message_id, _, is_edit, _ in records if not is_edit})
+    edits = sum(1 for record in records if record[2])
+
+    # Journalisation INFO comme en production (formatée, écrite dans /dev/null)
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, 'w'),
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    harness_cpu = asyncio.run(run(records, 'harness'))[0]
+    direct_cpu, direct_stats, _, _ = asyncio.run(run(records, 'direct'))
+    cpu, stats, coalescer, delays = asyncio.run(run(records, 'coalesce'))
+    direct_cpu -= harness_cpu
+    cpu -= harness_cpu
+
+    print(f"{games} jeux, {edits} éditions ({edits / games:.1f} par jeu), "
+          f"boucle de rejeu déduite ({harness_cpu / games * 1e6:.0f} µs/jeu)")
+    print(f"  direct   : {direct_cpu / games * 1e6:7.0f} µs CPU/jeu")
+    print(f"  regroupé : {cpu / games * 1e6:7.0f} µs CPU/jeu  (x{direct_cpu / cpu:.1f})")
+    print(f"  éditions transmises {coalescer.forwarded}/{coalescer.received}: "
+          f"{coalescer.coalesced} ⏰ regroupées, {coalescer.duplicates} identiques, {coalescer.dropped} abandonnées")
+    print(f"  finales transmises: {len(delays)}, délai max {max(delays, default=0) * 1e6:.0f} µs")
+    print(f"  bilan identique: {direct_stats == stats} "
+          f"({stats['total']} prédictions, {stats['wins']} gagnées, {stats['losses']} perdues)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""Test de charge de bout en bout: canal source synthétique -> bot -> faux Telegram.
+
+Importe main.py dans un répertoire temporaire, branche un faux client
+(benchmarks/fake_telegram.py) par main.attach_client et démarre les mêmes
+services qu'en production. Le canal synthétique (benchmarks/source_channel.py)
+publie jeux et éditions en temps réel; chaque message passe par
+handle_messages / handle_edit, la table, le moteur et la file d'envoi.
+
+Latences mesurées:
+- publication: envoi de « PRÉDICTION #T » - dernière publication du
+  déclencheur #T-1 avant l'envoi;
+- statut: édition du résultat - première version finale du jeu vérifié
+  (#T + check).
+
+Graine, débit et durée fixes: les résultats sont comparables d'un commit à
+l'autre (`--json` ajoute le commit et les paramètres).
+
+    python benchmarks/bench_load.py [--rate 5] [--duration 30] [--edits 12] [--json]
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_telegram import FakeTelegramClient, FakeFloodWait, NEW_MESSAGE, MESSAGE_EDITED
+from source_channel import SyntheticSource
+
+PREDICTION_RE = re.compile(r"PRÉDICTION #(\d+)")
+STATUS_RE = re.compile(r"Statut: (?:✅(\d)|❌)")
+LOSS_CHECK = 3
+DRAIN_SECONDS = 10.0
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(values):
+    if not values:
+        return {'n': 0}
+    return {
+        'n': len(values),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+        'max_ms': round(max(values) * 1000, 2),
+    }
+
+
+def latencies(client, source, prediction_channel):
+    """(publications, statuts, avis) à partir des appels enregistrés par le faux client"""
+    posts, statuses, notices = [], [], 0
+    targets = {}
+    for sent in client.sent:
+        if sent.chat != prediction_channel:
+            continue
+        match = PREDICTION_RE.search(sent.text)
+        if match is None:
+            notices += 1
+            continue
+        target = int(match.group(1))
+        if not sent.edit:
+            targets[sent.message_id] = target
+            emitted = source.trigger_time(target - 1, sent.at)
+            if emitted is not None:
+                posts.append(sent.at - emitted)
+            continue
+        status = STATUS_RE.search(sent.text)
+        if status is None:
+            continue
+        check = int(status.group(1)) if status.group(1) else LOSS_CHECK
+        emitted = source.final_time(targets.get(sent.message_id, target) + check, sent.at)
+        if emitted is not None:
+            statuses.append(sent.at - emitted)
+    return posts, statuses, notices
+
+
+async def monitor_loop(lags, interval=0.01):
+    """Retard de réveil de la boucle asyncio (bloquages du thread principal)"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def drain(main, client):
+    """Attend que les files du moteur et de l'envoyeur soient vides"""
+    deadline = time.perf_counter() + DRAIN_SECONDS
+    calls = -1
+    while time.perf_counter() < deadline:
+        await main.engine.queue.join()
+        if client.calls == calls and main.sender._queue.empty():
+            return
+        calls = client.calls
+        await asyncio.sleep(0.2)
+
+
+async def run(main, args):
+    client = FakeTelegramClient(latency=(args.latency_ms / 1000 * 0.5, args.latency_ms / 1000 * 1.5),
+                                flood_every=args.flood_every, seed=args.seed)
+    main.load_all_configs()
+    main.persistence.start()
+    main.attach_client(client, NEW_MESSAGE, MESSAGE_EDITED, flood_errors=(FakeFloodWait,))
+    main.started = True
+    main.pause_config['cycle'] = [args.pause]
+    main.set_max_in_flight(args.in_flight, save=False)
+    main.start_services()
+
+    source = SyntheticSource(client, main.get_source_channel_id(), games_per_second=args.rate,
+                             edits=args.edits, game_seconds=args.game_seconds, copies=args.copies,
+                             seed=args.seed)
+    lags = []
+    monitor = asyncio.create_task(monitor_loop(lags))
+    cpu = time.process_time()
+    elapsed = await source.run(args.duration)
+    await drain(main, client)
+    cpu = time.process_time() - cpu
+    monitor.cancel()
+
+    stats = dict(main.engine.stats)
+    await main.stop_services()
+
+    posts, statuses, notices = latencies(client, source, main.get_prediction_channel_id())
+    events = source.posted + source.edited
+    return {
+        'commit': git_commit(),
+        'params': {key: getattr(args, key) for key in
+                   ('rate', 'duration', 'edits', 'game_seconds', 'copies', 'latency_ms',
+                    'flood_every', 'pause', 'in_flight', 'seed')},
+        'source': {'games': source.posted, 'events': events, 'seconds': round(elapsed, 2),
+                   'events_per_second': round(events / elapsed, 1)},
+        'cpu_us_per_event': round(cpu / events * 1e6, 1),
+        'loop_lag': summarize(lags),
+        'prediction_post': summarize(posts),
+        'status_edit': summarize(statuses),
+        'notices': notices,
+        'flood_waits': client.flood_waits,
+        'edits_skipped': main.main_table.edits.skipped,
+        'stats': {'total': stats['total'], 'wins': stats['wins'], 'losses': stats['losses']},
+    }
+
+
+def git_commit():
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def format_latency(label, summary):
+    if not summary['n']:
+        return f"  {label}: aucune"
+    return (f"  {label}: p50 {summary['p50_ms']:.1f} ms, p99 {summary['p99_ms']:.1f} ms, "
+            f"max {summary['max_ms']:.1f} ms (n={summary['n']})")
+
+
+def format_report(result):
+    source = result['source']
+    stats = result['stats']
+    return "\n".join([
+        f"📊 Charge ({result['commit']}): {source['games']} jeux, {source['events']} événements source "
+        f"en {source['seconds']}s ({source['events_per_second']}/s), "
+        f"{result['cpu_us_per_event']} µs CPU/événement",
+        format_latency("publication prédiction", result['prediction_post']),
+        format_latency("édition statut       ", result['status_edit']),
+        format_latency("retard boucle        ", result['loop_lag']),
+        f"  avis (pauses/reprises): {result['notices']}, FloodWait: {result['flood_waits']}, "
+        f"éditions ignorées: {result['edits_skipped']}",
+        f"  bilan: {stats['total']} prédictions, {stats['wins']} gagnées, {stats['losses']} perdues",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de bout en bout avec un faux client Telegram")
+    parser.add_argument('--rate', type=float, default=5.0, help="jeux par seconde (défaut: 5)")
+    parser.add_argument('--duration', type=float, default=30.0, help="durée de publication en secondes")
+    parser.add_argument('--edits', type=int, default=12, help="éditions ⏰ par jeu")
+    parser.add_argument('--game-seconds', type=float, default=2.0, help="durée d'un jeu (⏰ -> ✅)")
+    parser.add_argument('--copies', type=int, default=2, help="réécritures identiques de la version finale")
+    parser.add_argument('--latency-ms', type=float, default=40.0, help="latence moyenne d'un appel Telegram")
+    parser.add_argument('--flood-every', type=int, default=0, help="un FloodWait tous les N appels (0 = jamais)")
+    parser.add_argument('--pause', type=int, default=1, help="durée des pauses du cycle en secondes")
+    parser.add_argument('--in-flight', type=int, default=1, help="prédictions simultanées")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--log', action='store_true', help="garder les logs INFO du bot (stderr)")
+    parser.add_argument('--json', action='store_true', help="sortie JSON")
+    args = parser.parse_args()
+
+    # Fichiers de configuration, tables et journaux du bot dans un répertoire jetable
+    with tempfile.TemporaryDirectory(prefix='bench_load_') as workdir:
+        os.chdir(workdir)
+        import main as bot
+        logging.getLogger().setLevel(logging.INFO if args.log else logging.WARNING)
+        result = asyncio.run(run(bot, args))
+        os.chdir(ROOT)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2) if args.json else format_report(result))
+
+
+if __name__ == '__main__':
+    main()
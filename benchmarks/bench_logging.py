@@ -0,0 +1,80 @@
+"""Coût de la journalisation sur le thread de la boucle asyncio.
+
+Rejoue un historique (format de replay.py, synthétique sans fichier) avec
+le logger du moteur au niveau INFO, écrit dans un fichier temporaire:
+
+- sync   : StreamHandler direct (ancien logging.basicConfig)
+- queue  : QueueHandler -> QueueListener (log_pipeline), sans plafond
+- limité : idem avec LOG_RATE_LIMITS
+- aucun  : journalisation coupée (plancher)
+
+Le temps CPU est celui du thread de la boucle seul (time.thread_time).
+
+    python benchmarks/bench_logging.py [historique.jsonl] [messages]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import replay, read_history
+from config import LOG_RATE_LIMITS
+from log_pipeline import TEXT_FORMAT, setup_logging, stop_logging
+from bench_edit_storm import synthetic_history
+
+
+def configure(mode, stream):
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    if mode == 'sync':
+        logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT, stream=stream, force=True)
+    elif mode == 'aucun':
+        root.setLevel(logging.ERROR)
+    else:
+        return setup_logging(logging.INFO, rates=LOG_RATE_LIMITS if mode == 'limité' else None, stream=stream)
+    return None
+
+
+def run(records, mode):
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as stream:
+        listener = configure(mode, stream)
+        started = time.thread_time()
+        wall = time.perf_counter()
+        result = asyncio.run(replay(records))
+        cpu = time.thread_time() - started
+        wall = time.perf_counter() - wall
+        if listener is not None:
+            stop_logging(listener)
+        stream.flush()
+        stream.seek(0)
+        lines = sum(1 for _ in stream)
+    return cpu, wall, lines, result['stats_bilan']
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+    count = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 50000
+    if path:
+        records = list(itertools.islice(read_history(path), count))
+    else:
+        records = [r for r in synthetic_history(count // 10)][:count]
+    messages = len(records)
+
+    results = {}
+    for mode in ('aucun', 'sync', 'queue', 'limité'):
+        cpu, wall, lines, stats = run(records, mode)
+        results[mode] = stats
+        print(f"  {mode:7s}: {cpu / messages * 1e6:6.1f} µs CPU boucle/message, "
+              f"{wall:5.2f}s, {lines} lignes écrites")
+    identical = all(stats == results['aucun'] for stats in results.values())
+    print(f"{messages} messages, bilan identique: {identical}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Micro-benchmark: coût par message de la recherche costume/déclencheur.
+
+Compare l'ancienne approche (parcours de VALID_EVEN_NUMBERS) aux tables
+précalculées de game_tables.
+
+    python benchmarks/bench_lookup.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_tables import VALID_EVEN_NUMBERS, SUIT_CYCLE, suit_for, trigger_target
+
+
+def legacy_suit(number):
+    if number not in VALID_EVEN_NUMBERS:
+        return None
+    return SUIT_CYCLE[VALID_EVEN_NUMBERS.index(number) % len(SUIT_CYCLE)]
+
+
+def legacy_trigger(number):
+    if number % 2 == 0 or number % 10 not in [1, 3, 5, 7]:
+        return None
+    return number + 1 if number + 1 in VALID_EVEN_NUMBERS else None
+
+
+def legacy_message(number):
+    target = legacy_trigger(number)
+    if target is not None:
+        legacy_suit(target)
+
+
+def table_message(number):
+    target = trigger_target(number)
+    if target is not None:
+        suit_for(target)
+
+
+def run(label, func, repeat=5):
+    numbers = range(6, 1437)
+    timer = timeit.Timer(lambda: [func(n) for n in numbers])
+    best = min(timer.repeat(repeat=repeat, number=20))
+    per_msg = best / (20 * len(numbers)) * 1e9
+    print(f"{label:<10} {per_msg:10.1f} ns/message")
+    return per_msg
+
+
+if __name__ == '__main__':
+    before = run("liste", legacy_message)
+    after = run("table", table_message)
+    print(f"gain       {before / after:10.1f}x")
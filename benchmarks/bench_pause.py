@@ -0,0 +1,77 @@
+"""Pause du cycle: coût du test sur le chemin chaud et ponctualité de la reprise.
+
+Compare l'ancien test (échéance ISO relue et datetime.now() à chaque
+message source) à PauseScheduler.is_paused(), puis mesure le retard du
+message « pause terminée » sur des pauses courtes.
+
+    python benchmarks/bench_pause.py [tests] [pauses]
+"""
+import os
+import sys
+import time
+import asyncio
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pause_scheduler import PauseScheduler
+
+
+def legacy_is_paused(pause_config):
+    """Test d'avant: relu et comparé en heure murale à chaque message"""
+    if pause_config['is_paused']:
+        try:
+            end_time = datetime.fromisoformat(pause_config['pause_end_time'])
+            if datetime.now() < end_time:
+                return True
+            pause_config['is_paused'] = False
+        except (TypeError, ValueError):
+            pause_config['is_paused'] = False
+    return False
+
+
+def per_call(check, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        check()
+    return (time.perf_counter() - started) / count
+
+
+async def lateness(pauses, duration=0.05):
+    """Retards (s) entre l'échéance et l'exécution de la reprise"""
+    delays = []
+    resumed = asyncio.Event()
+
+    async def on_resume():
+        delays.append(time.monotonic() - deadline)
+        resumed.set()
+
+    scheduler = PauseScheduler({}, on_resume)
+    for _ in range(pauses):
+        resumed.clear()
+        scheduler.pause(duration)
+        deadline = scheduler.deadline
+        await resumed.wait()
+    return delays
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    pauses = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    legacy_config = {'is_paused': True, 'pause_end_time': (datetime.now() + timedelta(hours=1)).isoformat()}
+    scheduler = PauseScheduler({})
+    scheduler.pause(3600)
+    legacy = per_call(lambda: legacy_is_paused(legacy_config), count)
+    current = per_call(scheduler.is_paused, count)
+    print(f"Test en pause ({count} appels): ancien {legacy * 1e9:.0f} ns, "
+          f"is_paused() {current * 1e9:.0f} ns (x{legacy / current:.1f})")
+
+    delays = asyncio.run(lateness(pauses))
+    print(f"Reprise annoncée ({pauses} pauses de 50 ms): retard médian {statistics.median(delays) * 1000:.2f} ms, "
+          f"max {max(delays) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Coût d'aiguillage par message: motifs par commande contre table unique.
+
+Avant: Telethon évaluait le motif de chacun des 14 handlers de commande
+plus le handler général sur chaque message reçu (y compris le flux des
+canaux source). Maintenant: un handler, un dict `chat_id -> table`, puis
+une recherche exacte du premier mot pour les commandes.
+
+    python benchmarks/bench_router.py [messages]
+"""
+import os
+import re
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_router import CommandRouter
+
+ADMIN_ID = 1
+SOURCE_ID = -100123
+
+OLD_PATTERNS = [
+    '/start', '/help', '/stop', '/forcestop', '/resume', '/predictinfo', '/clearverif',
+    r'^/pausecycle(\s*[\d\s,]*)?$', r'^/setchannel(\s+.+)?$', r'^/tables$',
+    r'^/addtable(\s+.+)?$', r'^/deltable(\s+.+)?$', '/bilan', '/reset',
+]
+
+
+class FakeEvent:
+    __slots__ = ('chat_id', 'sender_id', 'text', 'is_channel', 'is_group')
+
+    def __init__(self, chat_id, sender_id, text):
+        self.chat_id = chat_id
+        self.sender_id = sender_id
+        self.text = text
+        self.is_channel = chat_id < 0
+        self.is_group = False
+
+    async def respond(self, text):
+        pass
+
+
+async def noop(event, *args):
+    pass
+
+
+def workload(count):
+    """95 % de flux source, 5 % de messages privés (dont des commandes)"""
+    private = ['/stop', '/bilan', '/pausecycle 3,5,4', '/setchannel source -100', 'bonjour', '/resetall']
+    events = []
+    for index in range(count):
+        if index % 20:
+            events.append(FakeEvent(SOURCE_ID, 0, f"#N{index % 1440}. 9(♥K♣2) - ⏰ 7(♠3♦4)"))
+        else:
+            events.append(FakeEvent(ADMIN_ID, ADMIN_ID, private[index // 20 % len(private)]))
+    return events
+
+
+async def old_dispatch(events, compiled, tables):
+    hits = 0
+    for event in events:
+        # Un handler par motif, chacun testé sur chaque message
+        for pattern in compiled:
+            if pattern.match(event.text):
+                if event.sender_id == ADMIN_ID:
+                    hits += 1
+        # Handler général
+        if event.is_group or event.is_channel:
+            if tables.get(event.chat_id) is not None:
+                continue
+            continue
+        if event.text.startswith('/'):
+            continue
+    return hits
+
+
+async def new_dispatch(events, router, tables):
+    for event in events:
+        if tables.get(event.chat_id) is not None:
+            continue
+        await router.dispatch(event, event.text)
+    return router.dispatched
+
+
+async def run(count):
+    events = workload(count)
+    tables = {SOURCE_ID: object()}
+    compiled = [re.compile(pattern) for pattern in OLD_PATTERNS]
+    router = CommandRouter(lambda user_id: user_id == ADMIN_ID)
+    for pattern in OLD_PATTERNS:
+        name = re.match(r'\^?(/\w+)', pattern).group(1)
+        router.command(name, rest=True)(noop)
+
+    started = time.perf_counter()
+    old_hits = await old_dispatch(events, compiled, tables)
+    old_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    new_hits = await new_dispatch(events, router, tables)
+    new_elapsed = time.perf_counter() - started
+
+    print(f"{count} messages")
+    print(f"  motifs par handler: {old_elapsed / count * 1e9:8.0f} ns/message, {old_hits} commandes exécutées")
+    print(f"  table unique      : {new_elapsed / count * 1e9:8.0f} ns/message, {new_hits} commandes exécutées")
+    print(f"  (l'ancien aiguillage exécutait aussi /reset pour '/resetall')")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    asyncio.run(run(count))
+
+
+if __name__ == '__main__':
+    main()
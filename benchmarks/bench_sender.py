@@ -0,0 +1,93 @@
+"""Débit et latence de TelegramSender face à un client simulé limité en débit.
+
+Le faux client accepte `limit` appels par fenêtre de `window` secondes et
+lève un FloodWait au-delà, comme Telegram.
+
+    python benchmarks/bench_sender.py [messages]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram_sender import TelegramSender, PRIORITY_NOTICE
+
+
+class FakeFloodWait(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"flood wait {seconds}s")
+        self.seconds = seconds
+
+
+class FakeMessage:
+    def __init__(self, message_id):
+        self.id = message_id
+
+
+class FakeFloodClient:
+    def __init__(self, limit=30, window=0.5, latency=0.001):
+        self.limit = limit
+        self.window = window
+        self.latency = latency
+        self.calls = []
+        self.entity_lookups = 0
+
+    async def get_input_entity(self, chat):
+        self.entity_lookups += 1
+        await asyncio.sleep(self.latency)
+        return chat
+
+    async def _call(self):
+        now = time.monotonic()
+        self.calls = [t for t in self.calls if now - t < self.window]
+        if len(self.calls) >= self.limit:
+            raise FakeFloodWait(self.window - (now - self.calls[0]))
+        self.calls.append(now)
+        await asyncio.sleep(self.latency)
+
+    async def send_message(self, chat, text):
+        await self._call()
+        return FakeMessage(len(text))
+
+    async def edit_message(self, chat, message_id, text):
+        await self._call()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(messages):
+    logging.getLogger('telegram_sender').setLevel(logging.ERROR)
+    client = FakeFloodClient()
+    sender = TelegramSender(client, rate=100.0, burst=50, flood_errors=(FakeFloodWait,))
+    sender.start()
+
+    start = time.perf_counter()
+    futures = []
+    for i in range(messages):
+        if i % 3 == 0:
+            futures.append(sender.submit(PRIORITY_NOTICE, 'send_message', -100, f"notice {i}"))
+        elif i % 3 == 1:
+            futures.append(sender.submit(0, 'edit_message', -100, i, f"edit {i}"))
+        else:
+            futures.append(sender.submit(1, 'send_message', -100, f"prediction {i}"))
+    await asyncio.gather(*futures)
+    elapsed = time.perf_counter() - start
+    await sender.stop()
+
+    latencies = list(sender.latencies)
+    print(f"messages       {messages}")
+    print(f"durée          {elapsed:.2f}s ({messages / elapsed:.1f} msg/s)")
+    print(f"FloodWait      {sender.flood_waits}")
+    print(f"résolutions    {client.entity_lookups}")
+    print(f"latence p50    {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"latence p99    {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 300))
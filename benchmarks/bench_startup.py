@@ -0,0 +1,90 @@
+"""Profil de démarrage: temps d'import de main.py (python -X importtime).
+
+Lance plusieurs interpréteurs frais, garde la médiane, et affiche le total
+ainsi que les modules de premier niveau les plus coûteux (temps cumulé,
+dépendances comprises). Les .pyc sont déjà compilés après le premier essai.
+Mesure aussi le délai entre le lancement de l'interpréteur et la première
+réponse de /health (serveur web seul, sans connexion Telegram).
+
+    python benchmarks/bench_startup.py [essais] [module]
+"""
+import os
+import sys
+import time
+import socket
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIN_REPORTED_US = 2000
+
+HEALTH_PROBE = """
+import asyncio, aiohttp, main
+main.PORT = {port}
+async def probe():
+    await main.start_web()
+    async with aiohttp.ClientSession() as session:
+        async with session.get('http://127.0.0.1:{port}/health') as response:
+            print(response.status, await response.text())
+asyncio.run(probe())
+"""
+
+
+def importtime(module):
+    """{module de premier niveau: µs cumulées} pour un interpréteur frais"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        # Profondeur 1: importé directement par le module mesuré
+        if depth <= 1:
+            timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def time_to_health():
+    """Secondes entre le lancement de l'interpréteur et la réponse de /health"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', HEALTH_PROBE.format(port=port)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    lines = result.stdout.strip().splitlines()  # les logs du bot vont aussi sur stdout
+    if not lines or not lines[-1].startswith('200'):
+        raise RuntimeError(result.stderr.strip() or result.stdout)
+    return elapsed
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    module = sys.argv[2] if len(sys.argv) > 2 else 'main'
+
+    importtime(module)  # compilation des .pyc
+    samples = [importtime(module) for _ in range(runs)]
+    names = set().union(*samples)
+    medians = {name: statistics.median(s.get(name, 0) for s in samples) for name in names}
+
+    print(f"import {module}: {medians.get(module, 0) / 1000:.1f} ms (médiane de {runs})")
+    for name, micros in sorted(medians.items(), key=lambda item: -item[1]):
+        if name != module and micros >= MIN_REPORTED_US:
+            print(f"  {micros / 1000:7.1f} ms  {name}")
+
+    if module == 'main':
+        health = statistics.median(time_to_health() for _ in range(runs))
+        print(f"Lancement -> /health 200: {health * 1000:.0f} ms (médiane de {runs})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Contrôle: strategy_sweep.py doit donner le même bilan que replay.py.
+
+Rejoue chaque historique avec le vrai moteur et avec le balayage vectorisé
+(SUIT_CYCLE) pour plusieurs cycles de pause, puis compare (total, gagnés,
+perdus, pauses, resets). Historiques synthétiques couverts:
+
+- finales recopiées (le jeu qui résout une prédiction peut en lancer une);
+- finales sans copie;
+- numérotation du canal réel qui passe #1436-#1440 puis repart à #1
+  (checks d'une prédiction de #1436 sur #1437-#1440).
+
+Un historique JSONL peut être ajouté en argument. Code de sortie 1 au
+premier écart.
+
+    python benchmarks/check_sweep_replay.py [historique.jsonl]
+"""
+import os
+import sys
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import read_history
+from strategy_sweep import check_against_replay
+from bench_edit_storm import synthetic_history
+
+PAUSE_CYCLES = [[180, 300, 240], [60], [120, 60]]
+
+
+def without_copies(records):
+    """Retire les réécritures identiques d'un même message"""
+    last = {}
+    kept = []
+    for record in records:
+        if last.get(record[0]) != record[1]:
+            last[record[0]] = record[1]
+            kept.append(record)
+    return kept
+
+
+def histories(path=None):
+    copies = synthetic_history(8000, seed=3)
+    yield "finales recopiées", copies
+    yield "finales sans copie", without_copies(copies)
+    yield "passage #1440 -> #1", synthetic_history(4000, seed=5, first_number=1000)
+    if path:
+        yield path, list(read_history(path))
+
+
+def main():
+    logging.getLogger().setLevel(logging.WARNING)
+    mismatches = 0
+    for name, records in histories(sys.argv[1] if len(sys.argv) > 1 else None):
+        for minutes, expected, got in check_against_replay(records, PAUSE_CYCLES):
+            mismatches += expected != got
+            print(f"{'✅' if expected == got else '❌'} {name}, pause {minutes}: rejeu {expected}, balayage {got}")
+    print("(total, gagnés, perdus, pauses, resets)")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
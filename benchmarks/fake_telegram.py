@@ -0,0 +1,158 @@
+"""Faux client Telethon en mémoire pour les tests de charge (sans compte Telegram).
+
+Expose la partie de TelegramClient utilisée par le bot (send_message,
+edit_message, get_input_entity, iter_messages, is_connected,
+add_event_handler) et enregistre chaque envoi et chaque édition avec son
+heure. Les messages publiés dans un canal par `post()` / `edit()`
+déclenchent les handlers comme le ferait Telethon (NewMessage /
+MessageEdited) et restent lisibles par le rattrapage (iter_messages).
+"""
+import time
+import random
+import asyncio
+
+NEW_MESSAGE = 'new'
+MESSAGE_EDITED = 'edit'
+
+
+class FakeFloodWait(Exception):
+    """Même contrat que telethon.errors.FloodWaitError (`.seconds`)"""
+
+    def __init__(self, seconds):
+        super().__init__(f"flood {seconds}s")
+        self.seconds = seconds
+
+
+class FakeMessage:
+    __slots__ = ('id', 'chat_id', 'message', 'date')
+
+    def __init__(self, message_id, chat_id, text):
+        self.id = message_id
+        self.chat_id = chat_id
+        self.message = text
+        self.date = time.time()
+
+
+class FakeEvent:
+    """Événement NewMessage / MessageEdited minimal"""
+    __slots__ = ('chat_id', 'message', 'sender_id', 'is_private', 'is_group', 'is_channel', 'responses')
+
+    def __init__(self, message, sender_id=None):
+        self.chat_id = message.chat_id
+        self.message = message
+        self.sender_id = sender_id
+        self.is_private = sender_id is not None and message.chat_id == sender_id
+        self.is_group = False
+        self.is_channel = message.chat_id < 0
+        self.responses = []
+
+    async def respond(self, text, **kwargs):
+        self.responses.append(text)
+
+
+class Sent:
+    """Un appel sortant du bot: heure (perf_counter), chat, message, texte"""
+    __slots__ = ('at', 'chat', 'message_id', 'text', 'edit')
+
+    def __init__(self, at, chat, message_id, text, edit):
+        self.at = at
+        self.chat = chat
+        self.message_id = message_id
+        self.text = text
+        self.edit = edit
+
+
+class FakeTelegramClient:
+    """`latency`: (min, max) secondes par appel sortant; `flood_every`: un
+    FloodWait de `flood_seconds` tous les N appels (0 = jamais)"""
+
+    def __init__(self, latency=(0.02, 0.06), flood_every=0, flood_seconds=1, seed=1):
+        self.latency = latency
+        self.flood_every = flood_every
+        self.flood_seconds = flood_seconds
+        self.random = random.Random(seed)
+        self.connected = True
+
+        self.handlers = {NEW_MESSAGE: [], MESSAGE_EDITED: []}
+        self.channels = {}
+        self.sent = []
+        self.calls = 0
+        self.flood_waits = 0
+        self._ids = {}
+        self._tasks = set()
+
+    # --- Côté bot (API Telethon) ---
+
+    def add_event_handler(self, handler, kind):
+        self.handlers[kind].append(handler)
+
+    def is_connected(self):
+        return self.connected
+
+    async def get_input_entity(self, chat):
+        return chat
+
+    async def send_message(self, chat, text, **kwargs):
+        await self._call()
+        message = self._store(chat, text)
+        self.sent.append(Sent(time.perf_counter(), chat, message.id, text, False))
+        return message
+
+    async def edit_message(self, chat, message_id, text, **kwargs):
+        await self._call()
+        stored = self.channels.get(chat, {}).get(message_id)
+        if stored is not None:
+            stored.message = text
+        self.sent.append(Sent(time.perf_counter(), chat, message_id, text, True))
+        return stored
+
+    async def iter_messages(self, chat, min_id=0, limit=None, wait_time=None, **kwargs):
+        """Du plus récent au plus ancien, comme Telethon"""
+        messages = self.channels.get(chat, {})
+        count = 0
+        for message_id in sorted(messages, reverse=True):
+            if message_id <= min_id or (limit is not None and count >= limit):
+                break
+            count += 1
+            yield messages[message_id]
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def _call(self):
+        self.calls += 1
+        call = self.calls
+        low, high = self.latency
+        await asyncio.sleep(self.random.uniform(low, high))
+        if self.flood_every and call % self.flood_every == 0:
+            self.flood_waits += 1
+            raise FakeFloodWait(self.flood_seconds)
+
+    # --- Côté canal source (simulation) ---
+
+    def post(self, chat, text):
+        """Nouveau message dans `chat`: handlers NewMessage; retourne l'id"""
+        message = self._store(chat, text)
+        self._dispatch(NEW_MESSAGE, FakeEvent(FakeMessage(message.id, chat, text)))
+        return message.id
+
+    def edit(self, chat, message_id, text):
+        """Édition d'un message de `chat`: handlers MessageEdited"""
+        self.channels[chat][message_id].message = text
+        # Copie: l'édition suivante ne doit pas changer le texte vu par ce handler
+        self._dispatch(MESSAGE_EDITED, FakeEvent(FakeMessage(message_id, chat, text)))
+
+    def _store(self, chat, text):
+        message_id = self._ids.get(chat, 0) + 1
+        self._ids[chat] = message_id
+        message = FakeMessage(message_id, chat, text)
+        self.channels.setdefault(chat, {})[message_id] = message
+        return message
+
+    def _dispatch(self, kind, event):
+        # Telethon lance chaque handler dans une tâche de la boucle
+        loop = asyncio.get_running_loop()
+        for handler in self.handlers[kind]:
+            task = loop.create_task(handler(event))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
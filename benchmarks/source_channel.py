@@ -0,0 +1,122 @@
+"""Canal source synthétique: numérotation, éditions et groupes de cartes réalistes.
+
+Chaque jeu est publié en ⏰ (distribution en cours), réécrit `edits` fois
+pendant `game_seconds` (les groupes de cartes grandissent), puis finalisé
+(✅, parfois 🔰) et recopié à l'identique `copies` fois avant la version
+finale du jeu suivant. Les jeux démarrent à `games_per_second`; la numérotation suit le canal réel (#N1 à #N1440
+puis retour à #N1). Le générateur est déterministe pour une graine donnée
+et note l'heure de chaque publication pour les mesures de latence.
+"""
+import time
+import heapq
+import random
+import asyncio
+from bisect import bisect_right
+
+SUITS = ['♠️', '♥️', '♦️', '♣️']
+RANKS = ['A', 'K', 'Q', 'J', '10', '9', '8', '7', '6', '5', '4', '3', '2']
+LAST_GAME_NUMBER = 1440
+
+NEW = 'new'
+EDIT = 'edit'
+
+
+def _cards(rng, count):
+    return [f"{rng.choice(RANKS)}{rng.choice(SUITS)}" for _ in range(count)]
+
+
+def game_texts(number, rng, edits):
+    """[(final?, texte)] d'un jeu: publication ⏰, éditions ⏰, version finale"""
+    player = _cards(rng, 3 if rng.random() < 0.4 else 2)
+    banker = _cards(rng, 3 if rng.random() < 0.4 else 2)
+    texts = [(False, f"⏰#N{number}. ▶️")]
+    for step in range(edits):
+        shown = 1 + step * (len(player) + len(banker)) // max(1, edits)
+        hand = (player + banker)[:shown]
+        p, b = hand[:len(player)], hand[len(player):]
+        texts.append((False, f"⏰#N{number}. ▶️ {len(p)}({''.join(p)}) - {len(b)}({''.join(b)})"))
+    marker = '🔰' if rng.random() < 0.1 else '✅'
+    texts.append((True, f"#N{number}. {marker} {rng.randint(0, 9)}({''.join(player)}) - "
+                        f"{rng.randint(0, 9)}({''.join(banker)}) #T{rng.randint(2, 12)}"))
+    return texts
+
+
+class SyntheticSource:
+    """Publie un canal source simulé dans un FakeTelegramClient"""
+
+    def __init__(self, client, chat_id, games_per_second=5.0, edits=12, game_seconds=2.0,
+                 copies=2, first_number=None, seed=7):
+        self.client = client
+        self.chat_id = chat_id
+        self.games_per_second = games_per_second
+        self.edits = edits
+        self.game_seconds = game_seconds
+        self.copies = copies
+        # Copies entre la version finale du jeu et celle du suivant
+        self.copy_interval = 1.0 / games_per_second / (copies + 1)
+        self.rng = random.Random(seed)
+        self.first_number = first_number or self.rng.randint(1, LAST_GAME_NUMBER)
+
+        self.posted = 0
+        self.edited = 0
+        # numéro -> heures (perf_counter) de toutes les publications / de la
+        # première version finale de chaque occurrence du numéro
+        self.emitted = {}
+        self.finals = {}
+
+    def schedule(self, duration):
+        """[(décalage, ordre, index du jeu, action, final?, numéro, texte)] trié"""
+        events = []
+        games = int(duration * self.games_per_second)
+        order = 0
+        for index in range(games):
+            number = (self.first_number - 1 + index) % LAST_GAME_NUMBER + 1
+            start = index / self.games_per_second
+            texts = game_texts(number, self.rng, self.edits)
+            step = self.game_seconds / max(1, len(texts) - 1)
+            for position, (final, text) in enumerate(texts):
+                action = NEW if position == 0 else EDIT
+                events.append((start + position * step, order, index, action, final, number, text))
+                order += 1
+            last = start + (len(texts) - 1) * step
+            for copy in range(self.copies):
+                events.append((last + (copy + 1) * self.copy_interval, order, index, EDIT, True, number, texts[-1][1]))
+                order += 1
+        heapq.heapify(events)
+        return [heapq.heappop(events) for _ in range(len(events))]
+
+    async def run(self, duration):
+        """Publie le canal en temps réel; retourne la durée effective"""
+        message_ids = {}
+        finalized = set()
+        started = time.perf_counter()
+        for offset, _, index, action, final, number, text in self.schedule(duration):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            now = time.perf_counter()
+            if action == NEW:
+                message_ids[index] = self.client.post(self.chat_id, text)
+                self.posted += 1
+            else:
+                self.client.edit(self.chat_id, message_ids[index], text)
+                self.edited += 1
+            self.emitted.setdefault(number, []).append(now)
+            if final and index not in finalized:
+                finalized.add(index)
+                self.finals.setdefault(number, []).append(now)
+        return time.perf_counter() - started
+
+    @staticmethod
+    def last_before(times, moment):
+        """Dernière heure de `times` antérieure à `moment` (None si aucune)"""
+        index = bisect_right(times or (), moment)
+        return times[index - 1] if index else None
+
+    def trigger_time(self, number, moment):
+        """Dernière publication du jeu `number` avant `moment`"""
+        return self.last_before(self.emitted.get(number), moment)
+
+    def final_time(self, number, moment):
+        """Première version finale du jeu `number` (dernière occurrence avant `moment`)"""
+        return self.last_before(self.finals.get(number), moment)
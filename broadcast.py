@@ -0,0 +1,200 @@
+"""Diffusion des prédictions en messages privés aux abonnés actifs.
+
+Les destinataires viennent de l'index des abonnés actifs du UserStore (pas
+de parcours de tous les utilisateurs). Un pool borné de tâches consomme une
+file commune: un seau à jetons propre à la diffusion (budget distinct de
+celui de l'envoyeur du canal, qui n'est jamais ralenti par elle) et un
+intervalle minimal par chat limitent le débit. Un FloodWait suspend tout
+le pool, les autres erreurs sont rejouées avec un délai exponentiel, et les
+utilisateurs qui ont bloqué le bot sont enregistrés dans le store, qui les
+exclut des diffusions suivantes.
+"""
+import time
+import asyncio
+import logging
+import itertools
+
+from metrics import BROADCAST_SECONDS, BROADCAST_MESSAGES, BROADCAST_BLOCKED, FLOOD_WAITS
+from telegram_sender import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 16
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 10
+DEFAULT_CHAT_INTERVAL = 1.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 2.0
+
+
+class Broadcast:
+    """Une diffusion: compteurs et future résolu à la fin"""
+    __slots__ = ('id', 'text', 'total', 'sent', 'failed', 'blocked', 'retries',
+                 'started', 'finished', 'done')
+
+    def __init__(self, broadcast_id, text, started):
+        self.id = broadcast_id
+        self.text = text
+        self.total = 0
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.retries = 0
+        self.started = started
+        self.finished = None
+        self.done = asyncio.get_running_loop().create_future()
+
+    @property
+    def remaining(self):
+        return self.total - self.sent - self.failed - self.blocked
+
+    @property
+    def duration(self):
+        return None if self.finished is None else self.finished - self.started
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'total': self.total,
+            'sent': self.sent,
+            'failed': self.failed,
+            'blocked': self.blocked,
+            'retries': self.retries,
+            'remaining': self.remaining,
+            'duration': self.duration,
+        }
+
+
+class Broadcaster:
+    """Pool d'envoi vers les abonnés
+
+    `recipients()` (coroutine) retourne les user_id actifs; `on_blocked(user_id,
+    reason)` (coroutine) enregistre un utilisateur à exclure.
+    """
+
+    def __init__(self, client, recipients, on_blocked, workers=DEFAULT_WORKERS, bucket=None,
+                 chat_interval=DEFAULT_CHAT_INTERVAL, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff=DEFAULT_BACKOFF, flood_errors=(), blocked_errors=(), clock=time.monotonic):
+        self.client = client
+        self.recipients = recipients
+        self.on_blocked = on_blocked
+        self.workers = workers
+        self.bucket = bucket or TokenBucket(DEFAULT_RATE, DEFAULT_BURST, clock)
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.flood_errors = tuple(flood_errors)
+        self.blocked_errors = tuple(blocked_errors)
+        self.clock = clock
+
+        self.last = None
+        self.flood_waits = 0
+
+        self._next_allowed = {}
+        self._ids = itertools.count(1)
+        self._queue = asyncio.Queue()
+        self._tasks = []
+
+    def attach(self, client, flood_errors=(), blocked_errors=()):
+        """Branche le client créé après coup (démarrage différé de Telethon)"""
+        self.client = client
+        self.flood_errors = tuple(flood_errors)
+        self.blocked_errors = tuple(blocked_errors)
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    # --- Diffusion ---
+
+    async def broadcast(self, text):
+        """Met en file `text` pour tous les abonnés actifs; retourne le Broadcast"""
+        broadcast = Broadcast(next(self._ids), text, self.clock())
+        self.last = broadcast
+        self._prune_chat_limits()
+        for user_id in await self.recipients():
+            broadcast.total += 1
+            self._queue.put_nowait((broadcast, user_id, 0))
+        logger.info(f"📣 Diffusion #{broadcast.id}: {broadcast.total} destinataires")
+        if broadcast.total == 0:
+            self._finish(broadcast)
+        return broadcast
+
+    def _prune_chat_limits(self):
+        now = self.clock()
+        if len(self._next_allowed) > 1024:
+            self._next_allowed = {chat: t for chat, t in self._next_allowed.items() if t > now}
+
+    def _requeue(self, delay, item):
+        if delay <= 0:
+            self._queue.put_nowait(item)
+        else:
+            asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, item)
+
+    def _finish(self, broadcast):
+        broadcast.finished = self.clock()
+        BROADCAST_SECONDS.observe(broadcast.duration)
+        logger.info(f"📣 Diffusion #{broadcast.id} terminée en {broadcast.duration:.1f}s: "
+                    f"{broadcast.sent} envoyés, {broadcast.blocked} bloqués, {broadcast.failed} échecs")
+        if not broadcast.done.done():
+            broadcast.done.set_result(broadcast)
+
+    # --- Pool ---
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            broadcast, user_id, attempt = item
+
+            # Un message par chat et par intervalle (diffusions rapprochées)
+            wait = self._next_allowed.get(user_id, 0.0) - self.clock()
+            if wait > 0:
+                self._requeue(wait, item)
+                continue
+
+            await self.bucket.acquire()
+            self._next_allowed[user_id] = self.clock() + self.chat_interval
+            try:
+                await self.client.send_message(user_id, broadcast.text)
+            except self.flood_errors as e:
+                self.flood_waits += 1
+                FLOOD_WAITS.inc()
+                self.bucket.block(e.seconds)
+                logger.warning(f"⏳ FloodWait {e.seconds}s (diffusion #{broadcast.id})")
+                broadcast.retries += 1
+                self._requeue(0, (broadcast, user_id, attempt))
+                continue
+            except self.blocked_errors as e:
+                broadcast.blocked += 1
+                BROADCAST_BLOCKED.inc()
+                try:
+                    await self.on_blocked(user_id, type(e).__name__)
+                except Exception as store_error:
+                    logger.error(f"Erreur enregistrement bloqué {user_id}: {store_error}")
+            except Exception as e:
+                if attempt < self.max_retries:
+                    broadcast.retries += 1
+                    self._requeue(self.backoff * 2 ** attempt, (broadcast, user_id, attempt + 1))
+                    continue
+                broadcast.failed += 1
+                logger.warning(f"❌ Diffusion #{broadcast.id} → {user_id}: {e}")
+            else:
+                broadcast.sent += 1
+                BROADCAST_MESSAGES.inc()
+
+            if broadcast.remaining == 0:
+                self._finish(broadcast)
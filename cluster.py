@@ -0,0 +1,542 @@
+"""Mode multi-processus: tables réparties sur K processus de travail.
+
+Le processus passerelle garde la connexion Telethon (et la table
+principale). Les tables secondaires sont réparties entre K processus par
+hachage cohérent de leur canal source. Chaque processus fait tourner son
+propre TableRegistry sur sa propre boucle asyncio. Les échanges passent par
+des `multiprocessing.Pipe`, sous forme de tuples courts:
+
+    passerelle -> processus   ('msg', chat_id, message_id, texte, édition)
+                              ('own', [config table]) / ('drop', nom)
+                              ('result', req_id, valeur, erreur) / ('connected', bool)
+                              ('max_in_flight', nombre)
+    processus -> passerelle   ('send', req_id, méthode, chat, args)
+                              ('history', req_id, chat, min_id, limite)
+                              ('dropped', nom) / ('status', req_id, [résumés])
+
+Quand un processus meurt, ses tables passent aux suivants sur l'anneau
+(leur état est relu depuis leur journal), puis un remplaçant est démarré
+et récupère sa part après un transfert propre (drop -> dropped -> own).
+"""
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import itertools
+import multiprocessing
+from bisect import bisect_right
+
+from log_pipeline import setup_logging, stop_logging
+from persistence import JsonPersistence
+from table_registry import TableRegistry, TableServices, TABLES_DIR, WATCH_INTERVAL, check_table_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLICAS = 64
+RESPAWN_DELAY = 1.0
+
+
+def _hash(key):
+    # Stable d'un processus à l'autre (contrairement à hash() sur les str)
+    return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Anneau de hachage cohérent (`replicas` points virtuels par nœud)"""
+
+    def __init__(self, nodes=(), replicas=DEFAULT_REPLICAS):
+        self.replicas = replicas
+        self._points = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self):
+        return len(set(self._owners))
+
+    def add(self, node):
+        points = dict(zip(self._points, self._owners))
+        for replica in range(self.replicas):
+            points[_hash(f"{node}#{replica}")] = node
+        self._points = sorted(points)
+        self._owners = [points[point] for point in self._points]
+
+    def remove(self, node):
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def owner(self, key):
+        if not self._points:
+            return None
+        index = bisect_right(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+# ============================================================
+# PROCESSUS DE TRAVAIL
+# ============================================================
+
+class _SentMessage:
+    __slots__ = ('id',)
+
+    def __init__(self, message_id):
+        self.id = message_id
+
+
+class _HistoryMessage:
+    __slots__ = ('id', 'message')
+
+    def __init__(self, message_id, text):
+        self.id = message_id
+        self.message = text
+
+
+class WorkerLink:
+    """Côté processus: envoyeur et client Telegram relayés par la passerelle"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.connected = False
+        self._requests = {}
+        self._ids = itertools.count(1)
+
+    def _request(self, *message):
+        req_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._requests[req_id] = future
+        self.conn.send((message[0], req_id) + message[1:])
+        return future
+
+    def resolve(self, req_id, value, error):
+        future = self._requests.pop(req_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(value)
+
+    # --- Interface TelegramSender ---
+
+    async def send_message(self, chat, text):
+        return _SentMessage(await self._request('send', 'send_message', chat, (text,)))
+
+    async def send_notice(self, chat, text):
+        return _SentMessage(await self._request('send', 'send_notice', chat, (text,)))
+
+    async def edit_message(self, chat, message_id, text):
+        return await self._request('send', 'edit_message', chat, (message_id, text))
+
+    # --- Interface client (rattrapage) ---
+
+    def is_connected(self):
+        return self.connected
+
+    async def iter_messages(self, chat, min_id=0, limit=None, wait_time=None):
+        for message_id, text in await self._request('history', chat, min_id, limit):
+            yield _HistoryMessage(message_id, text)
+
+
+def _load_json_file(file_path, default=None):
+    try:
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        logger.error(f"Erreur chargement {file_path}: {e}")
+    return default or {}
+
+
+def _table_summary(table):
+    engine = table.engine
+    return {
+        'name': table.name,
+        'source_channel_id': table.source_channel_id,
+        'prediction_channel_id': table.prediction_channel_id,
+        'current_game': engine.current_game_number,
+        'pending': engine.predicted_number,
+        'max_in_flight': engine.max_in_flight,
+        'stats': {key: engine.stats[key] for key in ('total', 'wins', 'losses')},
+    }
+
+
+async def _worker(worker_id, conn, settings):
+    loop = asyncio.get_running_loop()
+    link = WorkerLink(conn)
+    persistence = JsonPersistence()
+    persistence.start()
+    admin_id = settings.get('admin_id')
+
+    async def on_timeout(table, reason, message):
+        logger.warning(f"🚨 RESET AUTOMATIQUE [{table.label}]: {message}")
+        await table.engine.reset()
+        table.engine.predictions_enabled = True
+        table.engine.last_prediction_time = table.engine.now()
+        table.engine.touch()
+        if admin_id:
+            await link.send_notice(admin_id, f"🚨 **RESET AUTOMATIQUE EFFECTUÉ**\n\n"
+                                             f"**Table:** {table.label}\n**Raison:** {message}")
+
+    async def on_feed_stalled(table, seconds):
+        logger.warning(f"📡 FLUX SOURCE SILENCIEUX [{table.label}] depuis {seconds}s")
+        if admin_id:
+            await link.send_notice(admin_id, f"📡 **FLUX SOURCE INTERROMPU**\n\n"
+                                             f"**Table:** {table.label}\nAucun message depuis {seconds // 60} min.")
+
+    registry = TableRegistry(TableServices(
+        link, link,
+        save_json=lambda file_path, data: persistence.mark_dirty(file_path, data),
+        load_json=_load_json_file,
+        on_timeout=on_timeout,
+        on_feed_stalled=on_feed_stalled,
+        timeouts=settings.get('timeouts', {}),
+        max_in_flight=settings.get('max_in_flight', 1)
+    ), base_dir=settings.get('tables_dir', TABLES_DIR))
+    registry.start()
+
+    stopped = asyncio.Event()
+    tasks = set()
+
+    def spawn(coro):
+        task = loop.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def drop(name):
+        await registry.remove(name)
+        await persistence.flush()
+        conn.send(('dropped', name))
+
+    def on_readable():
+        try:
+            while conn.poll():
+                message = conn.recv()
+                kind = message[0]
+                if kind == 'msg':
+                    _, chat_id, message_id, text, is_edit = message
+                    table = registry.get(chat_id)
+                    if table is not None:
+                        table.on_message(message_id, text, is_edit)
+                elif kind == 'result':
+                    link.resolve(*message[1:])
+                elif kind == 'own':
+                    for entry in message[1]:
+                        try:
+                            registry.add(entry['name'], entry['source_channel_id'], entry['prediction_channel_id'])
+                        except ValueError as e:
+                            logger.error(f"❌ [worker {worker_id}] {e}")
+                elif kind == 'drop':
+                    spawn(drop(message[1]))
+                elif kind == 'connected':
+                    link.connected = message[1]
+                elif kind == 'max_in_flight':
+                    registry.set_max_in_flight(message[1])
+                elif kind == 'status':
+                    conn.send(('status', message[1], [_table_summary(table) for table in registry]))
+                elif kind == 'stop':
+                    stopped.set()
+                    return
+        except (EOFError, OSError):
+            # Passerelle disparue
+            stopped.set()
+
+    loop.add_reader(conn.fileno(), on_readable)
+    conn.send(('ready', worker_id))
+    await stopped.wait()
+    loop.remove_reader(conn.fileno())
+    await registry.stop()
+    await persistence.stop()
+
+
+def worker_main(worker_id, conn, settings):
+    """Point d'entrée d'un processus de travail"""
+    listener = setup_logging(
+        settings.get('log_level', logging.INFO), json_output=settings.get('log_json', False),
+        rates=settings.get('log_rates'), worker_id=worker_id,
+        text_format=f'%(asctime)s - worker {worker_id} - %(levelname)s - %(message)s'
+    )
+    try:
+        asyncio.run(_worker(worker_id, conn, settings))
+    finally:
+        stop_logging(listener)
+
+
+# ============================================================
+# PASSERELLE
+# ============================================================
+
+class _WorkerHandle:
+    __slots__ = ('worker_id', 'process', 'conn', 'ready')
+
+    def __init__(self, worker_id, process, conn):
+        self.worker_id = worker_id
+        self.process = process
+        self.conn = conn
+        self.ready = False
+
+
+class Supervisor:
+    """Répartit les tables sur `workers` processus et relaie leurs envois
+
+    `sender` expose send_message / send_notice / edit_message (TelegramSender);
+    `history(chat, min_id, limit)` retourne [(id, texte)] du plus récent au
+    plus ancien. Les deux peuvent être des faux pour les tests.
+    """
+
+    def __init__(self, workers, sender, history=None, settings=None, is_connected=None,
+                 replicas=DEFAULT_REPLICAS, respawn=True, mp_context='spawn'):
+        self.worker_count = workers
+        self.sender = sender
+        self.history = history
+        # Sondé périodiquement: les reconnexions déclenchent le rattrapage côté processus
+        self.is_connected = is_connected
+        self.settings = settings or {}
+        self.respawn = respawn
+        self.ring = HashRing(replicas=replicas)
+        self.deaths = 0
+
+        self._context = multiprocessing.get_context(mp_context)
+        self._workers = {}
+        self._tables = {}          # nom -> config
+        self._by_source = {}       # chat_id -> nom
+        self._owner = {}           # nom -> worker_id
+        self._moving = {}          # nom -> messages en attente pendant un transfert
+        self._connected = False
+        self._status_requests = {}
+        self._status_ids = itertools.count(1)
+        self._tasks = set()
+        self._loop = None
+        self._watch_task = None
+        self._stopping = False
+
+    # --- Tables ---
+
+    def add_table(self, config):
+        name = config['name']
+        check_table_name(name)
+        if name in self._tables:
+            raise ValueError(f"Table '{name}' déjà existante")
+        if config['source_channel_id'] in self._by_source:
+            raise ValueError(f"Canal source {config['source_channel_id']} déjà utilisé")
+        self._tables[name] = config
+        self._by_source[config['source_channel_id']] = name
+        if self._loop is not None:
+            self._assign(name, self.ring.owner(config['source_channel_id']))
+
+    def remove_table(self, name):
+        config = self._tables.pop(name, None)
+        if config is None:
+            return False
+        self._by_source.pop(config['source_channel_id'], None)
+        owner = self._owner.pop(name, None)
+        if owner in self._workers:
+            self._send(owner, ('drop', name))
+        return True
+
+    def owns(self, chat_id):
+        return chat_id in self._by_source
+
+    def to_config(self):
+        return {'tables': list(self._tables.values())}
+
+    def dispatch(self, chat_id, message_id, text, is_edit=False):
+        """Transmet un message source au processus propriétaire; False si canal inconnu"""
+        name = self._by_source.get(chat_id)
+        if name is None:
+            return False
+        message = ('msg', chat_id, message_id, text, is_edit)
+        moving = self._moving.get(name)
+        if moving is not None:
+            moving.append(message)
+        else:
+            self._send(self._owner.get(name), message)
+        return True
+
+    def set_max_in_flight(self, count):
+        """Prédictions simultanées des tables réparties (processus actuels et remplaçants)"""
+        self.settings['max_in_flight'] = count
+        for worker_id in self._workers:
+            self._send(worker_id, ('max_in_flight', count))
+
+    def set_connected(self, connected):
+        self._connected = connected
+        for worker_id in self._workers:
+            self._send(worker_id, ('connected', connected))
+
+    async def status(self, timeout=5.0):
+        """Résumé de toutes les tables réparties"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for worker_id in list(self._workers):
+            req_id = next(self._status_ids)
+            future = loop.create_future()
+            self._status_requests[req_id] = future
+            futures.append(future)
+            self._send(worker_id, ('status', req_id))
+        if not futures:
+            return []
+        done, _ = await asyncio.wait(futures, timeout=timeout)
+        return [summary for future in done for summary in future.result()]
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        for worker_id in range(self.worker_count):
+            self._spawn(worker_id)
+        for name, config in self._tables.items():
+            self._assign(name, self.ring.owner(config['source_channel_id']))
+        if self.is_connected is not None:
+            self._watch_task = self._loop.create_task(self._watch())
+
+    async def _watch(self):
+        while True:
+            connected = bool(self.is_connected())
+            if connected != self._connected:
+                self.set_connected(connected)
+            await asyncio.sleep(WATCH_INTERVAL)
+
+    async def stop(self):
+        self._stopping = True
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+        for handle in list(self._workers.values()):
+            self._send(handle.worker_id, ('stop',))
+        for handle in list(self._workers.values()):
+            await self._loop.run_in_executor(None, handle.process.join, 10)
+            self._detach(handle)
+        self._workers.clear()
+
+    def _spawn(self, worker_id):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main, args=(worker_id, child_conn, self.settings),
+            name=f'table-worker-{worker_id}', daemon=True
+        )
+        process.start()
+        child_conn.close()
+        handle = _WorkerHandle(worker_id, process, parent_conn)
+        self._workers[worker_id] = handle
+        self.ring.add(worker_id)
+        self._loop.add_reader(parent_conn.fileno(), self._on_readable, handle)
+        self._loop.add_reader(process.sentinel, self._on_death, handle)
+        if self._connected:
+            self._send(worker_id, ('connected', True))
+        logger.info(f"⚙️ Processus de travail {worker_id} démarré (pid {process.pid})")
+        return handle
+
+    def _detach(self, handle):
+        for fd in (handle.conn.fileno(), handle.process.sentinel):
+            try:
+                self._loop.remove_reader(fd)
+            except (ValueError, OSError):
+                pass
+
+    def _send(self, worker_id, message):
+        handle = self._workers.get(worker_id)
+        if handle is None:
+            return
+        try:
+            handle.conn.send(message)
+        except (OSError, ValueError):
+            # Processus mort: _on_death se charge de la redistribution
+            pass
+
+    def _assign(self, name, worker_id):
+        self._owner[name] = worker_id
+        self._send(worker_id, ('own', [self._tables[name]]))
+
+    # --- Messages des processus ---
+
+    def _on_readable(self, handle):
+        try:
+            while handle.conn.poll():
+                message = handle.conn.recv()
+                kind = message[0]
+                if kind == 'send':
+                    self._spawn_task(self._relay_send(handle.worker_id, *message[1:]))
+                elif kind == 'history':
+                    self._spawn_task(self._relay_history(handle.worker_id, *message[1:]))
+                elif kind == 'dropped':
+                    self._complete_move(message[1])
+                elif kind == 'status':
+                    future = self._status_requests.pop(message[1], None)
+                    if future is not None and not future.done():
+                        future.set_result(message[2])
+                elif kind == 'ready':
+                    handle.ready = True
+        except (EOFError, OSError):
+            self._on_death(handle)
+
+    async def _relay_send(self, worker_id, req_id, method, chat, args):
+        try:
+            result = await getattr(self.sender, method)(chat, *args)
+            value = getattr(result, 'id', None)
+            self._send(worker_id, ('result', req_id, value, None))
+        except Exception as e:
+            self._send(worker_id, ('result', req_id, None, f"{type(e).__name__}: {e}"))
+
+    async def _relay_history(self, worker_id, req_id, chat, min_id, limit):
+        try:
+            messages = await self.history(chat, min_id, limit) if self.history else []
+            self._send(worker_id, ('result', req_id, messages, None))
+        except Exception as e:
+            self._send(worker_id, ('result', req_id, None, f"{type(e).__name__}: {e}"))
+
+    def _spawn_task(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # --- Pannes et rééquilibrage ---
+
+    def _on_death(self, handle):
+        if self._workers.get(handle.worker_id) is not handle:
+            return
+        self._detach(handle)
+        del self._workers[handle.worker_id]
+        if self._stopping:
+            return
+
+        self.deaths += 1
+        self.ring.remove(handle.worker_id)
+        orphans = [name for name, owner in self._owner.items() if owner == handle.worker_id]
+        logger.error(f"💥 Processus {handle.worker_id} arrêté (code {handle.process.exitcode}), "
+                     f"{len(orphans)} table(s) redistribuée(s)")
+        for name in orphans:
+            self._assign(name, self.ring.owner(self._tables[name]['source_channel_id']))
+            pending = self._moving.pop(name, None)
+            for message in pending or ():
+                self._send(self._owner[name], message)
+
+        if self.respawn and self._workers:
+            self._loop.call_later(RESPAWN_DELAY, self._replace, handle.worker_id)
+        elif self.respawn:
+            self._replace(handle.worker_id)
+
+    def _replace(self, worker_id):
+        """Remplaçant: récupère sa part de l'anneau par transfert propre"""
+        if self._stopping or worker_id in self._workers:
+            return
+        self._spawn(worker_id)
+        for name, config in self._tables.items():
+            if self.ring.owner(config['source_channel_id']) != worker_id:
+                continue
+            current = self._owner.get(name)
+            if current is None or current not in self._workers:
+                self._assign(name, worker_id)
+            elif current != worker_id and name not in self._moving:
+                # Messages retenus jusqu'à ce que l'ancien propriétaire ait vidé son journal
+                self._moving[name] = []
+                self._send(current, ('drop', name))
+
+    def _complete_move(self, name):
+        pending = self._moving.pop(name, None)
+        if pending is None or name not in self._tables:
+            return
+        self._assign(name, self.ring.owner(self._tables[name]['source_channel_id']))
+        for message in pending:
+            self._send(self._owner[name], message)
@@ -0,0 +1,95 @@
+"""Aiguillage des commandes: une recherche dans un dict sur le premier mot.
+
+Remplace un handler Telethon par commande (chacun testant son motif sur
+chaque message reçu). Le premier mot est comparé exactement (`/stop` ne
+capte plus `/stopall`, `@nom_du_bot` est ignoré) et les arguments sont
+convertis selon les types déclarés avant d'appeler le handler.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UsageError(ValueError):
+    """Arguments invalides pour une commande"""
+
+
+class Command:
+    __slots__ = ('name', 'handler', 'args', 'rest', 'admin', 'usage')
+
+    def __init__(self, name, handler, args, rest, admin, usage):
+        self.name = name
+        self.handler = handler
+        self.args = args
+        self.rest = rest
+        self.admin = admin
+        self.usage = usage
+
+    def convert(self, tokens, remainder):
+        """Arguments typés: les manquants valent None, le reste brut si `rest`"""
+        if self.rest:
+            return [remainder]
+        if len(tokens) > len(self.args):
+            raise UsageError(f"{len(tokens)} arguments pour {self.name}")
+        values = []
+        for index, convert in enumerate(self.args):
+            if index >= len(tokens):
+                values.append(None)
+                continue
+            try:
+                values.append(convert(tokens[index]))
+            except (TypeError, ValueError) as e:
+                raise UsageError(str(e)) from e
+        return values
+
+
+def split_command(text):
+    """('/commande', [mots], reste brut) ou None si ce n'est pas une commande"""
+    if not text or text[0] != '/':
+        return None
+    # Tout blanc sépare la commande de ses arguments (ex: "/setchannel\n-100...")
+    parts = text.split(None, 1)
+    name = parts[0].split('@', 1)[0].lower()
+    remainder = parts[1].strip() if len(parts) > 1 else ''
+    return name, remainder.split(), remainder
+
+
+class CommandRouter:
+    """Table des commandes; `is_admin(user_id)` filtre les commandes admin"""
+
+    def __init__(self, is_admin):
+        self.is_admin = is_admin
+        self.commands = {}
+        self.dispatched = 0
+        self.unknown = 0
+
+    def command(self, name, args=(), rest=False, admin=True, usage=None):
+        """Décorateur: `handler(event, *args)` appelé pour `name`"""
+        def decorator(handler):
+            self.commands[name] = Command(name, handler, tuple(args), rest, admin, usage)
+            return handler
+        return decorator
+
+    async def dispatch(self, event, text):
+        """Exécute la commande contenue dans `text`; False si aucune"""
+        parsed = split_command(text)
+        if parsed is None:
+            return False
+        name, tokens, remainder = parsed
+        command = self.commands.get(name)
+        if command is None:
+            self.unknown += 1
+            return False
+        if command.admin and not self.is_admin(event.sender_id):
+            return True
+
+        try:
+            args = command.convert(tokens, remainder)
+        except UsageError:
+            if command.usage:
+                await event.respond(f"❌ Usage: `{command.usage}`")
+            return True
+
+        self.dispatched += 1
+        await command.handler(event, *args)
+        return True
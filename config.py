@@ -17,3 +17,33 @@ PORT = 10000
 ALL_SUITS = ['♥', '♠', '♦', '♣']
 SUIT_MAPPING = {'♥': 'Rouge', '♠': 'Noir', '♦': 'Rouge', '♣': 'Noir'}
 SUIT_DISPLAY = {'♥': '❤️ Cœur', '♠': '♠️ Pique', '♦': '♦️ Carreau', '♣': '♣️ Trèfle'}
+
+# Surveillance (secondes, None = désactivé)
+PREDICTION_TIMEOUT = 1200     # Prédiction en cours depuis trop longtemps -> reset
+CHECK_TIMEOUT = None          # Un même check sans réponse -> reset
+IDLE_RESET_TIMEOUT = 1200     # Aucune prédiction depuis trop longtemps -> reset
+SOURCE_FEED_TIMEOUT = 600     # Aucun message du canal source -> alerte admin
+
+# Prédictions simultanées par table (1 = une seule à la fois; >1 = mode pipeline,
+# de nouveaux déclencheurs sont acceptés pendant les checks)
+MAX_PREDICTIONS_IN_FLIGHT = 1
+
+# Processus de travail pour les tables secondaires (0 = tout dans le processus principal)
+WORKER_PROCESSES = 0
+
+# Journalisation: niveau, sortie JSON (une ligne par enregistrement) et plafond
+# des lignes répétitives par catégorie {catégorie: (lignes/seconde, rafale)};
+# décisions, avertissements et erreurs ne sont jamais limités
+LOG_LEVEL = 'INFO'
+LOG_JSON = False
+LOG_RATE_LIMITS = {
+    'message': (2, 20),   # 📩 message source reçu
+    'wait': (1, 10),      # ⏳/⏭️ attente de finalisation ou du numéro vérifié
+}
+
+# Diffusion des prédictions en privé aux abonnés actifs (abonnement ou VIP en cours),
+# et de leur résultat une fois connu si BROADCAST_RESULTS
+BROADCAST_TO_SUBSCRIBERS = False
+BROADCAST_RESULTS = True
+BROADCAST_WORKERS = 16
+BROADCAST_RATE = 10      # messages/s, en plus des 20/s de l'envoyeur du canal
@@ -0,0 +1,132 @@
+"""Regroupement des éditions du canal source (tempêtes d'éditions ⏰).
+
+Le canal source réécrit chaque message de jeu de nombreuses fois pendant
+la distribution (⏰ ... puis ✅/🔰). Une édition ⏰ ne sert au moteur que
+par son numéro de jeu, déjà connu par le message d'origine: elle ne fait
+jamais avancer une vérification, et l'édition finale redonne la même
+chance de lancement. Règles:
+
+- ⏰ quand aucun lancement n'est possible (prédictions en vol au maximum):
+  abandonnée, le moteur l'ignore;
+- ⏰ sinon: seul le dernier texte est gardé par message, abandonné dès que
+  l'édition finale arrive, transmis après `settle` secondes de calme si
+  elle n'arrive jamais;
+- édition finale: transmise immédiatement;
+- réécriture identique dans ce même cas: ignorée (sinon elle peut encore
+  déclencher un lancement, elle passe).
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+
+from metrics import SOURCE_EDITS_SKIPPED
+
+logger = logging.getLogger(__name__)
+
+EDIT_SETTLE_SECONDS = 3.0
+EDIT_MAX_DELAY = 30.0
+MAX_TRACKED_MESSAGES = 256
+
+
+def is_intermediate(message_text):
+    """Édition en cours de distribution (même règle que le parseur: commence par ⏰)"""
+    return message_text.lstrip().startswith('⏰')
+
+
+class EditCoalescer:
+    """Filtre entre le handler MessageEdited et `submit(message_id, texte)`
+
+    `is_full()`: prédictions en vol au maximum, les messages ne servent
+    qu'aux vérifications.
+    """
+
+    def __init__(self, submit, is_full, settle=EDIT_SETTLE_SECONDS, max_delay=EDIT_MAX_DELAY):
+        self.submit = submit
+        self.is_full = is_full
+        self.settle = settle
+        self.max_delay = max_delay
+
+        self.received = 0
+        self.forwarded = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.duplicates = 0
+
+        # message_id -> [texte, première réception, handle du minuteur]
+        self._pending = {}
+        # message_id -> dernier texte transmis (nouveau message ou édition)
+        self._last = OrderedDict()
+
+    @property
+    def skipped(self):
+        return self.coalesced + self.dropped + self.duplicates
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def seen(self, message_id, message_text):
+        """Texte d'un nouveau message (référence pour les éditions identiques)"""
+        self._remember(message_id, message_text)
+
+    def edit(self, message_id, message_text):
+        """Point d'entrée d'une édition (ne bloque pas)"""
+        self.received += 1
+        if not is_intermediate(message_text):
+            if self._last.get(message_id) == message_text and self.is_full():
+                self._skip('duplicates')
+                return
+            # Finalisée: transmise tout de suite, la ⏰ en attente devient inutile
+            entry = self._pending.pop(message_id, None)
+            if entry is not None:
+                entry[2].cancel()
+                self._skip('coalesced')
+            self._forward(message_id, message_text)
+            return
+
+        if self.is_full():
+            self._skip('dropped')
+            return
+
+        loop = asyncio.get_running_loop()
+        entry = self._pending.get(message_id)
+        if entry is None:
+            handle = loop.call_later(self.settle, self._flush, message_id)
+            self._pending[message_id] = [message_text, loop.time(), handle]
+            return
+
+        # Remplace le texte en attente; le minuteur repart tant que max_delay n'est pas atteint
+        self._skip('coalesced')
+        entry[0] = message_text
+        if loop.time() - entry[1] + self.settle <= self.max_delay:
+            entry[2].cancel()
+            entry[2] = loop.call_later(self.settle, self._flush, message_id)
+
+    def _flush(self, message_id):
+        entry = self._pending.pop(message_id, None)
+        if entry is None:
+            return
+        if self.is_full():
+            self._skip('dropped')
+            return
+        self._forward(message_id, entry[0])
+
+    def _forward(self, message_id, message_text):
+        self.forwarded += 1
+        self._remember(message_id, message_text)
+        self.submit(message_id, message_text)
+
+    def _remember(self, message_id, message_text):
+        self._last[message_id] = message_text
+        self._last.move_to_end(message_id)
+        if len(self._last) > MAX_TRACKED_MESSAGES:
+            self._last.popitem(last=False)
+
+    def _skip(self, counter):
+        setattr(self, counter, getattr(self, counter) + 1)
+        SOURCE_EDITS_SKIPPED.inc()
+
+    def stop(self):
+        for entry in self._pending.values():
+            entry[2].cancel()
+        self._pending.clear()
@@ -0,0 +1,142 @@
+"""Planificateur des expirations VIP / abonnements.
+
+Tas binaire (heapq) indexé par date d'expiration: insertion en O(log n),
+et la tâche dort exactement jusqu'à la prochaine échéance au lieu de
+parcourir tous les utilisateurs. Les entrées remplacées ou annulées sont
+invalidées paresseusement au moment où elles sortent du tas.
+"""
+import time
+import heapq
+import asyncio
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+KIND_VIP = 'vip'
+KIND_SUBSCRIPTION = 'subscription'
+
+
+def iso_to_timestamp(value):
+    """Convertit une date ISO (users_data) en timestamp, None si absente/invalide"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class ExpiryScheduler:
+    """Réveille `on_expire(batch)` à chaque échéance; batch = [(user_id, kind)]"""
+
+    def __init__(self, on_expire, batch_size: int = 50, clock=time.time):
+        self.on_expire = on_expire
+        self.batch_size = batch_size
+        self.clock = clock
+        self._heap = []
+        self._deadlines = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def schedule(self, user_id, kind, deadline):
+        """Planifie (ou replanifie) l'expiration; deadline = timestamp"""
+        key = (user_id, kind)
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, user_id, kind))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+        if self._heap[0][0] == deadline:
+            # Nouvelle échéance la plus proche: la tâche doit recalculer son sommeil
+            self._wakeup.set()
+
+    def _compact(self):
+        """Reconstruit le tas sans les entrées périmées"""
+        self._heap = [(deadline, user_id, kind) for (user_id, kind), deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+    def cancel(self, user_id, kind):
+        self._deadlines.pop((user_id, kind), None)
+
+    def next_deadline(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._deadlines.get((heap[0][1], heap[0][2])) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def pop_expired(self, now=None):
+        """Retire et retourne jusqu'à batch_size expirations échues"""
+        now = self.clock() if now is None else now
+        batch = []
+        while len(batch) < self.batch_size:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, user_id, kind = heapq.heappop(self._heap)
+            del self._deadlines[(user_id, kind)]
+            batch.append((user_id, kind))
+        return batch
+
+    def load_from_store(self, store, exclude=()):
+        """Reconstruit le tas depuis le UserStore au démarrage
+
+        Les échéances déjà passées (bot arrêté entre-temps) sont traitées dès
+        le démarrage; `on_expire` revérifie l'accès restant avant d'expulser.
+        Les utilisateurs de `exclude` (admin) ne sont jamais planifiés.
+        """
+        count = overdue = 0
+        now = self.clock()
+        for user_id, vip_expires_at, subscription_end in store.scheduled_expirations():
+            if user_id in exclude:
+                continue
+            for kind, value in ((KIND_VIP, vip_expires_at), (KIND_SUBSCRIPTION, subscription_end)):
+                deadline = iso_to_timestamp(value)
+                if deadline is not None:
+                    self._deadlines[(user_id, kind)] = deadline
+                    self._heap.append((deadline, user_id, kind))
+                    count += 1
+                    overdue += deadline <= now
+        heapq.heapify(self._heap)
+        logger.info(f"⏳ {count} expirations planifiées ({overdue} déjà échues)")
+        return count
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - self.clock())
+
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = self.pop_expired()
+            if not batch:
+                continue
+            try:
+                await self.on_expire(batch)
+            except Exception as e:
+                logger.error(f"❌ Erreur traitement expirations: {e}")
@@ -0,0 +1,69 @@
+"""Tables de correspondance précalculées pour les numéros de jeu.
+
+Construites une seule fois à l'import: un tableau dense indexé par numéro
+de jeu (6-1436) donne en O(1) le costume prédit et la cible du déclencheur,
+au lieu de parcourir la liste des pairs valides à chaque message.
+"""
+from array import array
+
+MIN_GAME_NUMBER = 6
+MAX_GAME_NUMBER = 1436
+# Dernier numéro publié par le canal source: #1437-#1440 ne sont jamais prédits
+# mais servent aux checks 1-3 d'une prédiction de #1436
+LAST_GAME_NUMBER = 1440
+
+SUIT_CYCLE = ['♥', '♦', '♣', '♠', '♦', '♥', '♠', '♣']
+
+# Codes des costumes stockés dans la table (-1 = numéro non valide)
+SUIT_CODES = ['♥', '♠', '♦', '♣']
+NO_SUIT = -1
+NO_TARGET = 0
+
+
+def get_valid_even_numbers():
+    """Génère la liste des pairs valides: 6-1436, pairs, ne finissant pas par 0"""
+    valid = []
+    for num in range(MIN_GAME_NUMBER, MAX_GAME_NUMBER + 1):
+        if num % 2 == 0 and num % 10 != 0:
+            valid.append(num)
+    return valid
+
+
+VALID_EVEN_NUMBERS = get_valid_even_numbers()
+
+
+def _build_tables(valid_numbers, suit_cycle):
+    """Construit les tableaux costume/cible indexés par numéro de jeu"""
+    size = MAX_GAME_NUMBER + 2
+    suit_table = array('b', [NO_SUIT]) * size
+    target_table = array('h', [NO_TARGET]) * size
+
+    for idx, num in enumerate(valid_numbers):
+        suit_table[num] = SUIT_CODES.index(suit_cycle[idx % len(suit_cycle)])
+
+    for num in range(MAX_GAME_NUMBER + 1):
+        # Déclencheur: impair finissant par 1,3,5,7 ET suivant est pair valide
+        if num % 2 == 1 and num % 10 in (1, 3, 5, 7) and suit_table[num + 1] != NO_SUIT:
+            target_table[num] = num + 1
+
+    return suit_table, target_table
+
+
+SUIT_TABLE, TRIGGER_TABLE = _build_tables(VALID_EVEN_NUMBERS, SUIT_CYCLE)
+
+
+def suit_for(number):
+    """Costume du numéro pair valide, ou None (O(1))"""
+    if not 0 <= number <= MAX_GAME_NUMBER:
+        return None
+    code = SUIT_TABLE[number]
+    if code == NO_SUIT:
+        return None
+    return SUIT_CODES[code]
+
+
+def trigger_target(number):
+    """Numéro pair à prédire si `number` est un déclencheur, sinon None (O(1))"""
+    if not 0 <= number <= MAX_GAME_NUMBER:
+        return None
+    return TRIGGER_TABLE[number] or None
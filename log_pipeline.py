@@ -0,0 +1,150 @@
+"""Journalisation hors boucle: QueueHandler -> QueueListener.
+
+Les appels `logger.info(...)` de la boucle asyncio ne font que déposer
+l'enregistrement dans une file; le formatage (texte ou JSON) et
+l'écriture se font dans le thread du QueueListener. Les messages du
+chemin chaud passent leurs valeurs en arguments (`"%s"`) et sont donc
+formatés seulement s'ils sont écrits.
+
+Les enregistrements marqués d'une catégorie (`extra=category('wait')`)
+sont limités par seau à jetons avant la file; les autres (décisions) et
+tout ce qui est WARNING ou plus passent toujours. Le nombre de lignes
+écartées est ajouté à la suivante de la même catégorie.
+"""
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def category(name):
+    """`extra` d'un message limité par catégorie (créé une fois par appelant)"""
+    return {'category': name}
+
+
+class GameList(tuple):
+    """Numéros de jeu, formatés (#12, #14) seulement à l'écriture"""
+    __slots__ = ()
+
+    def __str__(self):
+        return ', '.join(f'#{n}' for n in self)
+
+
+class RateLimitFilter(logging.Filter):
+    """Seau à jetons par catégorie: `rates = {catégorie: (par seconde, rafale)}`"""
+
+    def __init__(self, rates, clock=time.monotonic):
+        super().__init__()
+        self.clock = clock
+        # catégorie -> [jetons, dernier remplissage, débit, rafale, écartés]
+        self.buckets = {name: [float(burst), clock(), float(rate), float(burst), 0]
+                        for name, (rate, burst) in rates.items()}
+        self.suppressed = 0
+
+    def filter(self, record):
+        name = getattr(record, 'category', None)
+        if name is None or record.levelno >= logging.WARNING:
+            return True
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            return True
+        now = self.clock()
+        tokens = min(bucket[3], bucket[0] + (now - bucket[1]) * bucket[2])
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            bucket[4] += 1
+            self.suppressed += 1
+            return False
+        bucket[0] = tokens - 1.0
+        record.suppressed = bucket[4]
+        bucket[4] = 0
+        return True
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Dépose l'enregistrement tel quel: le message est formaté par le listener"""
+
+    def prepare(self, record):
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{text} (+{suppressed} ignorés)" if suppressed else text
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key in ('category', 'suppressed'):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        worker = getattr(record, 'worker', None)
+        if worker is not None:
+            entry['worker'] = worker
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _WorkerTag(logging.Filter):
+    def __init__(self, worker_id):
+        super().__init__()
+        self.worker_id = worker_id
+
+    def filter(self, record):
+        record.worker = self.worker_id
+        return True
+
+
+def setup_logging(level=logging.INFO, json_output=False, rates=None, stream=None,
+                  text_format=TEXT_FORMAT, worker_id=None):
+    """Remplace les handlers racine par la file; retourne le QueueListener démarré"""
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if json_output else TextFormatter(text_format))
+
+    records = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(records)
+    if worker_id is not None:
+        queue_handler.addFilter(_WorkerTag(worker_id))
+    if rates:
+        queue_handler.addFilter(RateLimitFilter(rates))
+
+    # Champs absents des formats: non calculés à chaque enregistrement
+    # (_srcfile = None: pas de remontée de pile pour fichier/ligne, cf. doc logging)
+    logging.logThreads = logging.logProcesses = logging.logMultiprocessing = False
+    logging._srcfile = None
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    # Vide la file à la sortie de l'interpréteur (arrêt normal ou sys.exit)
+    atexit.register(stop_logging, listener)
+    return listener
+
+
+def stop_logging(listener):
+    """Écrit les enregistrements en attente et arrête le thread (idempotent)"""
+    if listener._thread is not None:
+        listener.stop()
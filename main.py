@@ -1,48 +1,53 @@
 import os
+import signal
 import asyncio
-import re
 import logging
-import sys
 import json
-from datetime import datetime, timedelta, timezone
-from telethon import TelegramClient, events, Button
-from telethon.sessions import StringSession
-from telethon.tl.functions.channels import EditBannedRequest
-from telethon.tl.types import ChatBannedRights
+from datetime import datetime, timezone
 from aiohttp import web
 from config import (
     API_ID, API_HASH, BOT_TOKEN, ADMIN_ID,
-    PORT, SUIT_DISPLAY
+    PORT, PREDICTION_TIMEOUT, CHECK_TIMEOUT, IDLE_RESET_TIMEOUT, SOURCE_FEED_TIMEOUT,
+    WORKER_PROCESSES, MAX_PREDICTIONS_IN_FLIGHT,
+    BROADCAST_TO_SUBSCRIBERS, BROADCAST_RESULTS, BROADCAST_WORKERS, BROADCAST_RATE,
+    LOG_LEVEL, LOG_JSON, LOG_RATE_LIMITS
 )
+from game_tables import VALID_EVEN_NUMBERS
+from table_registry import TableRegistry, TableServices, TABLES_DIR, check_table_name
+from command_router import CommandRouter
+from persistence import JsonPersistence
+from user_store import SQLiteUserStore
+from expiry_scheduler import ExpiryScheduler, KIND_VIP, KIND_SUBSCRIPTION, iso_to_timestamp
+from telegram_sender import TelegramSender, TokenBucket
+from broadcast import Broadcaster
+from metrics import REGISTRY
+from status_page import StatusSnapshot
+from log_pipeline import setup_logging
 
 USERS_FILE = "users_data.json"
-PAUSE_CONFIG_FILE = "pause_config.json"
+USERS_DB_FILE = "users_data.db"
 CHANNELS_CONFIG_FILE = "channels_config.json"
+VIP_CONFIG_FILE = "vip_config.json"
+TABLES_CONFIG_FILE = "tables_config.json"
 
 # Configuration par défaut des canaux
 DEFAULT_SOURCE_CHANNEL_ID = -1002682552255
 DEFAULT_PREDICTION_CHANNEL_ID = -1003329818758
 
 # --- Configuration Logging ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+# File + thread d'écriture: la boucle asyncio ne formate ni n'écrit les logs
+setup_logging(LOG_LEVEL, json_output=LOG_JSON, rates=LOG_RATE_LIMITS)
 logger = logging.getLogger(__name__)
 
-if not API_ID or API_ID == 0:
-    logger.error("API_ID manquant")
-    exit(1)
-if not API_HASH:
-    logger.error("API_HASH manquant")
-    exit(1)
-if not BOT_TOKEN:
-    logger.error("BOT_TOKEN manquant")
-    exit(1)
+def check_credentials():
+    for name, value in (('API_ID', API_ID), ('API_HASH', API_HASH), ('BOT_TOKEN', BOT_TOKEN)):
+        if not value:
+            logger.error(f"{name} manquant")
+            exit(1)
 
-session_string = os.getenv('TELEGRAM_SESSION', '')
-client = TelegramClient(StringSession(session_string), API_ID, API_HASH)
+# Client Telegram: créé par create_client() après le démarrage du serveur web
+# (l'import de Telethon représente l'essentiel du temps de démarrage)
+client = None
 
 # --- Variables Globales ---
 channels_config = {
@@ -50,47 +55,112 @@ channels_config = {
     'prediction_channel_id': DEFAULT_PREDICTION_CHANNEL_ID,
 }
 
-# Cycle de pause par défaut: 3min, 5min, 4min
-DEFAULT_PAUSE_CYCLE = [180, 300, 240]
-pause_config = {
-    'cycle': DEFAULT_PAUSE_CYCLE.copy(),
-    'current_index': 0,
-    'predictions_count': 0,
-    'is_paused': False,
-    'pause_end_time': None,
-    'just_resumed': False
+vip_config = {
+    'channel_id': None,
+    'channel_link': None,
 }
 
+# Expulsions VIP: parallélisme borné et tentatives sur FloodWait
+VIP_KICK_CONCURRENCY = 5
+VIP_KICK_MAX_ATTEMPTS = 3
+VIP_KICK_RETRY_SECONDS = 300      # délai du 1er nouvel essai, doublé à chaque échec
+VIP_KICK_MAX_RETRIES = 5          # au-delà: abandon (journalisé)
+
 # État global
-users_data = {}
-current_game_number = 0
-last_source_game_number = 0
-last_predicted_number = None
-predictions_enabled = True
-already_predicted_games = set()
-
-# État de vérification
-verification_state = {
-    'predicted_number': None,
-    'predicted_suit': None,
-    'current_check': 0,
-    'message_id': None,
-    'channel_id': None,
-    'status': None,
-    'base_game': None
-}
+user_store = None
+started = False  # True une fois connecté à Telegram (/health)
+
+persistence = JsonPersistence()
 
-SUIT_CYCLE = ['♥', '♦', '♣', '♠', '♦', '♥', '♠', '♣']
+# Envois sortants (cache d'entités, priorités, limite de débit, FloodWait)
+sender = TelegramSender(None)
 
-stats_bilan = {
-    'total': 0, 'wins': 0, 'losses': 0,
-    'win_details': {'✅0️⃣': 0, '✅1️⃣': 0, '✅2️⃣': 0, '✅3️⃣': 0},
-    'loss_details': {'❌': 0}
+# Diffusion en privé aux abonnés actifs; seau à jetons séparé: une diffusion ne
+# retarde jamais les publications et éditions du canal
+broadcaster = Broadcaster(
+    None,
+    recipients=lambda: user_store.aactive_users(datetime.now().isoformat()),
+    on_blocked=lambda user_id, reason: user_store.amark_blocked(user_id, datetime.now().isoformat(), reason),
+    workers=BROADCAST_WORKERS, bucket=TokenBucket(BROADCAST_RATE, BROADCAST_RATE)
+)
+broadcast_tasks = set()
+
+TABLE_TIMEOUTS = {
+    'prediction_timeout': PREDICTION_TIMEOUT,
+    'check_timeout': CHECK_TIMEOUT,
+    'idle_timeout': IDLE_RESET_TIMEOUT,
+    'feed_timeout': SOURCE_FEED_TIMEOUT,
 }
 
-# Variables pour le reset automatique
-last_prediction_time = None
-auto_reset_task = None
+# Tables (source -> prédiction): moteur, journal, rattrapage et chien de garde par table
+tables = TableRegistry(TableServices(
+    None, sender,
+    save_json=lambda file_path, data: save_json(file_path, data),
+    load_json=lambda file_path, default: load_json(file_path, default),
+    on_timeout=lambda table, reason, message: auto_reset(table, reason, message),
+    on_feed_stalled=lambda table, seconds: source_feed_stalled(table, seconds),
+    timeouts=TABLE_TIMEOUTS,
+    max_in_flight=MAX_PREDICTIONS_IN_FLIGHT
+))
+
+# Table principale: les commandes admin, le tableau de bord et /metrics la ciblent
+main_table = tables.create_default(DEFAULT_SOURCE_CHANNEL_ID, DEFAULT_PREDICTION_CHANNEL_ID)
+engine = main_table.engine
+pause_config = main_table.pause_config
+
+def _broadcast_done(task):
+    broadcast_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"❌ Erreur diffusion aux abonnés: {task.exception()}")
+
+def broadcast_text(text):
+    task = asyncio.create_task(broadcaster.broadcast(text))
+    broadcast_tasks.add(task)
+    task.add_done_callback(_broadcast_done)
+
+# La prédiction part en privé dès son lancement; le résultat ensuite si demandé
+if BROADCAST_TO_SUBSCRIBERS:
+    engine.on_launch = broadcast_text
+    if BROADCAST_RESULTS:
+        engine.on_result = broadcast_text
+
+async def fetch_history(chat, min_id, limit):
+    """Historique d'un canal pour le rattrapage des processus de travail (plus récent d'abord)"""
+    return [
+        (message.id, message.message)
+        async for message in client.iter_messages(chat, min_id=min_id, limit=limit, wait_time=0.5)
+        if message.message
+    ]
+
+# Mode multi-processus: les tables secondaires tournent dans WORKER_PROCESSES processus,
+# ce processus garde Telethon, l'envoyeur et la table principale
+cluster = None
+if WORKER_PROCESSES > 0:
+    from cluster import Supervisor
+    cluster = Supervisor(
+        WORKER_PROCESSES, sender, history=fetch_history,
+        is_connected=lambda: client is not None and client.is_connected(),
+        settings={'timeouts': TABLE_TIMEOUTS, 'tables_dir': TABLES_DIR, 'admin_id': ADMIN_ID,
+                  'max_in_flight': MAX_PREDICTIONS_IN_FLIGHT, 'log_level': LOG_LEVEL,
+                  'log_json': LOG_JSON, 'log_rates': LOG_RATE_LIMITS}
+    )
+
+def tables_config():
+    return cluster.to_config() if cluster is not None else tables.to_config()
+
+# Instantané du tableau de bord (/, /api/status), reconstruit si engine.version change
+status_snapshot = StatusSnapshot(engine, pause_config)
+SSE_KEEPALIVE_SECONDS = 15
+SSE_MIN_INTERVAL = 0.5
+
+# Jauges lues au moment du rendu de /metrics
+REGISTRY.gauge('bot_engine_queue_depth', "Messages source en attente de traitement", lambda: engine.queue.qsize())
+REGISTRY.gauge('bot_sender_queue_depth', "Envois Telegram en file", lambda: sender.pending)
+REGISTRY.gauge('bot_prediction_pending', "1 si une vérification est en cours", lambda: int(engine.is_busy))
+REGISTRY.gauge('bot_predictions_enabled', "1 si les prédictions sont actives", lambda: int(engine.predictions_enabled))
+REGISTRY.gauge('bot_paused', "1 si le cycle est en pause", lambda: int(bool(pause_config['is_paused'])))
+REGISTRY.gauge('bot_tables', "Tables actives", lambda: len(tables))
+REGISTRY.gauge('bot_broadcast_queue_depth', "Messages privés en file", lambda: broadcaster.pending)
 
 # ============================================================
 # FONCTIONS DE CHARGEMENT/SAUVEGARDE
@@ -105,75 +175,46 @@ def load_json(file_path, default=None):
         logger.error(f"Erreur chargement {file_path}: {e}")
     return default or {}
 
-def save_json(file_path, data):
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        logger.error(f"Erreur sauvegarde {file_path}: {e}")
+def save_json(file_path, data, indent=2):
+    """Marque le fichier à sauvegarder (écriture différée et atomique)"""
+    persistence.mark_dirty(file_path, data, indent)
 
 def load_all_configs():
-    global channels_config, pause_config, users_data
+    global channels_config, user_store
     channels_config.update(load_json(CHANNELS_CONFIG_FILE, channels_config))
-    pause_config.update(load_json(PAUSE_CONFIG_FILE, pause_config))
-    users_data.update(load_json(USERS_FILE, {}))
-    logger.info("Configurations chargées")
+    vip_config.update(load_json(VIP_CONFIG_FILE, vip_config))
+    tables.set_source(main_table, get_source_channel_id(), reset_cursor=False)
+    engine.prediction_channel_id = get_prediction_channel_id()
+    saved_tables = load_json(TABLES_CONFIG_FILE, {'tables': []})
+    if cluster is not None:
+        for entry in saved_tables.get('tables', []):
+            cluster.add_table(entry)
+        saved_tables = {'tables': []}
+    tables.load(saved_tables)
+    set_max_in_flight(channels_config.get('max_in_flight', MAX_PREDICTIONS_IN_FLIGHT), save=False)
+    user_store = SQLiteUserStore(USERS_DB_FILE)
+    user_store.import_json(USERS_FILE)
+    logger.info(f"Configurations chargées ({user_store.count()} utilisateurs)")
 
 def save_all_configs():
     save_json(CHANNELS_CONFIG_FILE, channels_config)
-    save_json(PAUSE_CONFIG_FILE, pause_config)
-    save_json(USERS_FILE, users_data)
-
-# ============================================================
-# GESTION NUMÉROS ET COSTUMES
-# ============================================================
-
-def get_valid_even_numbers():
-    """Génère la liste des pairs valides: 6-1436, pairs, ne finissant pas par 0"""
-    valid = []
-    for num in range(6, 1437):
-        if num % 2 == 0 and num % 10 != 0:
-            valid.append(num)
-    return valid
-
-VALID_EVEN_NUMBERS = get_valid_even_numbers()
-logger.info(f"📊 Pairs valides: {len(VALID_EVEN_NUMBERS)} numéros")
-
-def get_suit_for_number(number):
-    """Retourne le costume pour un numéro pair valide"""
-    if number not in VALID_EVEN_NUMBERS:
-        logger.error(f"❌ Numéro {number} non valide")
-        return None
-    idx = VALID_EVEN_NUMBERS.index(number) % len(SUIT_CYCLE)
-    return SUIT_CYCLE[idx]
-
-def is_trigger_number(number):
-    """Déclencheur: impair finissant par 1,3,5,7 ET suivant est pair valide"""
-    if number % 2 == 0:
-        return False
-
-    last_digit = number % 10
-    if last_digit not in [1, 3, 5, 7]:
-        return False
-
-    next_num = number + 1
-    is_valid = next_num in VALID_EVEN_NUMBERS
-
-    if is_valid:
-        logger.info(f"🔥 DÉCLENCHEUR #{number} (suivant: #{next_num})")
-
-    return is_valid
-
-def get_trigger_target(number):
-    """Retourne le numéro pair à prédire"""
-    if not is_trigger_number(number):
-        return None
-    return number + 1
+    save_json(TABLES_CONFIG_FILE, tables_config())
+    for table in tables:
+        table.engine.persist()
 
 # ============================================================
 # GESTION CANAUX
 # ============================================================
 
+def set_max_in_flight(count, save=True):
+    """Prédictions simultanées pour toutes les tables (y compris celles des processus de travail)"""
+    tables.set_max_in_flight(count)
+    if cluster is not None:
+        cluster.set_max_in_flight(count)
+    if save:
+        channels_config['max_in_flight'] = count
+        save_json(CHANNELS_CONFIG_FILE, channels_config)
+
 def get_source_channel_id():
     return channels_config.get('source_channel_id', DEFAULT_SOURCE_CHANNEL_ID)
 
@@ -183,387 +224,145 @@ def get_prediction_channel_id():
 def set_channels(source_id=None, prediction_id=None):
     if source_id:
         channels_config['source_channel_id'] = source_id
+        tables.set_source(main_table, source_id)
     if prediction_id:
         channels_config['prediction_channel_id'] = prediction_id
+        engine.prediction_channel_id = prediction_id
     save_json(CHANNELS_CONFIG_FILE, channels_config)
+    sender.invalidate()
     logger.info(f"Canaux mis à jour")
 
 # ============================================================
-# SYSTÈME DE PRÉDICTION ET VÉRIFICATION
+# RESET AUTOMATIQUE
 # ============================================================
 
-async def send_prediction(target_game: int, predicted_suit: str, base_game: int):
-    """Envoie une prédiction au canal configuré"""
-    global verification_state, last_predicted_number, last_prediction_time
-
-    if not predictions_enabled:
-        logger.warning("⛔ Prédictions désactivées")
-        return False
-
-    if verification_state['predicted_number'] is not None:
-        logger.error(f"⛔ BLOQUÉ: Prédiction #{verification_state['predicted_number']} en cours!")
-        return False
-
+async def auto_reset(table, reason, reset_reason):
+    """Reset automatique d'une table, déclenché par son chien de garde"""
+    table_engine = table.engine
     try:
-        prediction_channel_id = get_prediction_channel_id()
-        entity = await client.get_input_entity(prediction_channel_id)
-
-        prediction_text = f"""🎰 **PRÉDICTION #{target_game}**
-🎯 Couleur: {SUIT_DISPLAY.get(predicted_suit, predicted_suit)}
-⏳ Statut: EN ATTENTE DU RÉSULTAT..."""
+        logger.warning(f"🚨 RESET AUTOMATIQUE DÉCLENCHÉ [{table.label}]: {reset_reason}")
 
-        sent_msg = await client.send_message(entity, prediction_text)
+        # Débloquer la vérification (l'anti-doublon de la manche est conservé)
+        await table_engine.reset()
+        table_engine.predictions_enabled = True  # Réactiver les prédictions
+        table_engine.last_prediction_time = datetime.now()  # Réinitialiser le timer
+        table_engine.touch()
 
-        verification_state = {
-            'predicted_number': target_game,
-            'predicted_suit': predicted_suit,
-            'current_check': 0,
-            'message_id': sent_msg.id,
-            'channel_id': prediction_channel_id,
-            'status': 'pending',
-            'base_game': base_game
-        }
+        # Notifier l'admin
+        try:
+            await sender.send_notice(ADMIN_ID, f"""🚨 **RESET AUTOMATIQUE EFFECTUÉ**
 
-        last_predicted_number = target_game
-        last_prediction_time = datetime.now()
+**Table:** {table.label}
+**Raison:** {reset_reason}
 
-        logger.info(f"🚀 PRÉDICTION #{target_game} ({predicted_suit}) LANCÉE")
-        logger.info(f"🔍 Attente vérification: #{target_game} (check 0/3)")
+✅ Système réinitialisé et prêt
+🔄 Les prédictions reprennent normalement""")
+        except Exception as e:
+            logger.error(f"Erreur notification admin: {e}")
 
-        return True
+        logger.info(f"✅ Reset automatique terminé [{table.label}] - Système libéré")
 
     except Exception as e:
-        logger.error(f"❌ Erreur envoi prédiction: {e}")
-        return False
-
-async def update_prediction_status(status: str):
-    """Met à jour le statut de la prédiction"""
-    global verification_state, stats_bilan, last_prediction_time
-
-    if verification_state['predicted_number'] is None:
-        logger.error("❌ Aucune prédiction à mettre à jour")
-        return False
+        logger.error(f"❌ Erreur reset automatique [{table.label}]: {e}")
 
+async def source_feed_stalled(table, seconds):
+    """Alerte distincte: le canal source d'une table ne publie plus rien"""
+    logger.warning(f"📡 FLUX SOURCE SILENCIEUX [{table.label}] depuis {seconds}s")
     try:
-        predicted_num = verification_state['predicted_number']
-        predicted_suit = verification_state['predicted_suit']
-
-        if status == "❌":
-            status_text = "❌ PERDU"
-        else:
-            status_text = f"{status} GAGNÉ"
-
-        updated_text = f"""🎰 **PRÉDICTION #{predicted_num}**
-🎯 Couleur: {SUIT_DISPLAY.get(predicted_suit, predicted_suit)}
-📊 Statut: {status_text}"""
-
-        await client.edit_message(
-            verification_state['channel_id'],
-            verification_state['message_id'],
-            updated_text
-        )
-
-        if status in ['✅0️⃣', '✅1️⃣', '✅2️⃣', '✅3️⃣']:
-            stats_bilan['total'] += 1
-            stats_bilan['wins'] += 1
-            stats_bilan['win_details'][status] = stats_bilan['win_details'].get(status, 0) + 1
-            logger.info(f"🎉 #{predicted_num} GAGNÉ ({status})")
-        elif status == '❌':
-            stats_bilan['total'] += 1
-            stats_bilan['losses'] += 1
-            logger.info(f"💔 #{predicted_num} PERDU")
-
-        logger.info(f"🔓 SYSTÈME LIBÉRÉ - Nouvelle prédiction possible")
-
-        verification_state = {
-            'predicted_number': None, 'predicted_suit': None,
-            'current_check': 0, 'message_id': None,
-            'channel_id': None, 'status': None, 'base_game': None
-        }
-
-        last_prediction_time = datetime.now()
-
-        return True
+        await sender.send_notice(ADMIN_ID, f"""📡 **FLUX SOURCE INTERROMPU**
 
+**Table:** {table.label}
+Aucun message du canal source depuis {seconds // 60} min.
+Vérifiez le canal {table.source_channel_id} et la connexion du bot.""")
     except Exception as e:
-        logger.error(f"❌ Erreur mise à jour statut: {e}")
-        return False
+        logger.error(f"Erreur notification admin: {e}")
 
 # ============================================================
-# ANALYSE MESSAGES SOURCE
+# EXPIRATIONS VIP / ABONNEMENTS
 # ============================================================
 
-def extract_game_number(message: str) -> int:
-    """Extrait le numéro de jeu du message (supporte #N, #R, #X, etc.)"""
-    match = re.search(r"#N\s*(\d+)", message, re.IGNORECASE)
-    if match:
-        return int(match.group(1))
-
-    patterns = [
-        r"^#(\d+)",
-        r"N\s*(\d+)",
-        r"Numéro\s*(\d+)",
-        r"Game\s*(\d+)"
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, message, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-    return None
-
-def extract_suits_from_first_group(message_text: str) -> list:
-    """Extrait les costumes du PREMIER groupe de parenthèses"""
-    matches = re.findall(r"\(([^)]+)\)", message_text)
-    if not matches:
-        return []
-
-    first_group = matches[0]
-
-    normalized = first_group.replace('❤️', '♥').replace('❤', '♥')
-    normalized = normalized.replace('♠️', '♠').replace('♦️', '♦').replace('♣️', '♣')
-    normalized = normalized.replace('♥️', '♥')
-
-    suits = []
-    for suit in ['♥', '♠', '♦', '♣']:
-        if suit in normalized:
-            suits.append(suit)
-
-    logger.debug(f"Costumes trouvés dans premier groupe '{first_group}': {suits}")
-    return suits
-
-def is_message_editing(message_text: str) -> bool:
-    """Vérifie si le message est en cours d'édition (commence par ⏰)"""
-    return message_text.strip().startswith('⏰')
-
-def is_message_finalized(message_text: str) -> bool:
-    """Vérifie si le message est finalisé (contient ✅ ou 🔰)"""
-    return '✅' in message_text or '🔰' in message_text
-
-async def process_verification_step(game_number: int, message_text: str):
-    """Traite UNE étape de vérification"""
-    global verification_state
-
-    if verification_state['predicted_number'] is None:
-        return
-
-    predicted_num = verification_state['predicted_number']
-    predicted_suit = verification_state['predicted_suit']
-    current_check = verification_state['current_check']
-
-    expected_number = predicted_num + current_check
-    if game_number != expected_number:
-        logger.warning(f"⚠️ Reçu #{game_number} != attendu #{expected_number}")
-        return
-
-    suits = extract_suits_from_first_group(message_text)
-    logger.info(f"🔍 Vérification #{game_number}: premier groupe contient {suits}, attendu {predicted_suit}")
-
-    if predicted_suit in suits:
-        status = f"✅{current_check}️⃣"
-        logger.info(f"🎉 GAGNÉ! Costume {predicted_suit} trouvé dans premier groupe au check {current_check}")
-        await update_prediction_status(status)
-        return
-
-    if current_check < 3:
-        verification_state['current_check'] += 1
-        next_num = predicted_num + verification_state['current_check']
-        logger.info(f"❌ Check {current_check} échoué sur #{game_number}, prochain: #{next_num}")
-    else:
-        logger.info(f"💔 PERDU après 4 vérifications (jusqu'à #{game_number})")
-        await update_prediction_status("❌")
-
-async def check_and_launch_prediction(game_number: int):
-    """Vérifie et lance une prédiction avec CYCLE DE PAUSE"""
-    global pause_config
-
-    if verification_state['predicted_number'] is not None:
-        logger.warning(f"⛔ BLOQUÉ: Prédiction #{verification_state['predicted_number']} en attente de vérification. Déclencheur #{game_number} ignoré.")
-        return
-
-    if pause_config['is_paused']:
-        try:
-            end_time = datetime.fromisoformat(pause_config['pause_end_time'])
-            if datetime.now() < end_time:
-                remaining = int((end_time - datetime.now()).total_seconds())
-                logger.info(f"⏸️ Pause active: {remaining}s restantes")
-                return
-            pause_config['is_paused'] = False
-            pause_config['just_resumed'] = True
-            save_json(PAUSE_CONFIG_FILE, pause_config)
-            logger.info("🔄 Pause terminée, reprise")
-        except:
-            pause_config['is_paused'] = False
-
-    if not is_trigger_number(game_number):
-        return
-
-    target_num = get_trigger_target(game_number)
-    if not target_num or target_num in already_predicted_games:
-        return
-
-    pause_config['predictions_count'] += 1
-    current_count = pause_config['predictions_count']
-
-    logger.info(f"📊 Prédiction {current_count}/5 avant pause")
-
-    if current_count >= 5:
-        cycle = pause_config['cycle']
-        idx = pause_config['current_index'] % len(cycle)
-        duration = cycle[idx]
-
-        pause_config['is_paused'] = True
-        pause_config['pause_end_time'] = (datetime.now() + timedelta(seconds=duration)).isoformat()
-        pause_config['current_index'] += 1
-        save_json(PAUSE_CONFIG_FILE, pause_config)
-
-        minutes = duration // 60
+async def kick_from_vip_channel(user_id: int):
+    """Retire un membre du canal VIP (ban puis unban pour qu'il puisse revenir)"""
+    channel_id = vip_config.get('channel_id')
+    if not channel_id:
+        return False
 
-        logger.info(f"⏸️ PAUSE: {minutes}min")
+    # Rarement utilisé: chargé à la première expulsion
+    from telethon.errors import FloodWaitError
+    from telethon.tl.functions.channels import EditBannedRequest
+    from telethon.tl.types import ChatBannedRights
 
+    for attempt in range(VIP_KICK_MAX_ATTEMPTS):
         try:
-            await client.send_message(
-                get_prediction_channel_id(),
-                f"⏸️ **PAUSE**\n⏱️ {minutes} minutes..."
-            )
+            await client(EditBannedRequest(channel_id, user_id, ChatBannedRights(until_date=None, view_messages=True)))
+            await client(EditBannedRequest(channel_id, user_id, ChatBannedRights(until_date=None)))
+            return True
+        except FloodWaitError as e:
+            logger.warning(f"⏳ FloodWait {e.seconds}s (expulsion {user_id}, essai {attempt + 1})")
+            await asyncio.sleep(e.seconds + 1)
         except Exception as e:
-            logger.error(f"Erreur envoi message pause: {e}")
-
-        pause_config['predictions_count'] = 0
-        save_json(PAUSE_CONFIG_FILE, pause_config)
-
-        return
-
-    suit = get_suit_for_number(target_num)
-    if suit:
-        success = await send_prediction(target_num, suit, game_number)
-        if success:
-            already_predicted_games.add(target_num)
-            logger.info(f"✅ Prédiction #{target_num} lancée ({current_count}/5)")
-
-async def process_source_message(event, is_edit: bool = False):
-    """Traite les messages du canal source"""
-    global current_game_number, last_source_game_number
-
-    try:
-        message_text = event.message.message
-        game_number = extract_game_number(message_text)
-
-        if game_number is None:
+            logger.error(f"❌ Erreur expulsion VIP {user_id}: {e}")
+            return False
+    return False
+
+# Échecs d'expulsion consécutifs par (user_id, kind), pour le backoff
+kick_failures = {}
+
+async def handle_expirations(batch):
+    """Expulse les membres sans accès restant (parallélisme borné) et met à jour le store"""
+    semaphore = asyncio.Semaphore(VIP_KICK_CONCURRENCY)
+    fields_by_kind = {KIND_VIP: 'vip_expires_at', KIND_SUBSCRIPTION: 'subscription_end'}
+
+    async def expire(user_id, kind):
+        key = (user_id, kind)
+        field = fields_by_kind[kind]
+        other = fields_by_kind[KIND_SUBSCRIPTION if kind == KIND_VIP else KIND_VIP]
+        user = await user_store.aget(user_id) or {}
+        now = datetime.now().timestamp()
+
+        # Prolongé depuis la planification: nouvelle échéance
+        deadline = iso_to_timestamp(user.get(field))
+        if deadline is not None and deadline > now:
+            kick_failures.pop(key, None)
+            expiry_scheduler.schedule(user_id, kind, deadline)
             return
 
-        is_editing = is_message_editing(message_text)
-        is_finalized = is_message_finalized(message_text)
-
-        log_type = "ÉDITÉ" if is_edit else "NOUVEAU"
-        log_status = "⏰" if is_editing else ("✅" if is_finalized else "📝")
-        logger.info(f"📩 {log_status} {log_type}: #{game_number}")
-
-        if verification_state['predicted_number'] is not None:
-            predicted_num = verification_state['predicted_number']
-            current_check = verification_state['current_check']
-            expected_number = predicted_num + current_check
-
-            if is_editing and game_number == expected_number:
-                logger.info(f"⏳ Message #{game_number} en édition, attente finalisation (✅/🔰)")
-                return
-
-            if game_number == expected_number:
-                if is_finalized or not is_editing:
-                    logger.info(f"✅ Numéro #{game_number} finalisé/disponible, vérification...")
-                    await process_verification_step(game_number, message_text)
-
-                    if verification_state['predicted_number'] is not None:
-                        logger.info(f"⏳ Prédiction #{verification_state['predicted_number']} toujours en cours")
-                        return
-                    else:
-                        logger.info("✅ Vérification terminée, système libre")
-                else:
-                    logger.info(f"⏳ Attente finalisation pour #{game_number}")
-            else:
-                logger.info(f"⏭️ Attente #{expected_number}, reçu #{game_number}")
-
+        # Encore un accès (autre échéance en cours, ou admin): pas d'expulsion
+        remaining = iso_to_timestamp(user.get(other))
+        if user_id == ADMIN_ID or (remaining is not None and remaining > now):
+            kick_failures.pop(key, None)
+            await user_store.aupdate(user_id, **{field: None})
             return
 
-        await check_and_launch_prediction(game_number)
-
-        current_game_number = game_number
-        last_source_game_number = game_number
-
-    except Exception as e:
-        logger.error(f"❌ Erreur traitement message: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-
-# ============================================================
-# RESET AUTOMATIQUE
-# ============================================================
-
-async def auto_reset_monitor():
-    """Surveille et effectue un reset automatique si nécessaire"""
-    global verification_state, last_prediction_time, predictions_enabled, already_predicted_games, stats_bilan
-
-    while True:
-        await asyncio.sleep(60)  # Vérifier toutes les minutes
-
-        try:
-            now = datetime.now()
-            should_reset = False
-            reset_reason = ""
-
-            # Vérifier si une prédiction est bloquée (en cours depuis trop longtemps)
-            if verification_state['predicted_number'] is not None:
-                # Si prédiction en cours depuis plus de 20 minutes
-                if last_prediction_time and (now - last_prediction_time).total_seconds() > 1200:
-                    should_reset = True
-                    reset_reason = f"Prédiction #{verification_state['predicted_number']} bloquée depuis 20+ min"
-
-            # Vérifier si aucune prédiction depuis 20 minutes
-            elif last_prediction_time and (now - last_prediction_time).total_seconds() > 1200:
-                should_reset = True
-                reset_reason = "Aucune prédiction depuis 20+ min"
-
-            # Si le bot vient de démarrer et pas encore de prédiction, initialiser le timer
-            elif last_prediction_time is None:
-                last_prediction_time = now
-
-            if should_reset:
-                logger.warning(f"🚨 RESET AUTOMATIQUE DÉCLENCHÉ: {reset_reason}")
-
-                old_pred = verification_state['predicted_number']
-
-                # Effectuer le reset comme la commande /reset
-                verification_state = {
-                    'predicted_number': None, 'predicted_suit': None,
-                    'current_check': 0, 'message_id': None,
-                    'channel_id': None, 'status': None, 'base_game': None
-                }
-
-                already_predicted_games.clear()
-                predictions_enabled = True  # Réactiver les prédictions
-                last_prediction_time = now  # Réinitialiser le timer
-
-                # Notifier l'admin
-                try:
-                    await client.send_message(ADMIN_ID, f"""🚨 **RESET AUTOMATIQUE EFFECTUÉ**
-
-**Raison:** {reset_reason}
-
-✅ Système réinitialisé et prêt
-🔄 Les prédictions reprennent normalement""")
-                except Exception as e:
-                    logger.error(f"Erreur notification admin: {e}")
+        if vip_config.get('channel_id'):
+            async with semaphore:
+                kicked = await kick_from_vip_channel(user_id)
+            if not kicked:
+                failures = kick_failures[key] = kick_failures.get(key, 0) + 1
+                if failures > VIP_KICK_MAX_RETRIES:
+                    del kick_failures[key]
+                    logger.error(f"❌ Expulsion VIP {user_id} abandonnée après {failures} échecs")
+                    return
+                delay = VIP_KICK_RETRY_SECONDS * 2 ** (failures - 1)
+                logger.warning(f"🔁 Expulsion VIP {user_id} échouée ({failures}/{VIP_KICK_MAX_RETRIES}), nouvel essai dans {delay}s")
+                expiry_scheduler.schedule(user_id, kind, now + delay)
+                return
+        kick_failures.pop(key, None)
+        await user_store.aupdate(user_id, **{field: None, 'status': 'expired'})
 
-                logger.info("✅ Reset automatique terminé - Système libéré")
+    await asyncio.gather(*(expire(user_id, kind) for user_id, kind in batch))
+    logger.info(f"🚪 {len(batch)} accès expirés traités")
 
-        except Exception as e:
-            logger.error(f"❌ Erreur dans le moniteur de reset: {e}")
+expiry_scheduler = ExpiryScheduler(handle_expirations)
 
 # ============================================================
 # COMMANDES ADMIN
 # ============================================================
 
-@client.on(events.NewMessage(pattern='/start'))
+# Une seule table de commandes (recherche exacte du premier mot), voir handle_messages
+router = CommandRouter(lambda user_id: user_id == ADMIN_ID)
+
+@router.command('/start', admin=False)
 async def cmd_start(event):
     if event.is_group or event.is_channel:
         return
@@ -591,7 +390,7 @@ Commandes:
 
 💡 /help pour plus d'informations""")
 
-@client.on(events.NewMessage(pattern='/help'))
+@router.command('/help', admin=False)
 async def cmd_help(event):
     if event.is_group or event.is_channel:
         return
@@ -613,7 +412,15 @@ async def cmd_help(event):
 **Configuration:**
 /setchannel source ID - Canal source
 /setchannel prediction ID - Canal prédiction  
+/tables - Tables (source → prédiction)
+/addtable nom source prediction - Ajouter une table
+/deltable nom - Supprimer une table
 /pausecycle - Voir/modifier cycle pause
+/inflight N - Prédictions simultanées
+
+**Abonnés:**
+/broadcast texte - Diffuser aux abonnés actifs
+/broadcast - Dernière diffusion
 
 **Statistiques:**
 /bilan - Statistiques prédictions
@@ -630,32 +437,17 @@ Le bot fonctionne automatiquement et envoie les prédictions dans le canal confi
 
 **Support:** @Kouamappoloak""")
 
-@client.on(events.NewMessage(pattern='/stop'))
+@router.command('/stop')
 async def cmd_stop(event):
-    if event.sender_id != ADMIN_ID:
-        return
-    global predictions_enabled
-    predictions_enabled = False
+    engine.predictions_enabled = False
+    engine.touch()
     await event.respond("🛑 **PRÉDICTIONS ARRÊTÉES**")
 
-@client.on(events.NewMessage(pattern='/forcestop'))
+@router.command('/forcestop')
 async def cmd_forcestop(event):
     """Force l'arrêt complet et débloque le système"""
-    if event.sender_id != ADMIN_ID:
-        return
-
-    global predictions_enabled, verification_state, already_predicted_games
-
-    predictions_enabled = False
-    old_pred = verification_state['predicted_number']
-
-    verification_state = {
-        'predicted_number': None, 'predicted_suit': None,
-        'current_check': 0, 'message_id': None,
-        'channel_id': None, 'status': None, 'base_game': None
-    }
-
-    already_predicted_games.clear()
+    engine.predictions_enabled = False
+    old_pred = await engine.reset()
 
     msg = "🚨 **ARRÊT FORCÉ**\n\n"
     msg += f"🛑 Prédictions désactivées\n"
@@ -665,25 +457,20 @@ async def cmd_forcestop(event):
 
     await event.respond(msg)
 
-@client.on(events.NewMessage(pattern='/resume'))
+@router.command('/resume')
 async def cmd_resume(event):
-    if event.sender_id != ADMIN_ID:
-        return
-    global predictions_enabled
-    predictions_enabled = True
+    engine.predictions_enabled = True
+    engine.touch()
     await event.respond("🚀 **PRÉDICTIONS REPRISES**")
 
-@client.on(events.NewMessage(pattern='/predictinfo'))
+@router.command('/predictinfo')
 async def cmd_predictinfo(event):
-    if event.sender_id != ADMIN_ID:
-        return
-
     verif_info = "Aucune"
-    if verification_state['predicted_number']:
-        next_check = verification_state['predicted_number'] + verification_state['current_check']
-        verif_info = f"""#{verification_state['predicted_number']} ({verification_state['predicted_suit']})
-Check: {verification_state['current_check']}/3
-Attend: #{next_check}"""
+    if engine.in_flight:
+        verif_info = "\n".join(
+            f"#{prediction.target} ({prediction.suit}) {prediction.state} → attend #{prediction.expected_number}"
+            for prediction in engine.in_flight.values()
+        )
 
     cycle_mins = [x//60 for x in pause_config['cycle']]
     current_idx = pause_config['current_index'] % len(pause_config['cycle'])
@@ -691,20 +478,22 @@ Attend: #{next_check}"""
 
     # Calculer temps depuis dernière prédiction
     time_since_last = "N/A"
-    if last_prediction_time:
-        seconds = (datetime.now() - last_prediction_time).total_seconds()
+    if engine.last_prediction_time:
+        seconds = (datetime.now() - engine.last_prediction_time).total_seconds()
         mins = int(seconds // 60)
         time_since_last = f"{mins} min"
 
     await event.respond(f"""📊 **STATUT SYSTÈME**
 
-🎯 Source: #{current_game_number}
-🔍 Vérification: {verif_info}
-🟢 Prédictions: {'ON' if predictions_enabled else 'OFF'}
+🎯 Source: #{engine.current_game_number}
+🔍 Vérification [{engine.state}] ({len(engine.in_flight)}/{engine.max_in_flight}):
+{verif_info}
+🟢 Prédictions: {'ON' if engine.predictions_enabled else 'OFF'}
 ⏱️ Dernière activité: {time_since_last}
+✂️ Éditions ignorées: {main_table.edits.skipped}/{main_table.edits.received}
 
 ⏸️ **CYCLE DE PAUSE:**
-• Actif: {'Oui' if pause_config['is_paused'] else 'Non'}
+• Actif: {f"Oui ({int(engine.pauses.remaining())}s restantes)" if engine.pauses.is_paused() else 'Non'}
 • Compteur: {pause_config['predictions_count']}/5
 • Cycle: {cycle_mins} minutes
 • Position: {current_idx + 1}/{len(cycle_mins)}
@@ -714,32 +503,34 @@ Attend: #{next_check}"""
 💡 /clearverif si bloqué
 💡 /forcestop pour débloquer""")
 
-@client.on(events.NewMessage(pattern='/clearverif'))
-async def cmd_clearverif(event):
-    if event.sender_id != ADMIN_ID:
-        return
+@router.command('/inflight', args=(int,), usage="/inflight N")
+async def cmd_inflight(event, count):
+    """Nombre de prédictions simultanées (1 = séquentiel)"""
+    if count is None:
+        await event.respond(f"""🔀 **PRÉDICTIONS SIMULTANÉES**
 
-    global verification_state
-    old = verification_state['predicted_number']
+Maximum: {engine.max_in_flight}
+En vol: {len(engine.in_flight)}
 
-    verification_state = {
-        'predicted_number': None, 'predicted_suit': None,
-        'current_check': 0, 'message_id': None,
-        'channel_id': None, 'status': None, 'base_game': None
-    }
+`/inflight 1` - une à la fois (défaut)
+`/inflight 3` - mode pipeline""")
+        return
+    if count < 1:
+        await event.respond("❌ Minimum: 1")
+        return
+    set_max_in_flight(count)
+    await event.respond(f"✅ **Maximum en vol: {count}**")
+
+@router.command('/clearverif')
+async def cmd_clearverif(event):
+    old = await engine.reset()
 
     await event.respond(f"✅ **{'Vérification #' + str(old) + ' effacée' if old else 'Aucune vérification'}**\n🚀 Système libéré")
 
-@client.on(events.NewMessage(pattern=r'^/pausecycle(\s*[\d\s,]*)?$'))
-async def cmd_pausecycle(event):
+@router.command('/pausecycle', rest=True)
+async def cmd_pausecycle(event, cycle_str):
     """Configure le cycle de pause"""
-    if event.sender_id != ADMIN_ID:
-        return
-
-    message_text = event.message.message.strip()
-    parts = message_text.split()
-
-    if len(parts) == 1:
+    if not cycle_str:
         cycle_mins = [x//60 for x in pause_config['cycle']]
         current_idx = pause_config['current_index'] % len(cycle_mins)
 
@@ -767,8 +558,7 @@ Après chaque 5 prédictions → pause selon le cycle configuré""")
         return
 
     try:
-        cycle_str = ' '.join(parts[1:])
-        cycle_str = cycle_str.replace(' ', '').replace(',', ',')
+        cycle_str = cycle_str.replace(' ', '')
         new_cycle_mins = [int(x.strip()) for x in cycle_str.split(',') if x.strip()]
 
         if not new_cycle_mins or any(x <= 0 for x in new_cycle_mins):
@@ -778,7 +568,8 @@ Après chaque 5 prédictions → pause selon le cycle configuré""")
         new_cycle = [x * 60 for x in new_cycle_mins]
         pause_config['cycle'] = new_cycle
         pause_config['current_index'] = 0
-        save_json(PAUSE_CONFIG_FILE, pause_config)
+        engine.persist()
+        engine.touch()
 
         await event.respond(f"""✅ **CYCLE MIS À JOUR**
 
@@ -790,14 +581,9 @@ Après chaque 5 prédictions → pause selon le cycle configuré""")
     except Exception as e:
         await event.respond(f"❌ Erreur: {e}\n\nFormat: `/pausecycle 3,5,4`")
 
-@client.on(events.NewMessage(pattern=r'^/setchannel(\s+.+)?$'))
-async def cmd_setchannel(event):
-    if event.sender_id != ADMIN_ID:
-        return
-
-    parts = event.message.message.strip().split()
-
-    if len(parts) < 3:
+@router.command('/setchannel', args=(str.lower, int), usage="/setchannel source|prediction ID")
+async def cmd_setchannel(event, ctype, cid):
+    if cid is None:
         await event.respond(f"""📺 **CONFIGURATION CANAUX**
 
 **Actuel:**
@@ -810,9 +596,6 @@ async def cmd_setchannel(event):
         return
 
     try:
-        ctype = parts[1].lower()
-        cid = int(parts[2])
-
         if ctype == 'source':
             set_channels(source_id=cid)
             await event.respond(f"✅ **Canal source:**\n`{cid}`")
@@ -826,11 +609,68 @@ async def cmd_setchannel(event):
     except Exception as e:
         await event.respond(f"❌ Erreur: {e}")
 
-@client.on(events.NewMessage(pattern='/bilan'))
-async def cmd_bilan(event):
-    if event.sender_id != ADMIN_ID:
+@router.command('/tables')
+async def cmd_tables(event):
+    lines = ["🎰 **TABLES**\n"]
+    for table in tables:
+        table_engine = table.engine
+        stats = table_engine.stats
+        win_rate = (stats['wins'] / stats['total'] * 100) if stats['total'] else 0
+        pending = ", ".join(f"#{target}" for target in table_engine.in_flight) or "Libre"
+        lines.append(f"**{table.label}**: `{table.source_channel_id}` → `{table.prediction_channel_id}`")
+        lines.append(f"  🎮 #{table_engine.current_game_number} | 🔍 {pending} | "
+                     f"📊 {stats['total']} ({win_rate:.1f}%)")
+    if cluster is not None:
+        for summary in await cluster.status():
+            stats = summary['stats']
+            win_rate = (stats['wins'] / stats['total'] * 100) if stats['total'] else 0
+            pending = f"#{summary['pending']}" if summary['pending'] else "Libre"
+            lines.append(f"**{summary['name']}** ⚙️: `{summary['source_channel_id']}` → "
+                         f"`{summary['prediction_channel_id']}`")
+            lines.append(f"  🎮 #{summary['current_game']} | 🔍 {pending} | "
+                         f"📊 {stats['total']} ({win_rate:.1f}%)")
+    lines.append("\n`/addtable nom source_id prediction_id`\n`/deltable nom`")
+    await event.respond("\n".join(lines))
+
+@router.command('/addtable', args=(str, int, int), usage="/addtable nom source_id prediction_id")
+async def cmd_addtable(event, name, source_id, prediction_id):
+    if prediction_id is None:
+        await event.respond("❌ Usage: `/addtable nom source_id prediction_id`")
         return
 
+    try:
+        # Nom validé avant tout accès disque (tables/<nom>/); doublons refusés par le registre
+        check_table_name(name)
+        if cluster is not None:
+            if tables.get(source_id) is not None:
+                raise ValueError(f"Canal source {source_id} déjà utilisé")
+            cluster.add_table({'name': name, 'source_channel_id': source_id, 'prediction_channel_id': prediction_id})
+        else:
+            tables.add(name, source_id, prediction_id)
+        save_json(TABLES_CONFIG_FILE, tables_config())
+        await event.respond(f"""✅ **TABLE AJOUTÉE: {name}**
+
+📺 Source: `{source_id}`
+🎯 Prédiction: `{prediction_id}`""")
+    except ValueError as e:
+        await event.respond(f"❌ Erreur: {e}")
+
+@router.command('/deltable', args=(str,), usage="/deltable nom")
+async def cmd_deltable(event, name):
+    if name is None:
+        await event.respond("❌ Usage: `/deltable nom`")
+        return
+
+    removed = cluster.remove_table(name) if cluster is not None else await tables.remove(name) is not None
+    if not removed:
+        await event.respond("❌ Table inconnue (la table principale ne peut pas être supprimée)")
+        return
+    save_json(TABLES_CONFIG_FILE, tables_config())
+    await event.respond(f"🗑️ **Table {name} supprimée**")
+
+@router.command('/bilan')
+async def cmd_bilan(event):
+    stats_bilan = engine.stats
     if stats_bilan['total'] == 0:
         await event.respond("📊 Aucune prédiction enregistrée")
         return
@@ -849,31 +689,32 @@ async def cmd_bilan(event):
 • 3ème chance (N+2): {stats_bilan['win_details'].get('✅2️⃣', 0)}
 • 4ème chance (N+3): {stats_bilan['win_details'].get('✅3️⃣', 0)}""")
 
-@client.on(events.NewMessage(pattern='/reset'))
-async def cmd_reset(event):
-    """Reset uniquement les stats"""
-    if event.sender_id != ADMIN_ID:
+@router.command('/broadcast', rest=True)
+async def cmd_broadcast(event, text):
+    """Diffuse un message aux abonnés actifs, ou affiche la dernière diffusion"""
+    if text:
+        broadcast = await broadcaster.broadcast(text)
+        await event.respond(f"📣 **Diffusion #{broadcast.id}** vers {broadcast.total} abonnés")
         return
 
-    global stats_bilan, already_predicted_games, verification_state, last_prediction_time
-
-    old_pred = verification_state['predicted_number']
-
-    stats_bilan = {
-        'total': 0, 'wins': 0, 'losses': 0,
-        'win_details': {'✅0️⃣': 0, '✅1️⃣': 0, '✅2️⃣': 0, '✅3️⃣': 0},
-        'loss_details': {'❌': 0}
-    }
-
-    already_predicted_games.clear()
+    last = broadcaster.last
+    if last is None:
+        await event.respond(f"📣 Aucune diffusion\n\nAuto: {'✅' if BROADCAST_TO_SUBSCRIBERS else '❌'}\n`/broadcast texte`")
+        return
+    duration = f"{last.duration:.1f}s" if last.duration is not None else "en cours"
+    await event.respond(f"""📣 **DIFFUSION #{last.id}**
 
-    verification_state = {
-        'predicted_number': None, 'predicted_suit': None,
-        'current_check': 0, 'message_id': None,
-        'channel_id': None, 'status': None, 'base_game': None
-    }
+Destinataires: {last.total}
+✅ Envoyés: {last.sent}
+🚫 Bloqués: {last.blocked}
+❌ Échecs: {last.failed} ({last.retries} nouvelles tentatives)
+⏱️ Durée: {duration}""")
 
-    last_prediction_time = datetime.now()
+@router.command('/reset')
+async def cmd_reset(event):
+    """Reset uniquement les stats"""
+    old_pred = await engine.reset(history=True, stats=True)
+    engine.last_prediction_time = datetime.now()
 
     await event.respond(f"""🚨 **RESET EFFECTUÉ**
 
@@ -889,64 +730,119 @@ async def cmd_reset(event):
 # GESTION MESSAGES SOURCE
 # ============================================================
 
-@client.on(events.NewMessage)
 async def handle_messages(event):
+    """Point d'entrée unique: canaux source d'abord (un dict), puis commandes"""
+    chat_id = event.chat_id
+    message = event.message
+
     # Canal source
-    if event.is_group or event.is_channel:
-        if event.chat_id == get_source_channel_id():
-            await process_source_message(event)
+    table = tables.get(chat_id)
+    if table is not None:
+        table.on_message(message.id, message.message)
         return
-
-    # Commandes ignorées
-    if event.message.message.startswith('/'):
+    if cluster is not None and cluster.dispatch(chat_id, message.id, message.message):
         return
 
-@client.on(events.MessageEdited)
+    # Commandes
+    await router.dispatch(event, message.message)
+
 async def handle_edit(event):
-    if event.is_group or event.is_channel:
-        if event.chat_id == get_source_channel_id():
-            await process_source_message(event, is_edit=True)
+    table = tables.get(event.chat_id)
+    if table is not None:
+        table.on_message(event.message.id, event.message.message, is_edit=True)
+    elif cluster is not None:
+        cluster.dispatch(event.chat_id, event.message.id, event.message.message, is_edit=True)
+
+def create_client():
+    """Importe Telethon, crée le client et branche les handlers et les services"""
+    from telethon import TelegramClient, events
+    from telethon.sessions import StringSession
+    from telethon.errors import (
+        FloodWaitError, UserIsBlockedError, InputUserDeactivatedError,
+        UserDeactivatedError, UserDeactivatedBanError, PeerIdInvalidError
+    )
+
+    return attach_client(
+        TelegramClient(StringSession(os.getenv('TELEGRAM_SESSION', '')), API_ID, API_HASH),
+        events.NewMessage(), events.MessageEdited(), flood_errors=(FloodWaitError,),
+        blocked_errors=(UserIsBlockedError, InputUserDeactivatedError, UserDeactivatedError,
+                        UserDeactivatedBanError, PeerIdInvalidError)
+    )
+
+def attach_client(new_client, new_message, message_edited, flood_errors=(), blocked_errors=()):
+    """Branche un client (Telethon, ou faux client des tests de charge) sur les handlers et les services"""
+    global client
+    client = new_client
+    client.add_event_handler(handle_messages, new_message)
+    client.add_event_handler(handle_edit, message_edited)
+    sender.attach(client, flood_errors=flood_errors)
+    broadcaster.attach(client, flood_errors=flood_errors, blocked_errors=blocked_errors)
+    tables.attach_client(client)
+    return client
 
 # ============================================================
 # SERVEUR WEB
 # ============================================================
 
+def _status_response(request, kind):
+    code, headers, body = status_snapshot.respond(
+        kind,
+        request.headers.get('If-None-Match'),
+        request.headers.get('Accept-Encoding', '')
+    )
+    return web.Response(status=code, headers=headers, body=body or None)
+
+async def web_health(request):
+    """Sonde de la plateforme: 200 dès que le serveur écoute, même avant la connexion Telegram"""
+    return web.json_response({
+        'status': 'ok' if started else 'starting',
+        'telegram': client is not None and client.is_connected(),
+    })
+
 async def web_index(request):
-    cycle_mins = [x//60 for x in pause_config['cycle']]
-    current_idx = pause_config['current_index'] % len(cycle_mins)
+    return _status_response(request, 'html')
 
-    time_since_last = "N/A"
-    if last_prediction_time:
-        seconds = (datetime.now() - last_prediction_time).total_seconds()
-        mins = int(seconds // 60)
-        time_since_last = f"{mins} min"
+async def web_status(request):
+    return _status_response(request, 'json')
+
+async def web_status_stream(request):
+    """Flux SSE: un événement par changement d'état, commentaire keep-alive sinon"""
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    await response.prepare(request)
 
-    html = f"""<!DOCTYPE html>
-<html>
-<head><title>Bot Baccarat</title>
-<style>
-body {{ font-family: Arial; background: linear-gradient(135deg, #1e3c72, #2a5298); color: white; text-align: center; padding: 50px; }}
-.status {{ background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px; display: inline-block; margin: 10px; min-width: 120px; }}
-.number {{ font-size: 2em; color: #ffd700; font-weight: bold; }}
-.label {{ font-size: 0.9em; opacity: 0.8; margin-bottom: 5px; }}
-</style></head>
-<body>
-<h1>🎰 Bot Baccarat</h1>
-<div class="status"><div class="label">Jeu Actuel</div><div class="number">#{current_game_number}</div></div>
-<div class="status"><div class="label">Vérification</div><div class="number">{verification_state['predicted_number'] or 'Libre'}</div></div>
-<div class="status"><div class="label">Prédictions</div><div class="number">{'🟢 ON' if predictions_enabled else '🔴 OFF'}</div></div>
-<div class="status"><div class="label">Dernière Activité</div><div class="number">{time_since_last}</div></div>
-<div class="status"><div class="label">Pause</div><div class="number">{pause_config['predictions_count']}/5</div></div>
-<p style="margin-top: 30px; opacity: 0.8;">
-⏸️ Cycle: {cycle_mins} min | Position: {current_idx + 1}/{len(cycle_mins)} | {'⏸️ EN PAUSE' if pause_config['is_paused'] else '▶️ ACTIF'}
-</p>
-<p>🔄 {datetime.now().strftime('%H:%M:%S')}</p>
-</body></html>"""
-    return web.Response(text=html, content_type='text/html')
+    version = None
+    try:
+        while True:
+            current = await engine.wait_changed(version, timeout=SSE_KEEPALIVE_SECONDS)
+            if current == version:
+                await response.write(b": keep-alive\n\n")
+                continue
+            version = current
+            await response.write(f"id: {version}\ndata: {status_snapshot.status_json()}\n\n".encode('utf-8'))
+            # Regroupe les rafales de messages source en un seul événement
+            await asyncio.sleep(SSE_MIN_INTERVAL)
+    except ConnectionResetError:
+        # Client parti; une annulation (arrêt du serveur) doit, elle, remonter
+        pass
+    return response
+
+async def web_metrics(request):
+    return web.Response(
+        body=REGISTRY.render().encode('utf-8'),
+        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    )
 
 async def start_web():
     app = web.Application()
+    app.router.add_get('/health', web_health)
     app.router.add_get('/', web_index)
+    app.router.add_get('/api/status', web_status)
+    app.router.add_get('/api/status/stream', web_status_stream)
+    app.router.add_get('/metrics', web_metrics)
     runner = web.AppRunner(app)
     await runner.setup()
     await web.TCPSite(runner, '0.0.0.0', PORT).start()
@@ -955,32 +851,78 @@ async def start_web():
 # DÉMARRAGE
 # ============================================================
 
-async def main():
-    global auto_reset_task, last_prediction_time
+def start_services():
+    """Démarre les tâches de fond une fois le client connecté"""
+    sender.start()
+    broadcaster.start()
+    # Toutes les tables: moteur, journal, chien de garde (reset des vérifications
+    # bloquées, alerte flux source), rattrapage immédiat puis à chaque reconnexion
+    tables.start()
+    if cluster is not None:
+        cluster.start()
+
+    # Planifier les expirations VIP / abonnements
+    expiry_scheduler.load_from_store(user_store, exclude=(ADMIN_ID,))
+    expiry_scheduler.start()
+
+async def stop_services():
+    if cluster is not None:
+        await cluster.stop()
+    await tables.stop()
+    await broadcaster.stop()
+    await sender.stop()
+    await expiry_scheduler.stop()
+    await persistence.stop()
+    user_store.close()
+
+def install_signal_handlers():
+    """SIGTERM/SIGINT: déconnecte le client pour que main() passe par stop_services()"""
+    loop = asyncio.get_running_loop()
+
+    def shutdown(sig):
+        logger.info(f"🛑 Signal {sig.name} reçu, arrêt du bot...")
+        if client is not None and client.is_connected():
+            asyncio.ensure_future(client.disconnect())
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, shutdown, sig)
+        except NotImplementedError:
+            # Windows: pas de handlers de signaux dans la boucle asyncio
+            pass
 
-    load_all_configs()
+async def main():
+    global started
+    check_credentials()
+    # Serveur web d'abord: les health checks répondent pendant le chargement et la connexion
     await start_web()
+    load_all_configs()
+    persistence.start()
+    create_client()
     await client.start(bot_token=BOT_TOKEN)
-
-    # Initialiser le timer au démarrage
-    last_prediction_time = datetime.now()
-
-    # Démarrer le moniteur de reset automatique
-    auto_reset_task = asyncio.create_task(auto_reset_monitor())
+    started = True
+    start_services()
+    install_signal_handlers()
 
     cycle_mins = [x//60 for x in pause_config['cycle']]
 
     logger.info("=" * 60)
     logger.info("🚀 BOT BACCARAT DÉMARRÉ")
     logger.info(f"👑 Admin ID: {ADMIN_ID}")
+    logger.info(f"🎰 Tables: {len(tables)}"
+                + (f" + {len(cluster.to_config()['tables'])} sur {WORKER_PROCESSES} processus" if cluster else ""))
     logger.info(f"📺 Source: {get_source_channel_id()}")
     logger.info(f"🎯 Prédiction: {get_prediction_channel_id()}")
+    logger.info(f"📊 Pairs valides: {len(VALID_EVEN_NUMBERS)} numéros")
     logger.info(f"⏸️ Cycle pause: {cycle_mins} min")
     logger.info(f"⏸️ Position cycle: {(pause_config['current_index'] % len(cycle_mins)) + 1}/{len(cycle_mins)}")
-    logger.info("🔄 Reset automatique: ACTIVÉ (20 min)")
+    logger.info(f"🔄 Reset automatique: ACTIVÉ ({PREDICTION_TIMEOUT // 60} min)")
     logger.info("=" * 60)
 
-    await client.run_until_disconnected()
+    try:
+        await client.run_until_disconnected()
+    finally:
+        await stop_services()
 
 if __name__ == '__main__':
     asyncio.run(main())
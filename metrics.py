@@ -0,0 +1,169 @@
+"""Métriques internes (compteurs, jauges, histogrammes) au format Prometheus.
+
+Coût minimal sur le chemin critique: un compteur est une addition, un
+histogramme une recherche dichotomique dans des bornes fixes. `REGISTRY`
+est rendu en texte par la route /metrics du serveur web.
+"""
+import time
+import functools
+import inspect
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    __slots__ = ('name', 'help', 'value')
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield self.name, self.value
+
+
+class Gauge:
+    """Jauge: valeur fixée avec set(), ou lue via `func` au moment du rendu"""
+    __slots__ = ('name', 'help', 'value', 'func')
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, func=None):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self.func = func
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self):
+        yield self.name, self.func() if self.func is not None else self.value
+
+
+class Histogram:
+    __slots__ = ('name', 'help', 'bounds', 'counts', 'sum', 'count')
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{_format_value(bound)}"}}', cumulative
+        yield f'{self.name}_sum', self.sum
+        yield f'{self.name}_count', self.count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name, help_text, func=None):
+        gauge = self._register(Gauge(name, help_text, func))
+        if func is not None:
+            gauge.func = func
+        return gauge
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self):
+        """Texte au format d'exposition Prometheus 0.0.4"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for sample, value in metric.samples():
+                lines.append(f'{sample} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def timed(histogram):
+    """Décorateur: observe la durée d'une fonction (sync ou async) dans `histogram`"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# --- Métriques du bot ---
+
+SOURCE_MESSAGE_SECONDS = REGISTRY.histogram(
+    'bot_source_message_seconds', "Durée de traitement d'un message source")
+PREDICTION_SEND_SECONDS = REGISTRY.histogram(
+    'bot_prediction_send_seconds', "Durée d'envoi d'une prédiction")
+PREDICTION_STATUS_SECONDS = REGISTRY.histogram(
+    'bot_prediction_status_seconds', "Durée de mise à jour du statut d'une prédiction")
+SAVE_JSON_SECONDS = REGISTRY.histogram(
+    'bot_save_json_seconds', "Durée d'écriture d'un fichier JSON")
+TELEGRAM_API_SECONDS = REGISTRY.histogram(
+    'bot_telegram_api_seconds', "Durée des appels à l'API Telegram")
+BROADCAST_SECONDS = REGISTRY.histogram(
+    'bot_broadcast_seconds', "Durée d'une diffusion aux abonnés",
+    buckets=(1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 1800.0, 3600.0))
+
+SOURCE_MESSAGES = REGISTRY.counter('bot_source_messages_total', "Messages source reçus")
+SOURCE_EDITS_SKIPPED = REGISTRY.counter(
+    'bot_source_edits_skipped_total', "Éditions source non traitées (⏰ regroupées, identiques)")
+FLOOD_WAITS = REGISTRY.counter('bot_flood_waits_total', "FloodWait reçus de Telegram")
+PREDICTIONS = REGISTRY.counter('bot_predictions_total', "Prédictions lancées")
+WINS = REGISTRY.counter('bot_prediction_wins_total', "Prédictions gagnées")
+LOSSES = REGISTRY.counter('bot_prediction_losses_total', "Prédictions perdues")
+PAUSES = REGISTRY.counter('bot_pauses_total', "Pauses déclenchées")
+BROADCAST_MESSAGES = REGISTRY.counter('bot_broadcast_messages_total', "Messages privés diffusés")
+BROADCAST_BLOCKED = REGISTRY.counter('bot_broadcast_blocked_total', "Abonnés ayant bloqué le bot")
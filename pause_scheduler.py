@@ -0,0 +1,127 @@
+"""Pauses du cycle sur échéance monotone.
+
+Une pause arme un seul minuteur de boucle à son début: la fin est annoncée
+à l'heure, sans attendre le prochain déclencheur du canal source. Le
+chemin chaud ne fait qu'une comparaison (`is_paused()`), insensible aux
+sauts d'horloge murale. pause_config garde l'échéance en heure murale
+(`pause_end_time`), écrite au début de la pause: après un redémarrage,
+même sans arrêt propre, la pause se termine à l'heure prévue.
+"""
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class PauseScheduler:
+    """Échéance de pause d'une table
+
+    `on_resume()` (coroutine) est lancée une fois à chaque fin de pause,
+    par le minuteur ou par `is_paused()` si la boucle a pris du retard.
+    """
+
+    def __init__(self, pause_config, on_resume=None, clock=time.monotonic, now=datetime.now):
+        self.pause_config = pause_config
+        self.on_resume = on_resume
+        self.clock = clock
+        self.now = now
+        self.deadline = None
+        self.count = 0
+        self.resumes = 0
+        self._handle = None
+        self._tasks = set()
+
+    # --- Chemin chaud ---
+
+    def is_paused(self):
+        deadline = self.deadline
+        if deadline is None:
+            return False
+        if self.clock() < deadline:
+            return True
+        self._expire()
+        return False
+
+    def remaining(self):
+        """Secondes restantes (0 hors pause)"""
+        if self.deadline is None:
+            return 0.0
+        return max(0.0, self.deadline - self.clock())
+
+    # --- Cycle ---
+
+    def pause(self, duration):
+        self.count += 1
+        self._set(duration)
+
+    def restore(self, now):
+        """Reprend une pause enregistrée (après relecture de pause_config)"""
+        remaining = None
+        end_time = self.pause_config.get('pause_end_time')
+        # Format précédent: durée restante enregistrée à l'arrêt
+        legacy = self.pause_config.pop('pause_remaining', None)
+        if self.pause_config.get('is_paused'):
+            if end_time:
+                try:
+                    remaining = (datetime.fromisoformat(end_time) - now).total_seconds()
+                except (TypeError, ValueError):
+                    remaining = None
+            elif legacy is not None:
+                remaining = legacy
+        if remaining is not None and remaining > 0:
+            self._set(remaining)
+            logger.info(f"⏸️ Pause reprise: {int(remaining)}s restantes")
+        else:
+            self.pause_config['is_paused'] = False
+            self.pause_config['pause_end_time'] = None
+
+    def _set(self, duration):
+        self.deadline = self.clock() + duration
+        self.pause_config['is_paused'] = True
+        self.pause_config['pause_end_time'] = (self.now() + timedelta(seconds=duration)).isoformat()
+        self.arm()
+
+    def _expire(self):
+        self.deadline = None
+        self._cancel_timer()
+        self.pause_config['is_paused'] = False
+        self.pause_config['pause_end_time'] = None
+        self.pause_config['just_resumed'] = True
+        self.resumes += 1
+        if self.on_resume is not None:
+            task = asyncio.get_running_loop().create_task(self.on_resume())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    # --- Minuteur ---
+
+    def arm(self):
+        """(Ré)arme le minuteur de fin de pause (sans effet hors boucle asyncio)"""
+        self._cancel_timer()
+        if self.deadline is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._handle = loop.call_later(max(0.0, self.deadline - self.clock()), self._on_timer)
+
+    def _on_timer(self):
+        self._handle = None
+        # L'échéance fait foi: un réveil en avance (autre horloge) réarme
+        if self.deadline is not None and self.clock() < self.deadline:
+            self.arm()
+        elif self.deadline is not None:
+            self._expire()
+
+    def _cancel_timer(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def stop(self):
+        """Arrête le minuteur; True si une pause est en cours (pause_config à enregistrer)"""
+        self._cancel_timer()
+        return self.deadline is not None
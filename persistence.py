@@ -0,0 +1,116 @@
+"""Persistance JSON différée, atomique et hors de la boucle asyncio.
+
+Les appels à `mark_dirty` marquent un fichier comme modifié; les écritures
+sont regroupées sur un court intervalle puis effectuées depuis un thread
+(fichier temporaire + os.replace), de sorte qu'un crash en cours
+d'écriture ne tronque jamais le fichier et que la boucle ne bloque jamais
+sur le disque.
+"""
+import os
+import json
+import asyncio
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import timed, SAVE_JSON_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+def atomic_write_text(file_path, text):
+    """Écrit `text` via un fichier temporaire puis os.replace (atomique)"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def dump_json(data, indent=2):
+    return json.dumps(data, ensure_ascii=False, indent=indent)
+
+
+class JsonPersistence:
+    """Service d'écriture différée des fichiers de configuration"""
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.writes = 0
+        self.coalesced = 0
+        self._dirty = {}
+        self._wakeup = None
+        self._task = None
+        # Un seul thread: les écritures d'un même fichier restent ordonnées
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='persistence')
+
+    def mark_dirty(self, file_path, data, indent=2):
+        """Marque `data` à sauvegarder dans `file_path` au prochain flush"""
+        if self._task is None:
+            # Service non démarré (chargement initial, scripts): écriture directe
+            self._write(file_path, dump_json(data, indent))
+            return
+
+        if file_path in self._dirty:
+            self.coalesced += 1
+        self._dirty[file_path] = (data, indent)
+        self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.flush_interval)
+            # shield: un arrêt pendant l'écriture ne perd pas les données en vol
+            await asyncio.shield(self.flush())
+
+    async def flush(self):
+        """Écrit tous les fichiers marqués (sérialisation sur la boucle, I/O dans le thread)"""
+        if self._wakeup is not None:
+            self._wakeup.clear()
+        if not self._dirty:
+            return
+
+        pending, self._dirty = self._dirty, {}
+        payloads = [(path, dump_json(data, indent)) for path, (data, indent) in pending.items()]
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, self._write, path, text)
+            for path, text in payloads
+        ))
+
+    @timed(SAVE_JSON_SECONDS)
+    def _write(self, file_path, text):
+        try:
+            atomic_write_text(file_path, text)
+            self.writes += 1
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde {file_path}: {e}")
+
+    async def stop(self):
+        """Arrête le service après un dernier flush"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._executor.shutdown(wait=True)
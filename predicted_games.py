@@ -0,0 +1,61 @@
+"""Anti-doublon des prédictions sur l'espace des numéros de jeu.
+
+Remplace le set `already_predicted_games` qui grossissait sans limite: un
+tableau de taille fixe (un tampon d'époque par numéro 0-1436) indique si
+un numéro a déjà été prédit pendant la manche courante. Changer de manche
+revient à incrémenter l'époque, sans rien effacer. L'époque avance quand
+le numéro source repart du début (1436 -> 6).
+"""
+from array import array
+
+from game_tables import MAX_GAME_NUMBER
+
+# Recul minimal du numéro source pour considérer qu'une nouvelle manche commence
+# (les éditions d'anciens messages ne reculent que de quelques numéros)
+WRAP_THRESHOLD = MAX_GAME_NUMBER // 2
+
+
+class PredictedGames:
+    """Ensemble des numéros prédits pour la manche courante (mémoire constante)"""
+    __slots__ = ('epoch', 'last_number', '_stamps', '_count')
+
+    def __init__(self):
+        self.epoch = 1
+        self.last_number = None
+        self._stamps = array('I', [0]) * (MAX_GAME_NUMBER + 1)
+        self._count = 0
+
+    def __contains__(self, number):
+        return 0 <= number <= MAX_GAME_NUMBER and self._stamps[number] == self.epoch
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        epoch = self.epoch
+        return (number for number, stamp in enumerate(self._stamps) if stamp == epoch)
+
+    def add(self, number):
+        if 0 <= number <= MAX_GAME_NUMBER and self._stamps[number] != self.epoch:
+            self._stamps[number] = self.epoch
+            self._count += 1
+
+    def observe(self, number):
+        """Suit le numéro source; avance l'époque quand la numérotation repart
+
+        À appeler pour les nouveaux messages seulement (pas les éditions).
+        """
+        last = self.last_number
+        if last is not None and last - number > WRAP_THRESHOLD:
+            self.advance()
+            self.last_number = number
+        elif last is None or number > last:
+            self.last_number = number
+
+    def advance(self):
+        """Nouvelle manche: tous les numéros redeviennent disponibles en O(1)"""
+        self.epoch += 1
+        self._count = 0
+
+    def clear(self):
+        self.advance()
@@ -0,0 +1,637 @@
+"""Moteur de prédiction: machine à états explicite et file d'événements.
+
+Les handlers Telegram ne font que déposer les messages source dans une file
+numérotée; une tâche unique les consomme dans l'ordre et toutes les
+transitions (lancement, checks, résolution, reset) sont sérialisées par un
+verrou asyncio. Deux déclencheurs ne peuvent donc plus passer ensemble le
+test « aucune prédiction en cours ».
+
+Par défaut une seule prédiction est en vol (`max_in_flight=1`). Le mode
+pipeline (`max_in_flight > 1`) accepte de nouveaux déclencheurs pendant les
+checks; les vérifications en attente sont indexées par numéro attendu, et
+chaque message source résout tous ses prédictions en O(1).
+
+`sender` (normalement un TelegramSender) doit exposer `send_message(chat,
+text)` qui retourne un message avec `.id`, `edit_message(chat, message_id,
+text)` et `send_notice(chat, text)` pour les messages non prioritaires.
+"""
+import copy
+import time
+import asyncio
+import logging
+import traceback
+from datetime import datetime
+
+from config import SUIT_DISPLAY
+from game_tables import suit_for, trigger_target
+from source_parser import SourceMessageParser
+from predicted_games import PredictedGames
+from pause_scheduler import PauseScheduler
+from log_pipeline import GameList, category
+from metrics import (timed, SOURCE_MESSAGE_SECONDS, PREDICTION_SEND_SECONDS, PREDICTION_STATUS_SECONDS,
+                     SOURCE_MESSAGES, PREDICTIONS, WINS, LOSSES, PAUSES)
+
+logger = logging.getLogger(__name__)
+
+# Lignes répétées à chaque message source (limitées par LOG_RATE_LIMITS)
+LOG_MESSAGE = category('message')
+LOG_WAIT = category('wait')
+
+# États de la machine
+IDLE = 'IDLE'
+PENDING = 'PENDING'
+CHECK_1 = 'CHECK_1'
+CHECK_2 = 'CHECK_2'
+CHECK_3 = 'CHECK_3'
+RESOLVED = 'RESOLVED'
+
+CHECK_STATES = (PENDING, CHECK_1, CHECK_2, CHECK_3)
+MAX_CHECK = len(CHECK_STATES) - 1
+
+# Transitions autorisées d'une prédiction (RESOLVED est terminal)
+TRANSITIONS = {
+    PENDING: (CHECK_1, RESOLVED),
+    CHECK_1: (CHECK_2, RESOLVED),
+    CHECK_2: (CHECK_3, RESOLVED),
+    CHECK_3: (RESOLVED,),
+}
+
+WIN_STATUSES = ('✅0️⃣', '✅1️⃣', '✅2️⃣', '✅3️⃣')
+LOSS_STATUS = '❌'
+
+PREDICTIONS_BEFORE_PAUSE = 5
+
+# Reset automatique d'une vérification bloquée (ex: prédiction de #1436 avant le retour à #6)
+AUTO_RESET_SECONDS = 1200
+
+# Cycle de pause par défaut: 3min, 5min, 4min
+DEFAULT_PAUSE_CYCLE = [180, 300, 240]
+
+
+def new_pause_config(cycle=None):
+    return {
+        'cycle': list(cycle or DEFAULT_PAUSE_CYCLE),
+        'current_index': 0,
+        'predictions_count': 0,
+        'is_paused': False,
+        'pause_end_time': None,
+        'just_resumed': False
+    }
+
+
+def new_stats():
+    return {
+        'total': 0, 'wins': 0, 'losses': 0,
+        'win_details': {status: 0 for status in WIN_STATUSES},
+        'loss_details': {LOSS_STATUS: 0}
+    }
+
+
+def apply_result(stats, status):
+    """Comptabilise un statut final dans `stats`; True si gagné, False si perdu"""
+    if status in WIN_STATUSES:
+        stats['total'] += 1
+        stats['wins'] += 1
+        stats['win_details'][status] = stats['win_details'].get(status, 0) + 1
+        return True
+    if status == LOSS_STATUS:
+        stats['total'] += 1
+        stats['losses'] += 1
+        return False
+    return None
+
+
+def format_prediction(target_game, predicted_suit, status_line):
+    return f"""🎰 **PRÉDICTION #{target_game}**
+🎯 Couleur: {SUIT_DISPLAY.get(predicted_suit, predicted_suit)}
+{status_line}"""
+
+
+class Prediction:
+    """Une prédiction en cours de vérification"""
+    __slots__ = ('target', 'suit', 'base_game', 'check', 'message_id', 'channel_id', 'state')
+
+    def __init__(self, target, suit, base_game, message_id, channel_id):
+        self.target = target
+        self.suit = suit
+        self.base_game = base_game
+        self.check = 0
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.state = PENDING
+
+    @property
+    def expected_number(self):
+        return self.target + self.check
+
+    def move(self, state):
+        """Applique une transition; ValueError si elle n'est pas autorisée"""
+        if state not in TRANSITIONS.get(self.state, ()):
+            raise ValueError(f"Transition {self.state} -> {state} invalide (#{self.target})")
+        self.state = state
+
+    def advance(self):
+        self.move(CHECK_STATES[self.check + 1])
+        self.check += 1
+
+
+class PredictionEngine:
+    """État complet d'un système de prédiction (un canal source)"""
+    __slots__ = (
+        'sender', 'prediction_channel_id', 'pause_config', 'pauses', 'parser', 'persist', 'now',
+        'max_in_flight', 'in_flight', 'by_expected', 'state', 'stats', 'already_predicted_games', 'predictions_enabled',
+        'last_prediction_time', 'last_predicted_number', 'current_game_number',
+        'last_source_game_number', 'lock', 'queue', 'seq', 'processed_seq', '_task',
+        'version', '_changed', '_waiters', 'listeners', 'journal', 'last_message_id', 'duplicates', 'on_launch', 'on_result'
+    )
+
+    def __init__(self, sender, prediction_channel_id, pause_config, parser=None, persist=None,
+                 now=datetime.now, journal=None, max_in_flight=1, monotonic=time.monotonic):
+        self.sender = sender
+        self.prediction_channel_id = prediction_channel_id
+        self.pause_config = pause_config
+        # Échéance de pause monotone (`monotonic`: horloge simulée en rejeu)
+        self.pauses = PauseScheduler(pause_config, self._pause_ended, monotonic, now)
+        self.parser = parser or SourceMessageParser()
+        self.persist = persist or (lambda: None)
+        self.now = now
+        # PredictionJournal (ou None): trace chaque transition pour la reprise
+        self.journal = journal
+
+        # Prédictions en vol (cible -> Prediction, ordre de lancement) et index
+        # des vérifications attendues (numéro de jeu -> [Prediction])
+        self.max_in_flight = max_in_flight
+        self.in_flight = {}
+        self.by_expected = {}
+        self.state = IDLE
+        self.stats = new_stats()
+        self.already_predicted_games = PredictedGames()
+        self.predictions_enabled = True
+        self.last_prediction_time = None
+        self.last_predicted_number = None
+        self.current_game_number = 0
+        self.last_source_game_number = 0
+        # Plus grand id de nouveau message source traité (anti-doublon live / rattrapage)
+        self.last_message_id = 0
+        self.duplicates = 0
+
+        self.lock = asyncio.Lock()
+        self.queue = asyncio.Queue()
+        self.seq = 0
+        self.processed_seq = 0
+        self._task = None
+
+        # Incrémenté à chaque changement d'état visible (web, SSE)
+        self.version = 0
+        # Transition visible pendant le message en cours (touch() une fois à la fin)
+        self._changed = False
+        self._waiters = []
+        # Rappels synchrones appelés à chaque changement (chien de garde)
+        self.listeners = []
+        # Rappels synchrones(texte) après l'envoi d'une prédiction / quand son
+        # résultat est connu (diffusion aux abonnés)
+        self.on_launch = None
+        self.on_result = None
+
+    # --- Accès lecture (commandes, web) ---
+
+    @property
+    def current(self):
+        """Plus ancienne prédiction en vol (la seule en mode séquentiel)"""
+        for prediction in self.in_flight.values():
+            return prediction
+        return None
+
+    @property
+    def predicted_number(self):
+        return self.current.target if self.current else None
+
+    @property
+    def predicted_suit(self):
+        return self.current.suit if self.current else None
+
+    @property
+    def current_check(self):
+        return self.current.check if self.current else 0
+
+    @property
+    def is_busy(self):
+        return self.state != IDLE
+
+    @property
+    def is_full(self):
+        """Aucun nouveau lancement possible: les messages ne servent qu'aux vérifications"""
+        return len(self.in_flight) >= self.max_in_flight
+
+    def _track(self, prediction):
+        self.by_expected.setdefault(prediction.expected_number, []).append(prediction)
+
+    def _untrack(self, prediction):
+        waiters = self.by_expected.get(prediction.expected_number)
+        if waiters is not None:
+            if prediction in waiters:
+                waiters.remove(prediction)
+            if not waiters:
+                del self.by_expected[prediction.expected_number]
+
+    def _clear_in_flight(self):
+        self.in_flight.clear()
+        self.by_expected.clear()
+        self._sync_state()
+
+    def _sync_state(self):
+        """État du moteur: celui de la plus ancienne prédiction en vol, IDLE sinon"""
+        current = self.current
+        self.state = current.state if current is not None else IDLE
+
+    # --- Sauvegarde / reprise ---
+
+    def export_state(self):
+        """État complet sérialisable (instantané du journal)"""
+        return {
+            'in_flight': [{
+                'target': prediction.target,
+                'suit': prediction.suit,
+                'base_game': prediction.base_game,
+                'check': prediction.check,
+                'message_id': prediction.message_id,
+                'channel_id': prediction.channel_id,
+            } for prediction in self.in_flight.values()],
+            'stats': copy.deepcopy(self.stats),
+            'predicted_games': list(self.already_predicted_games),
+            'last_prediction_time': self.last_prediction_time.isoformat() if self.last_prediction_time else None,
+            'last_predicted_number': self.last_predicted_number,
+        }
+
+    def restore_state(self, state):
+        """Reprend l'état exporté/rejoué (vérifications en cours au bon check)"""
+        self._clear_in_flight()
+        for saved in state.get('in_flight', ()):
+            prediction = Prediction(saved['target'], saved['suit'], saved['base_game'],
+                                    saved['message_id'], saved['channel_id'])
+            prediction.check = saved['check']
+            prediction.state = CHECK_STATES[prediction.check]
+            self.in_flight[prediction.target] = prediction
+            self._track(prediction)
+        self._sync_state()
+
+        self.stats = state.get('stats') or new_stats()
+        self.already_predicted_games.clear()
+        for number in state.get('predicted_games', ()):
+            self.already_predicted_games.add(number)
+        last_time = state.get('last_prediction_time')
+        self.last_prediction_time = datetime.fromisoformat(last_time) if last_time else None
+        self.last_predicted_number = state.get('last_predicted_number')
+        self.touch()
+
+    def _journal(self, event, **fields):
+        if self.journal is not None:
+            self.journal.record(event, **fields)
+
+    # --- Version d'état ---
+
+    def touch(self):
+        """Signale un changement d'état (à appeler après toute modification externe)"""
+        self.version += 1
+        for listener in self.listeners:
+            listener()
+        if self._waiters:
+            waiters, self._waiters = self._waiters, []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(self.version)
+
+    async def wait_changed(self, version, timeout=None):
+        """Attend que `version` soit dépassée; retourne la version courante"""
+        if self.version != version:
+            return self.version
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        return self.version
+
+    # --- File d'événements ---
+
+    def submit(self, message_id, message_text, is_edit=False):
+        """Dépose un message source (appelé par les handlers, ne bloque pas)"""
+        self.seq += 1
+        self.queue.put_nowait((self.seq, message_id, message_text, is_edit))
+        return self.seq
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._consume())
+        self.pauses.arm()
+        return self._task
+
+    async def stop(self):
+        if self.pauses.stop():
+            self.persist()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _consume(self):
+        while True:
+            seq, message_id, message_text, is_edit = await self.queue.get()
+            try:
+                if not is_edit:
+                    if message_id <= self.last_message_id:
+                        # Déjà traité par le rattrapage
+                        self.duplicates += 1
+                        continue
+                    self.last_message_id = message_id
+                await self.handle(self.parser.parse(message_id, message_text), is_edit)
+            except Exception as e:
+                logger.error(f"❌ Erreur traitement message: {e}")
+                logger.error(traceback.format_exc())
+            finally:
+                self.processed_seq = seq
+                self.queue.task_done()
+
+    @timed(SOURCE_MESSAGE_SECONDS)
+    async def handle(self, parsed, is_edit=False):
+        """Traite un message source analysé (transition sous verrou)"""
+        SOURCE_MESSAGES.inc()
+        if parsed.game_number is None:
+            return
+        async with self.lock:
+            try:
+                await self._process(parsed, is_edit)
+            finally:
+                # Les éditions ⏰ sans effet ne changent pas la version
+                if self._changed:
+                    self._changed = False
+                    self.touch()
+
+    async def catch_up(self, messages):
+        """Rejoue dans l'ordre des messages manqués [(id, texte)] (reconnexion)
+
+        Les vérifications progressent normalement, mais seul le message le plus
+        récent (s'il est nouveau) peut lancer une prédiction: les jeux
+        intermédiaires sont déjà passés. Les messages live reçus pendant le
+        rattrapage attendent le verrou puis sont dédupliqués par id.
+        """
+        messages = sorted(messages)
+        if not messages:
+            return 0
+        last_index = len(messages) - 1
+        async with self.lock:
+            allow_last = messages[-1][0] > self.last_message_id
+            for index, (message_id, message_text) in enumerate(messages):
+                parsed = self.parser.parse(message_id, message_text)
+                if parsed.game_number is None:
+                    continue
+                try:
+                    # Id jamais vu: nouveau message (peut faire avancer la manche)
+                    await self._process(parsed, message_id <= self.last_message_id,
+                                        allow_launch=allow_last and index == last_index)
+                except Exception as e:
+                    logger.error(f"❌ Erreur rattrapage message {message_id}: {e}")
+                if message_id > self.last_message_id:
+                    self.last_message_id = message_id
+            self._changed = False
+            self.touch()
+        logger.info(f"🔁 Rattrapage: {len(messages)} messages rejoués (jusqu'à l'id {self.last_message_id})")
+        return len(messages)
+
+    # --- Transitions ---
+
+    async def _process(self, parsed, is_edit, allow_launch=True):
+        game_number = parsed.game_number
+        is_editing = parsed.is_editing
+        is_finalized = parsed.is_finalized
+
+        logger.info("📩 %s %s: #%s", "⏰" if is_editing else ("✅" if is_finalized else "📝"),
+                    "ÉDITÉ" if is_edit else "NOUVEAU", game_number, extra=LOG_MESSAGE)
+
+        if not is_edit:
+            # Seuls les nouveaux messages suivent la numérotation: une édition
+            # tardive de #1436 après le retour à #6 ne doit pas réarmer la manche
+            epoch = self.already_predicted_games.epoch
+            self.already_predicted_games.observe(game_number)
+            if self.already_predicted_games.epoch != epoch:
+                self._journal('wrap')
+
+        if self.state != IDLE:
+            # Plein à l'arrivée: ce message ne sert qu'aux vérifications
+            full = self.is_full
+            waiters = self.by_expected.get(game_number)
+
+            if waiters and is_editing:
+                logger.info("⏳ Message #%s en édition, attente finalisation (✅/🔰)", game_number, extra=LOG_WAIT)
+                return
+
+            if waiters:
+                logger.info("✅ Numéro #%s finalisé/disponible, vérification...", game_number)
+                for prediction in list(waiters):
+                    await self._verify(prediction, game_number, parsed.suits)
+
+                if self.state != IDLE:
+                    logger.info("⏳ Prédiction(s) %s toujours en cours", GameList(self.in_flight), extra=LOG_WAIT)
+                    if full:
+                        return
+                else:
+                    logger.info("✅ Vérification terminée, système libre")
+            else:
+                logger.info("⏭️ Attente %s, reçu #%s", GameList(self.by_expected), game_number, extra=LOG_WAIT)
+
+            if full:
+                return
+
+        if allow_launch:
+            await self._check_and_launch(game_number)
+
+        if game_number != self.current_game_number:
+            self.current_game_number = game_number
+            self._changed = True
+        self.last_source_game_number = game_number
+
+    async def _verify(self, prediction, game_number, suits):
+        """Traite UNE étape de vérification d'une prédiction"""
+        if prediction.state not in TRANSITIONS:
+            return
+        current_check = prediction.check
+
+        logger.info("🔍 Vérification #%s: premier groupe contient %s, attendu %s", game_number, suits, prediction.suit)
+
+        if prediction.suit in suits:
+            status = f"✅{current_check}️⃣"
+            logger.info("🎉 GAGNÉ! Costume %s trouvé dans premier groupe au check %s", prediction.suit, current_check)
+            await self._resolve(prediction, status)
+            return
+
+        if prediction.state != CHECK_STATES[MAX_CHECK]:
+            self._untrack(prediction)
+            prediction.advance()
+            self._track(prediction)
+            self._sync_state()
+            self._journal('check', target=prediction.target, check=prediction.check)
+            self._changed = True
+            logger.info("❌ Check %s échoué sur #%s, prochain: #%s", current_check, game_number, prediction.expected_number)
+        else:
+            logger.info("💔 PERDU après 4 vérifications (jusqu'à #%s)", game_number)
+            await self._resolve(prediction, LOSS_STATUS)
+
+    async def _check_and_launch(self, game_number):
+        """Vérifie et lance une prédiction avec CYCLE DE PAUSE"""
+        if self.pauses.is_paused():
+            return
+        pause_config = self.pause_config
+
+        target_num = trigger_target(game_number)
+        if target_num is None:
+            return
+        logger.info("🔥 DÉCLENCHEUR #%s (suivant: #%s)", game_number, target_num)
+
+        if target_num in self.already_predicted_games:
+            return
+
+        pause_config['predictions_count'] += 1
+        current_count = pause_config['predictions_count']
+        self._changed = True
+
+        logger.info("📊 Prédiction %s/%s avant pause", current_count, PREDICTIONS_BEFORE_PAUSE)
+
+        if current_count >= PREDICTIONS_BEFORE_PAUSE:
+            await self._start_pause()
+            return
+
+        suit = suit_for(target_num)
+        if suit:
+            success = await self._launch(target_num, suit, game_number)
+            if success:
+                self.already_predicted_games.add(target_num)
+                logger.info("✅ Prédiction #%s lancée (%s/%s)", target_num, current_count, PREDICTIONS_BEFORE_PAUSE)
+
+    async def _start_pause(self):
+        pause_config = self.pause_config
+        cycle = pause_config['cycle']
+        idx = pause_config['current_index'] % len(cycle)
+        duration = cycle[idx]
+
+        self.pauses.pause(duration)
+        pause_config['current_index'] += 1
+        pause_config['predictions_count'] = 0
+        self._changed = True
+        self.persist()
+        PAUSES.inc()
+
+        minutes = duration // 60
+
+        logger.info(f"⏸️ PAUSE: {minutes}min")
+
+        try:
+            await self.sender.send_notice(
+                self.prediction_channel_id,
+                f"⏸️ **PAUSE**\n⏱️ {minutes} minutes..."
+            )
+        except Exception as e:
+            logger.error(f"Erreur envoi message pause: {e}")
+
+    async def _pause_ended(self):
+        """Fin de pause (minuteur du PauseScheduler): annonce de reprise"""
+        self.persist()
+        self.touch()
+        logger.info("🔄 Pause terminée, reprise")
+        try:
+            await self.sender.send_notice(
+                self.prediction_channel_id,
+                "▶️ **PAUSE TERMINÉE**\n🔄 Reprise des prédictions"
+            )
+        except Exception as e:
+            logger.error(f"Erreur envoi message reprise: {e}")
+
+    @timed(PREDICTION_SEND_SECONDS)
+    async def _launch(self, target_game, predicted_suit, base_game):
+        """Envoie une prédiction au canal configuré"""
+        if not self.predictions_enabled:
+            logger.warning("⛔ Prédictions désactivées")
+            return False
+
+        try:
+            channel_id = self.prediction_channel_id
+            text = format_prediction(target_game, predicted_suit, "⏳ Statut: EN ATTENTE DU RÉSULTAT...")
+            sent_msg = await self.sender.send_message(channel_id, text)
+
+            prediction = Prediction(target_game, predicted_suit, base_game, sent_msg.id, channel_id)
+            self.in_flight[target_game] = prediction
+            self._track(prediction)
+            self._sync_state()
+            self.last_predicted_number = target_game
+            self.last_prediction_time = self.now()
+            self._changed = True
+            PREDICTIONS.inc()
+            self._journal('launch', target=target_game, suit=predicted_suit, base_game=base_game,
+                          message_id=sent_msg.id, channel_id=channel_id,
+                          ts=self.last_prediction_time.isoformat())
+            if self.on_launch is not None:
+                self.on_launch(text)
+
+            logger.info(f"🚀 PRÉDICTION #{target_game} ({predicted_suit}) LANCÉE")
+            logger.info(f"🔍 Attente vérification: #{target_game} (check 0/{MAX_CHECK})")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Erreur envoi prédiction: {e}")
+            return False
+
+    @timed(PREDICTION_STATUS_SECONDS)
+    async def _resolve(self, prediction, status):
+        """Met à jour le statut de la prédiction et libère sa place"""
+        status_text = "❌ PERDU" if status == LOSS_STATUS else f"{status} GAGNÉ"
+        text = format_prediction(prediction.target, prediction.suit, f"📊 Statut: {status_text}")
+
+        try:
+            await self.sender.edit_message(prediction.channel_id, prediction.message_id, text)
+        except Exception as e:
+            logger.error(f"❌ Erreur mise à jour statut: {e}")
+            return False
+        if self.on_result is not None:
+            self.on_result(text)
+
+        self._record_result(prediction, status)
+        logger.info(f"🔓 SYSTÈME LIBÉRÉ - Nouvelle prédiction possible")
+
+        prediction.move(RESOLVED)
+        self._untrack(prediction)
+        del self.in_flight[prediction.target]
+        # Retour à IDLE (ou à l'état de la prédiction suivante en mode pipeline)
+        self._sync_state()
+        self.last_prediction_time = self.now()
+        self._changed = True
+        self._journal('resolve', target=prediction.target, status=status,
+                      ts=self.last_prediction_time.isoformat())
+        return True
+
+    def _record_result(self, prediction, status):
+        won = apply_result(self.stats, status)
+        if won:
+            WINS.inc()
+            logger.info(f"🎉 #{prediction.target} GAGNÉ ({status})")
+        elif won is False:
+            LOSSES.inc()
+            logger.info(f"💔 #{prediction.target} PERDU")
+
+    # --- Commandes ---
+
+    async def reset(self, history=False, stats=False):
+        """Efface la vérification en cours (et éventuellement historique/stats)"""
+        async with self.lock:
+            old = self.predicted_number
+            self._clear_in_flight()
+            if history:
+                self.already_predicted_games.clear()
+            if stats:
+                self.stats = new_stats()
+            self._journal('reset', history=history, stats=stats)
+            self.touch()
+            return old
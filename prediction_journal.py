@@ -0,0 +1,223 @@
+"""Journal des prédictions: reprise après redémarrage sans perte d'état.
+
+Chaque transition du moteur (lancement, check suivant, résolution, reset,
+nouvelle manche) est ajoutée à un fichier JSONL; les écritures sont
+regroupées et suivies d'un seul fsync. Un instantané complet est écrit
+toutes les `compact_every` entrées, puis le journal est tronqué: au
+démarrage, on relit l'instantané et quelques centaines de lignes au plus.
+
+    {"seq": 12, "e": "launch", "target": 8, "suit": "♥", ...}
+"""
+import os
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from persistence import atomic_write_text
+from prediction_engine import new_stats, apply_result
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNC_INTERVAL = 0.2
+DEFAULT_COMPACT_EVERY = 500
+
+
+def new_journal_state():
+    return {
+        'seq': 0,
+        'in_flight': [],
+        'stats': new_stats(),
+        'predicted_games': [],
+        'last_prediction_time': None,
+        'last_predicted_number': None,
+    }
+
+
+def apply_event(state, record):
+    """Applique une entrée du journal à `state` (mêmes règles que le moteur)"""
+    event = record['e']
+    in_flight = state['in_flight']
+    if event == 'launch':
+        in_flight.append({
+            'target': record['target'],
+            'suit': record['suit'],
+            'base_game': record['base_game'],
+            'check': 0,
+            'message_id': record['message_id'],
+            'channel_id': record['channel_id'],
+        })
+        if record['target'] not in state['predicted_games']:
+            state['predicted_games'].append(record['target'])
+        state['last_prediction_time'] = record['ts']
+        state['last_predicted_number'] = record['target']
+    elif event == 'check':
+        for prediction in in_flight:
+            if prediction['target'] == record['target']:
+                prediction['check'] = record['check']
+    elif event == 'resolve':
+        apply_result(state['stats'], record['status'])
+        state['in_flight'] = [p for p in in_flight if p['target'] != record['target']]
+        state['last_prediction_time'] = record['ts']
+    elif event == 'reset':
+        state['in_flight'] = []
+        if record.get('history'):
+            state['predicted_games'] = []
+        if record.get('stats'):
+            state['stats'] = new_stats()
+    elif event == 'wrap':
+        state['predicted_games'] = []
+    state['seq'] = record['seq']
+
+
+class PredictionJournal:
+    """Journal en ajout seul + instantané périodique"""
+
+    def __init__(self, path, snapshot_path, sync_interval=DEFAULT_SYNC_INTERVAL,
+                 compact_every=DEFAULT_COMPACT_EVERY, executor=None):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+
+        self.seq = 0
+        self.records = 0
+        self.syncs = 0
+        self.compactions = 0
+
+        self._buffer = []
+        self._since_snapshot = 0
+        self._export_state = None
+        self._wakeup = None
+        self._task = None
+        # Un seul thread: ajouts, instantanés et troncatures restent ordonnés
+        # (un exécuteur mono-thread peut être partagé entre plusieurs journaux)
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal')
+
+    # --- Lecture au démarrage ---
+
+    def load(self):
+        """Instantané + entrées suivantes; retourne l'état reconstruit"""
+        state = new_journal_state()
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                state.update(json.load(f))
+            # Instantanés antérieurs au mode pipeline: une seule prédiction 'current'
+            current = state.pop('current', None)
+            if current is not None:
+                state['in_flight'] = [current]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Instantané illisible ({self.snapshot_path}): {e}")
+
+        replayed = 0
+        corrupted = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Ligne tronquée par un arrêt brutal: tout ce qui suit est ignoré
+                        corrupted = True
+                        break
+                    if record['seq'] > state['seq']:
+                        apply_event(state, record)
+                        replayed += 1
+        except FileNotFoundError:
+            pass
+
+        self.seq = state['seq']
+        self._since_snapshot = replayed
+        if corrupted:
+            logger.warning("⚠️ Fin de journal corrompue, compaction immédiate")
+            self._compact(state, [])
+        logger.info(f"📒 Journal rechargé: {replayed} entrées après l'instantané #{state['seq']}")
+        return state
+
+    # --- Écriture ---
+
+    def record(self, event, **fields):
+        """Ajoute une entrée (tamponnée; écrite et synchronisée au prochain flush)"""
+        self.seq += 1
+        fields['seq'] = self.seq
+        fields['e'] = event
+        self._buffer.append(json.dumps(fields, ensure_ascii=False) + '\n')
+        self.records += 1
+        self._since_snapshot += 1
+
+        if self._task is None:
+            # Service non démarré (scripts, démarrage): écriture directe
+            lines, self._buffer = self._buffer, []
+            self._append(lines)
+        else:
+            self._wakeup.set()
+
+    def start(self, export_state):
+        """`export_state()` fournit l'état complet pour les instantanés"""
+        self._export_state = export_state
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.sync_interval)
+            await asyncio.shield(self.flush())
+
+    async def flush(self):
+        """Écrit les entrées en attente (un seul fsync), compacte si nécessaire"""
+        if self._wakeup is not None:
+            self._wakeup.clear()
+        if not self._buffer:
+            return
+
+        lines, self._buffer = self._buffer, []
+        loop = asyncio.get_running_loop()
+        if self._export_state is not None and self._since_snapshot >= self.compact_every:
+            # L'état est capturé sur la boucle, cohérent avec les lignes retirées du tampon
+            state = self._export_state()
+            state['seq'] = self.seq
+            self._since_snapshot = 0
+            await loop.run_in_executor(self._executor, self._compact, state, lines)
+        else:
+            await loop.run_in_executor(self._executor, self._append, lines)
+
+    def _append(self, lines):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self.syncs += 1
+        except Exception as e:
+            logger.error(f"Erreur écriture journal {self.path}: {e}")
+
+    def _compact(self, state, lines):
+        """Instantané atomique puis troncature (les entrées en vol y sont incluses)"""
+        try:
+            atomic_write_text(self.snapshot_path, json.dumps(state, ensure_ascii=False))
+            # Un arrêt ici laisse des entrées déjà couvertes (seq <= instantané): ignorées au chargement
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+            self.compactions += 1
+        except Exception as e:
+            logger.error(f"Erreur compaction journal {self.path}: {e}")
+            self._append(lines)
+
+    async def stop(self):
+        """Arrête le service après un dernier flush"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,177 @@
+"""Chien de garde à échéances: reset des vérifications bloquées, alerte flux source.
+
+Remplace la boucle qui se réveillait toutes les 60 s. Un seul minuteur
+`loop.call_at` (horloge monotone) est réarmé quand l'état du moteur change
+et vise la prochaine échéance:
+
+- prédiction en cours depuis `prediction_timeout` s (ou check depuis `check_timeout` s);
+- aucune prédiction depuis `idle_timeout` s;
+- aucun message source depuis `feed_timeout` s (alerte distincte, une fois par coupure).
+
+Un délai à None désactive la règle correspondante.
+"""
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+REASON_PREDICTION = 'prediction'
+REASON_CHECK = 'check'
+REASON_IDLE = 'idle'
+
+
+class Watchdog:
+    """`on_timeout(reason, message)` et `on_feed_stalled(seconds)` sont des coroutines"""
+
+    def __init__(self, engine, on_timeout, on_feed_stalled=None, prediction_timeout=1200,
+                 check_timeout=None, idle_timeout=1200, feed_timeout=None, clock=time.monotonic):
+        self.engine = engine
+        self.on_timeout = on_timeout
+        self.on_feed_stalled = on_feed_stalled
+        self.prediction_timeout = prediction_timeout
+        self.check_timeout = check_timeout
+        self.idle_timeout = idle_timeout
+        self.feed_timeout = feed_timeout
+        self.clock = clock
+
+        self.timeouts = 0
+        self.feed_alerts = 0
+
+        # Repères monotones des dernières transitions
+        self._prediction_key = None
+        self._check_key = None
+        self._last_activity = None
+        self._prediction_started = 0.0
+        self._check_started = 0.0
+        self._activity_at = 0.0
+        self._source_at = 0.0
+        self._feed_alerted = False
+
+        self._loop = None
+        self._handle = None
+        self._deadline = None
+        self._tasks = set()
+
+    def start(self):
+        """Arme le minuteur; les états repris du journal gardent leur ancienneté"""
+        self._loop = asyncio.get_running_loop()
+        now = self.clock()
+        self._source_at = now
+        engine = self.engine
+        elapsed = 0.0
+        if engine.last_prediction_time is not None:
+            elapsed = max(0.0, (engine.now() - engine.last_prediction_time).total_seconds())
+        self._activity_at = self._prediction_started = self._check_started = now - elapsed
+        self._last_activity = engine.last_prediction_time
+        current = engine.current
+        self._prediction_key = current.target if current is not None else None
+        self._check_key = (current.target, current.check) if current is not None else None
+        engine.listeners.append(self.notify)
+        self._rearm()
+
+    def stop(self):
+        if self.notify in self.engine.listeners:
+            self.engine.listeners.remove(self.notify)
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        for task in self._tasks:
+            task.cancel()
+
+    # --- Événements ---
+
+    def notify(self):
+        """Appelé à chaque changement d'état du moteur"""
+        engine = self.engine
+        now = self.clock()
+        current = engine.current
+        if current is not None:
+            if current.target != self._prediction_key:
+                self._prediction_key = current.target
+                self._prediction_started = now
+            check_key = (current.target, current.check)
+            if check_key != self._check_key:
+                self._check_key = check_key
+                self._check_started = now
+        else:
+            self._prediction_key = None
+            self._check_key = None
+        if engine.last_prediction_time is not self._last_activity:
+            self._last_activity = engine.last_prediction_time
+            self._activity_at = now
+        if self._loop is not None:
+            self._rearm()
+
+    def feed(self):
+        """Appelé à chaque message du canal source"""
+        self._source_at = self.clock()
+        self._feed_alerted = False
+
+    # --- Échéances ---
+
+    def _deadlines(self):
+        """[(échéance monotone, raison)] actives"""
+        deadlines = []
+        if self.engine.current is not None:
+            if self.prediction_timeout is not None:
+                deadlines.append((self._prediction_started + self.prediction_timeout, REASON_PREDICTION))
+            if self.check_timeout is not None:
+                deadlines.append((self._check_started + self.check_timeout, REASON_CHECK))
+        elif self.idle_timeout is not None:
+            deadlines.append((self._activity_at + self.idle_timeout, REASON_IDLE))
+        return deadlines
+
+    def _next_deadline(self):
+        deadlines = [deadline for deadline, _ in self._deadlines()]
+        if self.feed_timeout is not None and not self._feed_alerted:
+            deadlines.append(self._source_at + self.feed_timeout)
+        return min(deadlines) if deadlines else None
+
+    def _rearm(self):
+        deadline = self._next_deadline()
+        if deadline == self._deadline and self._handle is not None:
+            return
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._deadline = deadline
+        if deadline is not None:
+            # Le minuteur de la boucle est lui aussi monotone: on convertit l'écart
+            self._handle = self._loop.call_at(self._loop.time() + max(0.0, deadline - self.clock()), self._fire)
+
+    def _fire(self):
+        self._handle = None
+        self._deadline = None
+        now = self.clock()
+
+        for deadline, reason in self._deadlines():
+            if now >= deadline:
+                self.timeouts += 1
+                self._spawn(self.on_timeout(reason, self._describe(reason)))
+                # Le reset repassera par notify(); en attendant, pas de nouveau déclenchement
+                self._activity_at = self._prediction_started = self._check_started = now
+                break
+
+        if (self.feed_timeout is not None and not self._feed_alerted
+                and now >= self._source_at + self.feed_timeout):
+            self._feed_alerted = True
+            self.feed_alerts += 1
+            if self.on_feed_stalled is not None:
+                self._spawn(self.on_feed_stalled(int(now - self._source_at)))
+
+        self._rearm()
+
+    def _describe(self, reason):
+        engine = self.engine
+        if reason == REASON_PREDICTION:
+            return f"Prédiction #{engine.predicted_number} bloquée depuis {self.prediction_timeout // 60}+ min"
+        if reason == REASON_CHECK:
+            return (f"Prédiction #{engine.predicted_number} bloquée au check {engine.current_check} "
+                    f"depuis {self.check_timeout // 60}+ min")
+        return f"Aucune prédiction depuis {self.idle_timeout // 60}+ min"
+
+    def _spawn(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
@@ -0,0 +1,142 @@
+"""Rejeu hors ligne de la stratégie sur un historique du canal source.
+
+Lit un fichier JSONL (une ligne par message ou édition:
+`{"id": 123, "text": "...", "edit": false, "ts": 1738700000.0}`) et le fait
+passer par le même PredictionEngine qu'en production, avec une horloge
+simulée (les pauses suivent les `ts` enregistrés) et un faux envoyeur.
+
+    python replay.py historique.jsonl [--pause-cycle 3,5,4] [--json]
+"""
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+
+from prediction_engine import PredictionEngine, new_pause_config, AUTO_RESET_SECONDS
+from source_parser import parse_source_message
+
+
+class SimulatedClock:
+    """Horloge pilotée par les timestamps de l'historique"""
+    __slots__ = ('current',)
+
+    def __init__(self, start=0.0):
+        self.current = start
+
+    def now(self):
+        return datetime.fromtimestamp(self.current)
+
+    def monotonic(self):
+        return self.current
+
+
+class ReplayMessage:
+    __slots__ = ('id',)
+
+    def __init__(self, message_id):
+        self.id = message_id
+
+
+class ReplaySender:
+    """Faux envoyeur: compte les envois sans rien transmettre"""
+
+    def __init__(self):
+        self.predictions = 0
+        self.edits = 0
+        self.notices = 0
+
+    async def send_message(self, chat, text):
+        self.predictions += 1
+        return ReplayMessage(self.predictions)
+
+    async def send_notice(self, chat, text):
+        self.notices += 1
+
+    async def edit_message(self, chat, message_id, text):
+        self.edits += 1
+
+
+def read_history(path):
+    """Itère (id, texte, édition, ts) depuis un fichier JSONL"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield record.get('id', line_no), record['text'], bool(record.get('edit')), float(record.get('ts', 0))
+
+
+async def replay(records, pause_cycle=None, max_in_flight=1):
+    """Rejoue `records` [(id, texte, édition, ts)] et retourne le bilan"""
+    clock = SimulatedClock()
+    sender = ReplaySender()
+    pause_config = new_pause_config([m * 60 for m in pause_cycle] if pause_cycle else None)
+    engine = PredictionEngine(sender, 0, pause_config, now=clock.now, max_in_flight=max_in_flight,
+                              monotonic=clock.monotonic)
+
+    messages = 0
+    auto_resets = 0
+    for message_id, text, is_edit, ts in records:
+        clock.current = ts
+        # Même règle que le chien de garde (prediction_watchdog): vérification bloquée depuis 20+ min
+        if engine.current is not None and (clock.now() - engine.last_prediction_time).total_seconds() > AUTO_RESET_SECONDS:
+            await engine.reset()
+            auto_resets += 1
+        await engine.handle(parse_source_message(text), is_edit)
+        messages += 1
+
+    stats = engine.stats
+    return {
+        'messages': messages,
+        'predictions': sender.predictions,
+        'pauses': engine.pauses.count,
+        'resumes': engine.pauses.resumes,
+        'auto_resets': auto_resets,
+        'pending': engine.predicted_number,
+        'stats_bilan': stats,
+        'win_rate': (stats['wins'] / stats['total'] * 100) if stats['total'] else 0.0,
+    }
+
+
+def format_report(result, elapsed):
+    stats = result['stats_bilan']
+    details = stats['win_details']
+    return f"""📊 BILAN REJEU ({result['messages']} messages en {elapsed:.2f}s)
+🎯 Total: {stats['total']}
+✅ Victoires: {stats['wins']} ({result['win_rate']:.1f}%)
+❌ Défaites: {stats['losses']}
+• Immédiat (N): {details.get('✅0️⃣', 0)}
+• 2ème chance (N+1): {details.get('✅1️⃣', 0)}
+• 3ème chance (N+2): {details.get('✅2️⃣', 0)}
+• 4ème chance (N+3): {details.get('✅3️⃣', 0)}
+⏸️ Pauses: {result['pauses']}
+🚨 Resets automatiques: {result['auto_resets']}"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rejeu de la stratégie sur un historique JSONL")
+    parser.add_argument('history', help="fichier JSONL (id, text, edit, ts)")
+    parser.add_argument('--pause-cycle', help="cycle de pause en minutes, ex: 3,5,4")
+    parser.add_argument('--max-in-flight', type=int, default=1, help="prédictions simultanées (défaut: 1)")
+    parser.add_argument('--json', action='store_true', help="sortie JSON")
+    args = parser.parse_args(argv)
+
+    # Le détail par message n'a pas d'intérêt hors ligne
+    logging.getLogger('prediction_engine').setLevel(logging.ERROR)
+
+    pause_cycle = [int(x) for x in args.pause_cycle.split(',')] if args.pause_cycle else None
+    started = time.perf_counter()
+    result = asyncio.run(replay(read_history(args.history), pause_cycle, args.max_in_flight))
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(dict(result, elapsed=elapsed), ensure_ascii=False, indent=2))
+    else:
+        print(format_report(result, elapsed))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
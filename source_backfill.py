@@ -0,0 +1,78 @@
+"""Rattrapage des messages source manqués (redémarrage, reconnexion).
+
+À chaque (re)connexion (détectée par TableRegistry), l'historique du canal source est relu depuis le
+dernier id traité, par pages de 100 messages (le maximum de l'API), puis
+rejoué dans l'ordre par `PredictionEngine.catch_up`. Quelques messages
+déjà vus sont relus: leur version finale (✅/🔰) a pu être éditée pendant
+la coupure.
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Messages déjà traités relus pour récupérer les éditions faites pendant la coupure
+EDIT_LOOKBACK = 10
+# Au-delà, l'historique est trop ancien pour intéresser la vérification en cours
+MAX_BACKFILL_MESSAGES = 2000
+PAGE_WAIT_SECONDS = 0.5
+
+
+class SourceBackfill:
+    """`client` expose `iter_messages` et `is_connected` (TelegramClient)"""
+
+    def __init__(self, client, engine, get_channel_id, cursor, save_cursor,
+                 lookback=EDIT_LOOKBACK, max_messages=MAX_BACKFILL_MESSAGES):
+        self.client = client
+        self.engine = engine
+        self.get_channel_id = get_channel_id
+        # dict {'last_message_id': ...} persisté par `save_cursor()`
+        self.cursor = cursor
+        self.save_cursor = save_cursor
+        self.lookback = lookback
+        self.max_messages = max_messages
+
+        self.runs = 0
+        self.fetched = 0
+        self._running = asyncio.Lock()
+
+    def note(self, message_id):
+        """Avance le curseur sur un message live (appelé par le handler)"""
+        if message_id > self.cursor.get('last_message_id', 0):
+            self.cursor['last_message_id'] = message_id
+            self.save_cursor()
+
+    async def fetch(self, since_id):
+        """Messages du canal source d'id > `since_id`, du plus ancien au plus récent
+
+        Parcours du plus récent au plus ancien: si la coupure dépasse
+        `max_messages`, ce sont les plus anciens qui sont abandonnés.
+        """
+        messages = []
+        async for message in self.client.iter_messages(
+                self.get_channel_id(), min_id=max(0, since_id),
+                limit=self.max_messages, wait_time=PAGE_WAIT_SECONDS):
+            if message.message:
+                messages.append((message.id, message.message))
+        messages.reverse()
+        return messages
+
+    async def run(self):
+        """Un rattrapage complet; retourne le nombre de messages rejoués"""
+        if self._running.locked():
+            return 0
+        async with self._running:
+            since = max(self.cursor.get('last_message_id', 0), self.engine.last_message_id)
+            if since <= 0:
+                return 0
+            try:
+                messages = await self.fetch(since - self.lookback)
+            except Exception as e:
+                logger.error(f"❌ Rattrapage impossible: {e}")
+                return 0
+
+            self.runs += 1
+            self.fetched += len(messages)
+            replayed = await self.engine.catch_up(messages)
+            self.note(self.engine.last_message_id)
+            return replayed
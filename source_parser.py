@@ -0,0 +1,111 @@
+"""Analyse en une seule passe des messages du canal source.
+
+Un seul motif précompilé parcourt le texte une fois et relève le numéro de
+jeu, le premier groupe de parenthèses et les marqueurs de finalisation.
+Les résultats sont mis en cache par (id message, hash du texte): les
+ré-éditions identiques du canal source ne coûtent plus rien.
+"""
+import re
+from collections import OrderedDict
+
+# Ordre de priorité des motifs de numéro (identique à l'ancien extract_game_number)
+_NUMBER_GROUPS = ('hash_n', 'hash', 'n', 'numero', 'game')
+
+_SOURCE_RE = re.compile(
+    r"#N\s*(?P<hash_n>\d+)"
+    r"|^#(?P<hash>\d+)"
+    r"|N\s*(?P<n>\d+)"
+    r"|Numéro\s*(?P<numero>\d+)"
+    r"|Game\s*(?P<game>\d+)"
+    r"|\((?=(?P<group>[^)]+)\))"
+    r"|(?P<final>[✅🔰])",
+    re.IGNORECASE
+)
+
+
+class ParsedGameMessage:
+    """Résultat de l'analyse d'un message source"""
+    __slots__ = ('game_number', 'suits', 'is_editing', 'is_finalized')
+
+    def __init__(self, game_number, suits, is_editing, is_finalized):
+        self.game_number = game_number
+        self.suits = suits
+        self.is_editing = is_editing
+        self.is_finalized = is_finalized
+
+    def __repr__(self):
+        return (f"ParsedGameMessage(game_number={self.game_number!r}, suits={self.suits!r}, "
+                f"is_editing={self.is_editing!r}, is_finalized={self.is_finalized!r})")
+
+
+def suits_in_group(group: str) -> list:
+    """Costumes présents dans un groupe (❤️/♥️/♠️... normalisés)"""
+    suits = []
+    if '♥' in group or '❤' in group:
+        suits.append('♥')
+    if '♠' in group:
+        suits.append('♠')
+    if '♦' in group:
+        suits.append('♦')
+    if '♣' in group:
+        suits.append('♣')
+    return suits
+
+
+def parse_source_message(message_text: str) -> ParsedGameMessage:
+    """Analyse un message source en un seul parcours du texte"""
+    found = {}
+    first_group = None
+    is_finalized = False
+
+    for match in _SOURCE_RE.finditer(message_text):
+        kind = match.lastgroup
+        if kind == 'group':
+            if first_group is None:
+                first_group = match.group('group')
+        elif kind == 'final':
+            is_finalized = True
+        elif kind not in found:
+            found[kind] = match.group(kind)
+
+    game_number = None
+    for kind in _NUMBER_GROUPS:
+        if kind in found:
+            game_number = int(found[kind])
+            break
+
+    return ParsedGameMessage(
+        game_number,
+        suits_in_group(first_group) if first_group is not None else [],
+        message_text.lstrip().startswith('⏰'),
+        is_finalized
+    )
+
+
+class SourceMessageParser:
+    """Analyseur avec cache LRU borné, indexé par (id message, hash du texte)"""
+    __slots__ = ('maxsize', 'hits', 'misses', '_cache')
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def parse(self, message_id, message_text: str) -> ParsedGameMessage:
+        key = (message_id, hash(message_text))
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        parsed = parse_source_message(message_text)
+        self._cache[key] = parsed
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return parsed
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,177 @@
+"""Instantané d'état pour le tableau de bord web et /api/status.
+
+Le JSON et le HTML ne sont reconstruits que lorsque `engine.version` change;
+entre deux changements, chaque requête renvoie les mêmes octets (et leur
+version gzip), avec un ETag permettant les réponses 304.
+"""
+import os
+import gzip
+import json
+from datetime import datetime
+
+from prediction_engine import PREDICTIONS_BEFORE_PAUSE
+
+GZIP_MIN_SIZE = 1024
+
+# Identifiant de démarrage: un ETag d'une exécution précédente ne correspond jamais
+_BOOT_ID = os.urandom(4).hex()
+
+
+def build_status(engine, pause_config, now):
+    """État courant sous forme de dict sérialisable"""
+    cycle = pause_config['cycle']
+    current = engine.current
+    return {
+        'version': engine.version,
+        'generated_at': now.isoformat(timespec='seconds'),
+        'current_game': engine.current_game_number,
+        'state': engine.state,
+        'pending': {
+            'target': current.target,
+            'suit': current.suit,
+            'check': current.check,
+            'state': current.state,
+        } if current is not None else None,
+        'in_flight': [
+            {'target': p.target, 'suit': p.suit, 'check': p.check, 'state': p.state, 'expected': p.expected_number}
+            for p in engine.in_flight.values()
+        ],
+        'predictions_enabled': engine.predictions_enabled,
+        'last_prediction_time': (engine.last_prediction_time.isoformat(timespec='seconds')
+                                 if engine.last_prediction_time else None),
+        'pause': {
+            'cycle_minutes': [x // 60 for x in cycle],
+            'position': pause_config['current_index'] % len(cycle) + 1,
+            'count': pause_config['predictions_count'],
+            'before_pause': PREDICTIONS_BEFORE_PAUSE,
+            'is_paused': bool(pause_config['is_paused']),
+            # Échéance fixe (et non secondes restantes): reste valable entre deux reconstructions
+            'ends_at': pause_config.get('pause_end_time') if pause_config['is_paused'] else None,
+        },
+        'stats': {
+            'total': engine.stats['total'],
+            'wins': engine.stats['wins'],
+            'losses': engine.stats['losses'],
+        },
+    }
+
+
+def _last_activity(status):
+    last = status['last_prediction_time']
+    return last[11:19] if last else "N/A"
+
+
+def render_html(status):
+    pause = status['pause']
+    pending = status['pending']
+    return f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Bot Baccarat</title>
+<style>
+body {{ font-family: Arial; background: linear-gradient(135deg, #1e3c72, #2a5298); color: white; text-align: center; padding: 50px; }}
+.status {{ background: rgba(255,255,255,0.1); padding: 20px; border-radius: 10px; display: inline-block; margin: 10px; min-width: 120px; }}
+.number {{ font-size: 2em; color: #ffd700; font-weight: bold; }}
+.label {{ font-size: 0.9em; opacity: 0.8; margin-bottom: 5px; }}
+</style></head>
+<body>
+<h1>🎰 Bot Baccarat</h1>
+<div class="status"><div class="label">Jeu Actuel</div><div class="number" id="game">#{status['current_game']}</div></div>
+<div class="status"><div class="label">Vérification</div><div class="number" id="pending">{pending['target'] if pending else 'Libre'}</div></div>
+<div class="status"><div class="label">Prédictions</div><div class="number" id="enabled">{'🟢 ON' if status['predictions_enabled'] else '🔴 OFF'}</div></div>
+<div class="status"><div class="label">Dernière Activité</div><div class="number" id="last">{_last_activity(status)}</div></div>
+<div class="status"><div class="label">Pause</div><div class="number" id="count">{pause['count']}/{pause['before_pause']}</div></div>
+<p style="margin-top: 30px; opacity: 0.8;" id="cycle">
+⏸️ Cycle: {pause['cycle_minutes']} min | Position: {pause['position']}/{len(pause['cycle_minutes'])} | {'⏸️ EN PAUSE' if pause['is_paused'] else '▶️ ACTIF'}
+</p>
+<p id="generated">🔄 {status['generated_at'][11:19]}</p>
+<script>
+// Mises à jour poussées par le serveur (SSE), sans rechargement périodique
+const set = (id, text) => document.getElementById(id).textContent = text;
+new EventSource('/api/status/stream').onmessage = (e) => {{
+  const s = JSON.parse(e.data), p = s.pause;
+  set('game', '#' + s.current_game);
+  set('pending', s.pending ? s.pending.target : 'Libre');
+  set('enabled', s.predictions_enabled ? '🟢 ON' : '🔴 OFF');
+  set('last', s.last_prediction_time ? s.last_prediction_time.slice(11, 19) : 'N/A');
+  set('count', p.count + '/' + p.before_pause);
+  set('cycle', '⏸️ Cycle: [' + p.cycle_minutes.join(', ') + '] min | Position: ' + p.position + '/' +
+      p.cycle_minutes.length + ' | ' + (p.is_paused ? '⏸️ EN PAUSE' : '▶️ ACTIF'));
+  set('generated', '🔄 ' + s.generated_at.slice(11, 19));
+}};
+</script>
+</body></html>"""
+
+
+class _Rendered:
+    __slots__ = ('body', 'gzipped', 'etag')
+
+    def __init__(self, body, etag, gzip_min_size):
+        self.body = body
+        self.etag = etag
+        self.gzipped = gzip.compress(body, 6) if len(body) >= gzip_min_size else None
+
+
+class StatusSnapshot:
+    """Cache des représentations JSON/HTML, invalidé par `engine.version`"""
+
+    CONTENT_TYPES = {
+        'json': 'application/json; charset=utf-8',
+        'html': 'text/html; charset=utf-8',
+    }
+
+    def __init__(self, engine, pause_config, now=datetime.now, gzip_min_size=GZIP_MIN_SIZE):
+        self.engine = engine
+        self.pause_config = pause_config
+        self.now = now
+        self.gzip_min_size = gzip_min_size
+        self.rebuilds = 0
+        self._version = None
+        self._status = None
+        self._rendered = {}
+
+    def status(self):
+        """Dict d'état, reconstruit seulement si la version a changé"""
+        version = self.engine.version
+        if version != self._version:
+            self._status = build_status(self.engine, self.pause_config, self.now())
+            self._version = version
+            self._rendered = {}
+            self.rebuilds += 1
+        return self._status
+
+    def status_json(self):
+        return self._render('json').body.decode('utf-8')
+
+    def _render(self, kind):
+        status = self.status()
+        rendered = self._rendered.get(kind)
+        if rendered is None:
+            if kind == 'json':
+                body = json.dumps(status, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            else:
+                body = render_html(status).encode('utf-8')
+            rendered = _Rendered(body, f'"{_BOOT_ID}-{self._version}-{kind}"', self.gzip_min_size)
+            self._rendered[kind] = rendered
+        return rendered
+
+    def respond(self, kind, if_none_match=None, accept_encoding=''):
+        """Retourne (code HTTP, en-têtes, corps) pour `kind` ('json' ou 'html')"""
+        rendered = self._render(kind)
+        use_gzip = rendered.gzipped is not None and 'gzip' in (accept_encoding or '')
+        etag = rendered.etag[:-1] + '-gz"' if use_gzip else rendered.etag
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+
+        if if_none_match:
+            candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            if '*' in candidates or etag in candidates:
+                return 304, headers, b''
+
+        headers['Content-Type'] = self.CONTENT_TYPES[kind]
+        if use_gzip:
+            headers['Content-Encoding'] = 'gzip'
+            return 200, headers, rendered.gzipped
+        return 200, headers, rendered.body
@@ -0,0 +1,367 @@
+"""Évaluation vectorisée de milliers de cycles de costumes et de pauses.
+
+L'historique est encodé une fois en tableaux NumPy (numéro de jeu, masque
+4 bits des costumes du premier groupe, rang et horodatage de chaque
+message). Chaque candidat est un
+couple (attribution costume par numéro, cycle de pause):
+
+- le résultat « gagné au check k / perdu » de chaque déclencheur est
+  précalculé pour les 4 costumes, puis indexé pour tous les candidats d'un
+  coup;
+- la simulation séquentielle (système occupé jusqu'au message qui résout
+  la prédiction, 5 prédictions puis pause) avance déclencheur par déclencheur mais opère
+  sur le vecteur de tous les candidats;
+- les candidats sont répartis par paquets sur plusieurs processus.
+
+    python strategy_sweep.py historique.jsonl --random 2000 --pause-cycles "3,5,4;2,2,2;5"
+
+`--check-replay` rejoue le même historique avec le vrai moteur (replay.py)
+et compare les bilans de SUIT_CYCLE pour chaque cycle de pause;
+benchmarks/check_sweep_replay.py fait de même sur des historiques
+synthétiques (finales recopiées, passage #1440 -> #1).
+"""
+import os
+import sys
+import json
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game_tables import LAST_GAME_NUMBER, MAX_GAME_NUMBER, SUIT_CODES, SUIT_CYCLE, VALID_EVEN_NUMBERS, TRIGGER_TABLE
+from prediction_engine import AUTO_RESET_SECONDS, DEFAULT_PAUSE_CYCLE, MAX_CHECK, PREDICTIONS_BEFORE_PAUSE
+from replay import read_history, replay
+from source_parser import parse_source_message
+
+NO_SUIT = -1
+NOT_RESOLVED = -1
+LOSS = MAX_CHECK + 1
+
+SUIT_BITS = {suit: 1 << code for code, suit in enumerate(SUIT_CODES)}
+
+# Colonnes de la matrice de résultats
+COLUMNS = ('total', 'wins', 'losses') + tuple(f'check_{k}' for k in range(MAX_CHECK + 1)) + ('pauses', 'auto_resets')
+
+
+# ============================================================
+# ENCODAGE DE L'HISTORIQUE
+# ============================================================
+
+def encode_history(records):
+    """Encode l'historique, un élément par jeu et un horodatage par message.
+
+    Retourne (numbers int16, masks uint8, final_seq, offsets, game_seqs, ts):
+    - masks: costumes du premier groupe de la version finalisée;
+    - final_seq: rang du premier message non ⏰ du jeu (celui qui le
+      vérifie), -1 s'il n'est jamais finalisé;
+    - game_seqs[offsets[i]:offsets[i + 1]]: rangs des messages du jeu i
+      (publication, éditions, copies de la version finale);
+    - ts: horodatage de chaque message de l'historique, y compris ceux sans
+      numéro (ils déclenchent aussi le reset automatique du rejeu).
+
+    Un déclencheur part sur le premier de ses messages reçu hors pause et
+    système libre: une édition après la fin de la pause, ou une copie de la
+    version finale du jeu qui vient de résoudre la prédiction précédente.
+    """
+    index = {}
+    numbers, masks, final_seq, seqs, ts = [], [], [], [], []
+    for seq, (message_id, text, is_edit, message_ts) in enumerate(records):
+        ts.append(message_ts)
+        parsed = parse_source_message(text)
+        number = parsed.game_number
+        if number is None or number > LAST_GAME_NUMBER:
+            continue
+        mask = 0
+        for suit in parsed.suits:
+            mask |= SUIT_BITS[suit]
+        pos = index.get(number)
+        if pos is None or pos < len(numbers) - 8:
+            # Nouveau jeu (ou même numéro revenu dans une manche suivante;
+            # les éditions n'arrivent que quelques jeux plus tard)
+            pos = index[number] = len(numbers)
+            numbers.append(number)
+            masks.append(mask)
+            final_seq.append(-1)
+            seqs.append([])
+        if final_seq[pos] < 0 and not parsed.is_editing:
+            # Le moteur vérifie sur ce message-là
+            final_seq[pos] = seq
+            masks[pos] = mask
+        seqs[pos].append(seq)
+    offsets = np.zeros(len(seqs) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(s) for s in seqs])
+    return (np.asarray(numbers, dtype=np.int16),
+            np.asarray(masks, dtype=np.uint8),
+            np.asarray(final_seq, dtype=np.int64),
+            offsets,
+            np.asarray([q for s in seqs for q in s], dtype=np.int64),
+            np.asarray(ts, dtype=np.float64))
+
+
+def trigger_outcomes(numbers, masks, final_seq):
+    """Pour chaque jeu déclencheur: (positions, cibles, résultats[4 costumes])
+
+    résultat = k (gagné au check k), LOSS, ou NOT_RESOLVED si l'historique
+    ne contient pas les jeux suivants consécutifs et finalisés.
+    """
+    # Jusqu'à #1440: les derniers numéros ne déclenchent rien mais comptent pour les checks
+    trigger_table = np.zeros(LAST_GAME_NUMBER + 1, dtype=np.int16)
+    trigger_table[:len(TRIGGER_TABLE)] = TRIGGER_TABLE
+    triggers = trigger_table[numbers.astype(np.intp)]
+    positions = np.flatnonzero(triggers)
+    targets = triggers[positions]
+
+    n = len(numbers)
+    outcomes = np.full((len(SUIT_CODES), len(positions)), LOSS, dtype=np.int8)
+    resolved = np.zeros((len(SUIT_CODES), len(positions)), dtype=bool)
+    contiguous = np.ones(len(positions), dtype=bool)
+
+    for k in range(MAX_CHECK + 1):
+        idx = positions + 1 + k
+        in_range = idx < n
+        safe = np.where(in_range, idx, 0)
+        contiguous &= in_range & (numbers[safe] == targets + k) & (final_seq[safe] >= 0)
+        for code in range(len(SUIT_CODES)):
+            hit = contiguous & ((masks[safe] >> code) & 1).astype(bool) & ~resolved[code]
+            outcomes[code, hit] = k
+            resolved[code] |= hit
+
+    # Perdu seulement si les 4 checks ont pu être observés
+    for code in range(len(SUIT_CODES)):
+        outcomes[code, ~resolved[code] & ~contiguous] = NOT_RESOLVED
+    return positions, targets, outcomes
+
+
+# ============================================================
+# CANDIDATS
+# ============================================================
+
+def assignment_from_cycle(cycle):
+    """Tableau costume par numéro pour un cycle sur les pairs valides"""
+    assignment = np.full(MAX_GAME_NUMBER + 1, NO_SUIT, dtype=np.int8)
+    codes = np.asarray([SUIT_CODES.index(s) for s in cycle], dtype=np.int8)
+    valid = np.asarray(VALID_EVEN_NUMBERS)
+    assignment[valid] = codes[np.arange(len(valid)) % len(codes)]
+    return assignment
+
+
+def assignment_from_camp(camp_config):
+    """Tableau costume par numéro depuis camp_config.json (suit_to_numbers)"""
+    assignment = np.full(MAX_GAME_NUMBER + 1, NO_SUIT, dtype=np.int8)
+    for suit, numbers in camp_config['suit_to_numbers'].items():
+        assignment[np.asarray(numbers)] = SUIT_CODES.index(suit.replace('️', ''))
+    return assignment
+
+
+def random_cycles(count, length, seed=0):
+    rng = np.random.default_rng(seed)
+    return [''.join(SUIT_CODES[c] for c in row) for row in rng.integers(0, 4, size=(count, length))]
+
+
+# ============================================================
+# SIMULATION VECTORISÉE
+# ============================================================
+
+def simulate(encoded, outcomes_data, assignments, pause_cycles):
+    """Simule tous les candidats (lignes) d'un coup; retourne la matrice des résultats.
+
+    Colonnes: total, gagnés, perdus, gagnés au check 0..3, pauses, resets automatiques.
+    Chaque candidat est libre à partir d'un rang de message (après le
+    message qui a résolu sa dernière prédiction, ou au reset automatique
+    d'une prédiction jamais résolue).
+    """
+    numbers, masks, final_seq, offsets, game_seqs, ts = encoded
+    positions, targets, outcomes = outcomes_data
+    candidates = len(assignments)
+
+    pause_len = np.asarray([len(c) for c in pause_cycles])
+    pause_matrix = np.zeros((candidates, pause_len.max()), dtype=np.float64)
+    for row, cycle in enumerate(pause_cycles):
+        pause_matrix[row, :len(cycle)] = cycle
+
+    # Costume prédit et résultat de chaque déclencheur, pour chaque candidat
+    predicted = assignments[:, targets]
+    result = outcomes[np.clip(predicted, 0, None), np.arange(len(positions))]
+    result[predicted == NO_SUIT] = NOT_RESOLVED
+
+    rows = np.arange(candidates)
+    free_after = np.full(candidates, -1, dtype=np.int64)
+    pause_end = np.full(candidates, -np.inf)
+    # Rang du premier message reçu après la fin de la pause
+    pause_seq = np.zeros(candidates, dtype=np.int64)
+    count = np.zeros(candidates, dtype=np.int64)
+    pause_idx = np.zeros(candidates, dtype=np.int64)
+    totals = np.zeros((candidates, len(COLUMNS)), dtype=np.int64)
+    col_pauses = COLUMNS.index('pauses')
+    col_resets = COLUMNS.index('auto_resets')
+
+    for t, pos in enumerate(positions):
+        # Premier message du déclencheur reçu système libre et hors pause
+        seqs = game_seqs[offsets[pos]:offsets[pos + 1]]
+        first_allowed = np.maximum(free_after + 1, pause_seq)
+        k = np.searchsorted(seqs, first_allowed, side='left')
+        ready = k < len(seqs)
+        fired_at = ts[seqs[np.minimum(k, len(seqs) - 1)]]
+        # Le moteur compte le déclencheur même si le costume n'est pas défini
+        count[ready] += 1
+
+        pausing = ready & (count >= PREDICTIONS_BEFORE_PAUSE)
+        if pausing.any():
+            idx = pause_idx[pausing] % pause_len[pausing]
+            pause_end[pausing] = fired_at[pausing] + pause_matrix[rows[pausing], idx]
+            pause_seq[pausing] = np.searchsorted(ts, pause_end[pausing], side='left')
+            pause_idx[pausing] += 1
+            count[pausing] = 0
+            totals[pausing, col_pauses] += 1
+
+        launch = ready & ~pausing & (predicted[:, t] != NO_SUIT)
+        if not launch.any():
+            continue
+        sel = rows[launch]
+        r = result[sel, t]
+
+        # Jamais résolue: reset avant le premier message 20 min après le lancement
+        stuck = r == NOT_RESOLVED
+        reset_seq = np.searchsorted(ts, fired_at[sel[stuck]] + AUTO_RESET_SECONDS, side='right')
+        free_after[sel[stuck]] = reset_seq - 1
+        # Pas de reset si l'historique s'arrête avant
+        totals[sel[stuck][reset_seq < len(ts)], col_resets] += 1
+
+        sel, r = sel[~stuck], r[~stuck]
+        won = r <= MAX_CHECK
+        totals[sel, 0] += 1
+        totals[sel[won], 1] += 1
+        totals[sel[~won], 2] += 1
+        totals[sel[won], 3 + r[won]] += 1
+        # Le message qui résout ne lance rien; les suivants du même jeu peuvent
+        free_after[sel] = final_seq[pos + 1 + np.minimum(r, MAX_CHECK)]
+
+    return totals
+
+
+_WORKER_DATA = None
+
+
+def _init_worker(encoded, outcomes_data):
+    global _WORKER_DATA
+    _WORKER_DATA = (encoded, outcomes_data)
+
+
+def _simulate_chunk(args):
+    assignments, pause_cycles = args
+    encoded, outcomes_data = _WORKER_DATA
+    return simulate(encoded, outcomes_data, assignments, pause_cycles)
+
+
+def sweep(encoded, candidates, workers=None, chunk_size=None):
+    """candidates = [(nom, attribution, cycle_pause_secondes)] -> matrice des résultats"""
+    outcomes_data = trigger_outcomes(*encoded[:3])
+    assignments = np.stack([c[1] for c in candidates])
+    pauses = [c[2] for c in candidates]
+
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # Gros paquets: le coût d'une étape NumPy dépend peu du nombre de candidats
+        chunk_size = max(256, -(-len(candidates) // workers))
+    chunks = [
+        (assignments[i:i + chunk_size], pauses[i:i + chunk_size])
+        for i in range(0, len(candidates), chunk_size)
+    ]
+
+    if workers == 1 or len(chunks) == 1:
+        _init_worker(encoded, outcomes_data)
+        return np.concatenate([_simulate_chunk(chunk) for chunk in chunks])
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(encoded, outcomes_data)) as pool:
+        return np.concatenate(list(pool.map(_simulate_chunk, chunks)))
+
+
+def report(candidates, totals, top=20, min_total=1):
+    results = []
+    for (name, _, pause_cycle), row in zip(candidates, totals):
+        total = int(row[0])
+        if total < min_total:
+            continue
+        results.append({
+            'candidate': name,
+            'pause_cycle_min': [s // 60 for s in pause_cycle],
+            'total': total,
+            'wins': int(row[1]),
+            'losses': int(row[2]),
+            'win_rate': round(row[1] / total * 100, 2),
+            'win_details': {f"✅{k}️⃣": int(row[3 + k]) for k in range(MAX_CHECK + 1)},
+            'pauses': int(row[COLUMNS.index('pauses')]),
+            'auto_resets': int(row[COLUMNS.index('auto_resets')]),
+        })
+    results.sort(key=lambda r: (r['win_rate'], r['total']), reverse=True)
+    return results[:top]
+
+
+def check_against_replay(records, pause_cycles):
+    """Compare le balayage (SUIT_CYCLE) au rejeu du vrai moteur pour chaque cycle de pause.
+
+    Retourne [(cycle en minutes, bilan rejeu, bilan balayage)]; les bilans
+    sont (total, gagnés, perdus, pauses, resets automatiques).
+    """
+    logging.getLogger('prediction_engine').setLevel(logging.ERROR)
+    candidates = [('SUIT_CYCLE', assignment_from_cycle(SUIT_CYCLE), cycle) for cycle in pause_cycles]
+    totals = sweep(encode_history(records), candidates, workers=1)
+    col_pauses, col_resets = COLUMNS.index('pauses'), COLUMNS.index('auto_resets')
+    comparisons = []
+    for cycle, row in zip(pause_cycles, totals):
+        minutes = [s // 60 for s in cycle]
+        result = asyncio.run(replay(records, minutes))
+        stats = result['stats_bilan']
+        expected = (stats['total'], stats['wins'], stats['losses'], result['pauses'], result['auto_resets'])
+        got = (int(row[0]), int(row[1]), int(row[2]), int(row[col_pauses]), int(row[col_resets]))
+        comparisons.append((minutes, expected, got))
+    return comparisons
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Balayage vectorisé des cycles de costumes et de pauses")
+    parser.add_argument('history', help="fichier JSONL (id, text, edit, ts)")
+    parser.add_argument('--cycles', help="fichier JSON: liste de cycles de costumes (ex: \"♥♦♣♠\")")
+    parser.add_argument('--random', type=int, default=0, help="nombre de cycles aléatoires")
+    parser.add_argument('--length', type=int, default=len(SUIT_CYCLE), help="longueur des cycles aléatoires")
+    parser.add_argument('--camp', help="camp_config.json à inclure comme candidat")
+    parser.add_argument('--pause-cycles', default=','.join(str(s // 60) for s in DEFAULT_PAUSE_CYCLE),
+                        help="cycles de pause en minutes séparés par ';' (ex: \"3,5,4;2,2\")")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--check-replay', action='store_true',
+                        help="compare SUIT_CYCLE au rejeu du moteur (replay.py) pour chaque cycle de pause")
+    args = parser.parse_args(argv)
+
+    pause_cycles = [[int(x) * 60 for x in part.split(',') if x.strip()] for part in args.pause_cycles.split(';')]
+
+    if args.check_replay:
+        mismatches = 0
+        for minutes, expected, got in check_against_replay(list(read_history(args.history)), pause_cycles):
+            mismatches += expected != got
+            print(f"{'✅' if expected == got else '❌'} pause {minutes}: rejeu {expected}, balayage {got}"
+                  " (total, gagnés, perdus, pauses, resets)")
+        return 1 if mismatches else 0
+
+    suit_candidates = [('SUIT_CYCLE ' + ''.join(SUIT_CYCLE), assignment_from_cycle(SUIT_CYCLE))]
+    if args.cycles:
+        with open(args.cycles, 'r', encoding='utf-8') as f:
+            suit_candidates += [(cycle, assignment_from_cycle(cycle)) for cycle in json.load(f)]
+    for cycle in random_cycles(args.random, args.length):
+        suit_candidates.append((cycle, assignment_from_cycle(cycle)))
+    if args.camp:
+        with open(args.camp, 'r', encoding='utf-8') as f:
+            suit_candidates.append(('camp ' + args.camp, assignment_from_camp(json.load(f))))
+
+    candidates = [(name, assignment, pause) for name, assignment in suit_candidates for pause in pause_cycles]
+
+    encoded = encode_history(read_history(args.history))
+    totals = sweep(encoded, candidates, workers=args.workers)
+    print(json.dumps(report(candidates, totals, top=args.top), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""Registre des tables: plusieurs couples canal source → canal prédiction.
+
+Chaque table a son propre moteur, son cycle de pause, ses stats, son
+journal, son rattrapage, son filtre d'éditions et son chien de garde, dans un espace de fichiers
+séparé (`tables/<nom>/`). La table par défaut garde les fichiers à la
+racine (compatibilité avec l'installation existante). Les messages sont
+aiguillés par un simple dict `chat_id -> Table`; l'envoyeur Telegram est
+partagé, donc la limite de débit vaut pour toutes les tables.
+"""
+import os
+import re
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from prediction_engine import PredictionEngine, new_pause_config
+from prediction_journal import PredictionJournal
+from prediction_watchdog import Watchdog
+from edit_coalescer import EditCoalescer
+from source_backfill import SourceBackfill
+
+logger = logging.getLogger(__name__)
+
+TABLES_DIR = "tables"
+
+PAUSE_CONFIG_FILE = "pause_config.json"
+JOURNAL_FILE = "prediction_journal.jsonl"
+JOURNAL_SNAPSHOT_FILE = "prediction_snapshot.json"
+SOURCE_CURSOR_FILE = "source_cursor.json"
+
+# Nom de table = nom de dossier sous tables/: pas de séparateur ni de '..'
+TABLE_NAME_RE = re.compile(r'[A-Za-z0-9_-]+')
+
+
+def check_table_name(name):
+    """ValueError si `name` ne peut pas servir de nom de table"""
+    if not isinstance(name, str) or not TABLE_NAME_RE.fullmatch(name):
+        raise ValueError(f"Nom de table invalide: {name!r} (lettres, chiffres, _ et - uniquement)")
+
+
+# Sondage de la connexion (rattrapage à chaque reconnexion), partagé avec cluster.py
+WATCH_INTERVAL = 5.0
+
+
+class Table:
+    """Un couple source → prédiction et tout son état"""
+
+    def __init__(self, name, source_channel_id, prediction_channel_id, directory, services):
+        self.name = name
+        self.source_channel_id = source_channel_id
+        self.directory = directory
+        self.pause_file = os.path.join(directory, PAUSE_CONFIG_FILE)
+        self.cursor_file = os.path.join(directory, SOURCE_CURSOR_FILE)
+
+        save_json = services.save_json
+        self.pause_config = new_pause_config()
+        self.cursor = {'last_message_id': 0}
+        self.journal = PredictionJournal(
+            os.path.join(directory, JOURNAL_FILE),
+            os.path.join(directory, JOURNAL_SNAPSHOT_FILE),
+            executor=services.journal_executor
+        )
+        self.engine = PredictionEngine(
+            services.sender, prediction_channel_id, self.pause_config,
+            persist=lambda: save_json(self.pause_file, self.pause_config),
+            journal=self.journal, max_in_flight=services.max_in_flight
+        )
+        self.edits = EditCoalescer(
+            lambda message_id, message_text: self.engine.submit(message_id, message_text, True),
+            lambda: self.engine.is_full
+        )
+        self.backfill = SourceBackfill(
+            services.client, self.engine, lambda: self.source_channel_id, self.cursor,
+            lambda: save_json(self.cursor_file, self.cursor)
+        )
+        self.watchdog = Watchdog(
+            self.engine,
+            functools.partial(services.on_timeout, self),
+            functools.partial(services.on_feed_stalled, self),
+            **services.timeouts
+        )
+
+    @property
+    def label(self):
+        return self.name or "principale"
+
+    @property
+    def prediction_channel_id(self):
+        return self.engine.prediction_channel_id
+
+    def load(self, load_json):
+        """Relit le cycle de pause, le curseur et le journal de la table"""
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        self.pause_config.update(load_json(self.pause_file, self.pause_config))
+        self.engine.pauses.restore(self.engine.now())
+        self.cursor.update(load_json(self.cursor_file, self.cursor))
+        self.engine.restore_state(self.journal.load())
+        for prediction in self.engine.in_flight.values():
+            logger.info(f"♻️ [{self.label}] Reprise de la prédiction #{prediction.target} "
+                        f"(check {prediction.check})")
+
+    def on_message(self, message_id, message_text, is_edit=False):
+        """Point d'entrée des handlers Telegram (ne bloque pas)"""
+        if is_edit:
+            self.edits.edit(message_id, message_text)
+        else:
+            self.engine.submit(message_id, message_text)
+            self.edits.seen(message_id, message_text)
+            self.backfill.note(message_id)
+        self.watchdog.feed()
+
+    def start(self):
+        if self.engine.last_prediction_time is None or self.engine.current is None:
+            self.engine.last_prediction_time = self.engine.now()
+        self.journal.start(self.engine.export_state)
+        self.engine.start()
+        self.watchdog.start()
+
+    async def stop(self):
+        self.watchdog.stop()
+        self.edits.stop()
+        await self.engine.stop()
+        await self.journal.stop()
+
+    def to_config(self):
+        return {
+            'name': self.name,
+            'source_channel_id': self.source_channel_id,
+            'prediction_channel_id': self.prediction_channel_id,
+        }
+
+
+class TableServices:
+    """Dépendances partagées par toutes les tables"""
+
+    def __init__(self, client, sender, save_json, load_json, on_timeout, on_feed_stalled, timeouts,
+                 max_in_flight=1):
+        self.client = client
+        self.sender = sender
+        self.save_json = save_json
+        self.load_json = load_json
+        # Coroutines appelées avec la table en premier argument
+        self.on_timeout = on_timeout
+        self.on_feed_stalled = on_feed_stalled
+        # Arguments du Watchdog (prediction_timeout, check_timeout, ...)
+        self.timeouts = timeouts
+        # Prédictions simultanées par table (1 = mode séquentiel)
+        self.max_in_flight = max_in_flight
+        # Un seul thread d'écriture pour les journaux de toutes les tables
+        self.journal_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal')
+
+
+class TableRegistry:
+    """Tables indexées par canal source et par nom"""
+
+    def __init__(self, services, base_dir=TABLES_DIR):
+        self.services = services
+        self.base_dir = base_dir
+        self.default = None
+        self._by_source = {}
+        self._by_name = {}
+        self._started = False
+        self._watch_task = None
+        self._tasks = set()
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __iter__(self):
+        return iter(list(self._by_name.values()))
+
+    def get(self, chat_id):
+        """Table dont `chat_id` est le canal source (ou None)"""
+        return self._by_source.get(chat_id)
+
+    def by_name(self, name):
+        return self._by_name.get(name)
+
+    def attach_client(self, client):
+        """Branche le client Telegram créé après le chargement des tables"""
+        self.services.client = client
+        for table in self:
+            table.backfill.client = client
+
+    def set_max_in_flight(self, count):
+        """Prédictions simultanées des tables existantes et des prochaines"""
+        self.services.max_in_flight = count
+        for table in self:
+            table.engine.max_in_flight = count
+
+    def create_default(self, source_channel_id, prediction_channel_id):
+        """Table principale: fichiers à la racine, comme avant le multi-table"""
+        table = Table(None, source_channel_id, prediction_channel_id, '', self.services)
+        self.default = table
+        self._register(table)
+        return table
+
+    def add(self, name, source_channel_id, prediction_channel_id):
+        """Ajoute une table (chargée et démarrée si le registre tourne déjà)"""
+        check_table_name(name)
+        if name in self._by_name:
+            raise ValueError(f"Table '{name}' déjà existante")
+        if source_channel_id in self._by_source:
+            raise ValueError(f"Canal source {source_channel_id} déjà utilisé")
+        table = Table(name, source_channel_id, prediction_channel_id,
+                      os.path.join(self.base_dir, name), self.services)
+        self._register(table)
+        if self._started:
+            table.load(self.services.load_json)
+            table.start()
+            # Table reprise (ex: transférée d'un autre processus): rattrapage depuis son curseur
+            task = asyncio.create_task(table.backfill.run())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return table
+
+    async def remove(self, name):
+        table = self._by_name.get(name)
+        if table is None or table is self.default:
+            return None
+        del self._by_name[name]
+        self._by_source.pop(table.source_channel_id, None)
+        await table.stop()
+        return table
+
+    def set_source(self, table, source_channel_id, reset_cursor=True):
+        """Change le canal source d'une table (nouvel aiguillage, curseur remis à zéro)"""
+        if self._by_source.get(table.source_channel_id) is table:
+            del self._by_source[table.source_channel_id]
+        table.source_channel_id = source_channel_id
+        self._by_source[source_channel_id] = table
+        if reset_cursor:
+            # Les ids de messages de l'ancien canal ne veulent rien dire ici
+            table.cursor['last_message_id'] = 0
+            table.engine.last_message_id = 0
+            self.services.save_json(table.cursor_file, table.cursor)
+
+    def _register(self, table):
+        self._by_name[table.name] = table
+        self._by_source[table.source_channel_id] = table
+
+    # --- Configuration ---
+
+    def load(self, tables_config):
+        """Crée les tables secondaires décrites dans `tables_config` puis charge tout"""
+        for entry in tables_config.get('tables', []):
+            try:
+                self.add(entry['name'], entry['source_channel_id'], entry['prediction_channel_id'])
+            except (KeyError, ValueError) as e:
+                logger.error(f"❌ Table ignorée ({entry}): {e}")
+        for table in self:
+            table.load(self.services.load_json)
+        logger.info(f"🎰 {len(self)} table(s) chargée(s)")
+
+    def to_config(self):
+        return {'tables': [table.to_config() for table in self if table is not self.default]}
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        for table in self:
+            table.start()
+        self._started = True
+        self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        self._started = False
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+        for table in self:
+            await table.stop()
+        self.services.journal_executor.shutdown(wait=True)
+
+    async def _watch(self):
+        """Rattrapage de toutes les tables au démarrage et à chaque reconnexion
+
+        Une seule boucle pour le registre: les tables sont rattrapées l'une
+        après l'autre pour ne pas lancer des centaines de lectures d'historique
+        en parallèle.
+        """
+        client = self.services.client
+        connected = False
+        while True:
+            now_connected = client.is_connected()
+            if now_connected and not connected:
+                for table in self:
+                    await table.backfill.run()
+            connected = now_connected
+            await asyncio.sleep(WATCH_INTERVAL)
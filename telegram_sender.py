@@ -0,0 +1,176 @@
+"""Envoi sortant vers Telegram: cache d'entités, file à priorités, débit limité.
+
+Tous les envois et éditions passent par une file à priorités consommée par
+une tâche unique: les éditions de statut passent avant les nouvelles
+prédictions, elles-mêmes avant les notifications (pauses, admin). Un seau à
+jetons limite le débit et un FloodWait suspend la file le temps demandé
+puis l'opération est rejouée, sans bloquer le code appelant, qui reçoit un
+future.
+"""
+import time
+import asyncio
+import logging
+import itertools
+from collections import deque
+
+from metrics import TELEGRAM_API_SECONDS, FLOOD_WAITS
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_EDIT = 0
+PRIORITY_SEND = 1
+PRIORITY_NOTICE = 2
+
+DEFAULT_RATE = 20.0
+DEFAULT_BURST = 20
+DEFAULT_MAX_RETRIES = 3
+
+
+class TokenBucket:
+    """Seau à jetons (rate jetons/s, capacité burst) avec blocage FloodWait"""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'blocked_until', 'clock')
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.blocked_until = 0.0
+
+    def delay(self):
+        """Consomme un jeton si possible, sinon retourne l'attente nécessaire"""
+        now = self.clock()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def block(self, seconds):
+        """Suspend tout envoi pendant `seconds` (FloodWait)"""
+        self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+        self.tokens = 0.0
+
+
+class TelegramSender:
+    """File d'envoi partagée; `flood_errors` = exceptions portant `.seconds`"""
+
+    def __init__(self, client, rate=DEFAULT_RATE, burst=DEFAULT_BURST, flood_errors=(),
+                 max_retries=DEFAULT_MAX_RETRIES, clock=time.monotonic):
+        self.client = client
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.flood_errors = tuple(flood_errors)
+        self.max_retries = max_retries
+        self.clock = clock
+
+        self.sent = 0
+        self.failed = 0
+        self.flood_waits = 0
+        self.latencies = deque(maxlen=1024)
+
+        self._entities = {}
+        self._queue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._task = None
+
+    def attach(self, client, flood_errors=()):
+        """Branche le client créé après coup (démarrage différé de Telethon)"""
+        self.client = client
+        self.flood_errors = tuple(flood_errors)
+        self._entities.clear()
+
+    # --- Entités ---
+
+    async def resolve(self, chat):
+        entity = self._entities.get(chat)
+        if entity is None:
+            entity = await self.client.get_input_entity(chat)
+            self._entities[chat] = entity
+        return entity
+
+    def invalidate(self, chat=None):
+        """Vide le cache d'entités (tout, ou un seul chat)"""
+        if chat is None:
+            self._entities.clear()
+        else:
+            self._entities.pop(chat, None)
+
+    # --- File ---
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def submit(self, priority, method, chat, *args):
+        """Met en file `client.<method>(chat, *args)`; retourne un future"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((priority, next(self._seq), self.clock(), method, chat, args, future, 0))
+        return future
+
+    async def send_message(self, chat, text, priority=PRIORITY_SEND):
+        return await self.submit(priority, 'send_message', chat, text)
+
+    async def send_notice(self, chat, text):
+        return await self.submit(PRIORITY_NOTICE, 'send_message', chat, text)
+
+    async def edit_message(self, chat, message_id, text):
+        return await self.submit(PRIORITY_EDIT, 'edit_message', chat, message_id, text)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            priority, seq, enqueued, method, chat, args, future, attempt = item
+            if future.done():
+                continue
+
+            await self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                entity = await self.resolve(chat)
+                result = await getattr(self.client, method)(entity, *args)
+            except self.flood_errors as e:
+                self.flood_waits += 1
+                FLOOD_WAITS.inc()
+                self.bucket.block(e.seconds)
+                logger.warning(f"⏳ FloodWait {e.seconds}s ({method} → {chat}, essai {attempt + 1})")
+                if attempt < self.max_retries:
+                    # Même numéro de séquence: l'opération garde sa place dans la file
+                    self._queue.put_nowait((priority, seq, enqueued, method, chat, args, future, attempt + 1))
+                else:
+                    self.failed += 1
+                    future.set_exception(e)
+            except Exception as e:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                TELEGRAM_API_SECONDS.observe(time.perf_counter() - started)
+                self.sent += 1
+                self.latencies.append(self.clock() - enqueued)
+                if not future.done():
+                    future.set_result(result)
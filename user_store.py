@@ -0,0 +1,279 @@
+"""Stockage des utilisateurs / abonnements.
+
+`UserStore` définit l'interface; `SQLiteUserStore` l'implémente sur SQLite
+(mode WAL) avec des colonnes indexées pour les expirations VIP, les fins
+d'abonnement et les paiements en attente (ces index donnent aussi la liste
+des abonnés actifs pour la diffusion). Chaque modification ne touche
+qu'une ligne au lieu de réécrire tout users_data.json. Les méthodes `a*`
+(expirations, diffusion) passent par un thread dédié pour ne pas bloquer
+la boucle asyncio; le reste n'est appelé qu'au démarrage.
+"""
+import os
+import json
+import asyncio
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Champs connus d'un utilisateur (ceux de users_data.json)
+USER_FIELDS = (
+    'registered', 'nom', 'prenom', 'pays',
+    'trial_started', 'trial_used',
+    'subscription_end', 'subscription_type',
+    'pending_payment', 'awaiting_screenshot', 'awaiting_amount',
+    'vip_expires_at', 'vip_duration_minutes', 'vip_joined_at',
+    'status'
+)
+BOOL_FIELDS = ('registered', 'trial_used', 'pending_payment', 'awaiting_screenshot', 'awaiting_amount')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    registered INTEGER NOT NULL DEFAULT 0,
+    nom TEXT,
+    prenom TEXT,
+    pays TEXT,
+    trial_started TEXT,
+    trial_used INTEGER NOT NULL DEFAULT 0,
+    subscription_end TEXT,
+    subscription_type TEXT,
+    pending_payment INTEGER NOT NULL DEFAULT 0,
+    awaiting_screenshot INTEGER NOT NULL DEFAULT 0,
+    awaiting_amount INTEGER NOT NULL DEFAULT 0,
+    vip_expires_at TEXT,
+    vip_duration_minutes INTEGER,
+    vip_joined_at TEXT,
+    status TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_vip_expires_at ON users(vip_expires_at) WHERE vip_expires_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_users_subscription_end ON users(subscription_end) WHERE subscription_end IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_users_pending_payment ON users(pending_payment) WHERE pending_payment = 1;
+CREATE TABLE IF NOT EXISTS blocked_users (
+    user_id INTEGER PRIMARY KEY,
+    blocked_at TEXT,
+    reason TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_COLUMNS = ('user_id',) + USER_FIELDS + ('extra',)
+_UPSERT_SQL = (
+    f"INSERT OR REPLACE INTO users ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _COLUMNS)})"
+)
+
+
+def _to_row(user_id, data):
+    row = [int(user_id)]
+    for field in USER_FIELDS:
+        value = data.get(field)
+        if field in BOOL_FIELDS:
+            value = 1 if value else 0
+        row.append(value)
+    extra = {k: v for k, v in data.items() if k not in USER_FIELDS}
+    row.append(json.dumps(extra, ensure_ascii=False) if extra else None)
+    return row
+
+
+def _from_row(row):
+    data = {}
+    for field, value in zip(_COLUMNS[1:-1], row[1:-1]):
+        if field in BOOL_FIELDS:
+            value = bool(value)
+        data[field] = value
+    if row[-1]:
+        data.update(json.loads(row[-1]))
+    return data
+
+
+class UserStore(ABC):
+    """Interface de stockage des utilisateurs (méthodes synchrones)"""
+
+    @abstractmethod
+    def get(self, user_id):
+        ...
+
+    @abstractmethod
+    def upsert(self, user_id, data):
+        ...
+
+    @abstractmethod
+    def update(self, user_id, **fields):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id):
+        ...
+
+    @abstractmethod
+    def count(self):
+        ...
+
+    @abstractmethod
+    def vip_expiring_before(self, iso_time):
+        ...
+
+    @abstractmethod
+    def subscriptions_ending_before(self, iso_time):
+        ...
+
+    @abstractmethod
+    def pending_payments(self):
+        ...
+
+    @abstractmethod
+    def scheduled_expirations(self):
+        ...
+
+    @abstractmethod
+    def active_users(self, iso_time):
+        ...
+
+    @abstractmethod
+    def mark_blocked(self, user_id, iso_time, reason=None):
+        ...
+
+    @abstractmethod
+    def unblock(self, user_id):
+        ...
+
+    def close(self):
+        pass
+
+
+class SQLiteUserStore(UserStore):
+    """Implémentation SQLite (WAL) de UserStore"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        # Accès synchrones (démarrage) et thread asynchrone partagent la connexion
+        self._lock = threading.RLock()
+        # Une seule connexion => un seul thread pour tous les accès asynchrones
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='user_store')
+
+    # --- Accès synchrones ---
+
+    def _fetch(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _write(self, sql, params):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def get(self, user_id):
+        rows = self._fetch(f"SELECT {', '.join(_COLUMNS)} FROM users WHERE user_id = ?", (int(user_id),))
+        return _from_row(rows[0]) if rows else None
+
+    def upsert(self, user_id, data):
+        self._write(_UPSERT_SQL, _to_row(user_id, data))
+
+    def update(self, user_id, **fields):
+        with self._lock:
+            data = self.get(user_id) or {}
+            data.update(fields)
+            self.upsert(user_id, data)
+        return data
+
+    def delete(self, user_id):
+        self._write("DELETE FROM users WHERE user_id = ?", (int(user_id),))
+
+    def count(self):
+        return self._fetch("SELECT COUNT(*) FROM users")[0][0]
+
+    def vip_expiring_before(self, iso_time):
+        """[(user_id, vip_expires_at)] dont l'accès VIP expire avant iso_time"""
+        return self._fetch(
+            "SELECT user_id, vip_expires_at FROM users "
+            "WHERE vip_expires_at IS NOT NULL AND vip_expires_at <= ? ORDER BY vip_expires_at",
+            (iso_time,)
+        )
+
+    def subscriptions_ending_before(self, iso_time):
+        """[(user_id, subscription_end)] dont l'abonnement se termine avant iso_time"""
+        return self._fetch(
+            "SELECT user_id, subscription_end FROM users "
+            "WHERE subscription_end IS NOT NULL AND subscription_end <= ? ORDER BY subscription_end",
+            (iso_time,)
+        )
+
+    def pending_payments(self):
+        return [row[0] for row in self._fetch("SELECT user_id FROM users WHERE pending_payment = 1")]
+
+    def scheduled_expirations(self):
+        """[(user_id, vip_expires_at, subscription_end)] des utilisateurs ayant une échéance"""
+        return self._fetch(
+            "SELECT user_id, vip_expires_at, subscription_end FROM users "
+            "WHERE vip_expires_at IS NOT NULL OR subscription_end IS NOT NULL"
+        )
+
+    def active_users(self, iso_time):
+        """[user_id] abonnés ou VIP après iso_time, hors utilisateurs bloqués
+
+        Chaque branche de l'union parcourt l'index partiel de sa colonne.
+        """
+        return [row[0] for row in self._fetch(
+            "SELECT user_id FROM users WHERE subscription_end > ? "
+            "UNION SELECT user_id FROM users WHERE vip_expires_at > ? "
+            "EXCEPT SELECT user_id FROM blocked_users",
+            (iso_time, iso_time)
+        )]
+
+    def mark_blocked(self, user_id, iso_time, reason=None):
+        """Exclut l'utilisateur des diffusions (bot bloqué, compte supprimé...)"""
+        self._write(
+            "INSERT OR REPLACE INTO blocked_users (user_id, blocked_at, reason) VALUES (?, ?, ?)",
+            (int(user_id), iso_time, reason)
+        )
+
+    def unblock(self, user_id):
+        self._write("DELETE FROM blocked_users WHERE user_id = ?", (int(user_id),))
+
+    def import_json(self, json_path):
+        """Import unique depuis users_data.json (ignoré s'il a déjà eu lieu)"""
+        if self._fetch("SELECT value FROM meta WHERE key = 'json_import'") or not os.path.exists(json_path):
+            return 0
+
+        with open(json_path, 'r', encoding='utf-8') as f:
+            users = json.load(f)
+
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT_SQL, [_to_row(user_id, data) for user_id, data in users.items()])
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_import', ?)", (json_path,))
+        logger.info(f"👥 {len(users)} utilisateurs importés depuis {json_path}")
+        return len(users)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._conn.close()
+
+    # --- Accès asynchrones (thread dédié) ---
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def aget(self, user_id):
+        return await self._run(self.get, user_id)
+
+    async def aupdate(self, user_id, **fields):
+        return await self._run(self.update, user_id, **fields)
+
+    async def aactive_users(self, iso_time):
+        return await self._run(self.active_users, iso_time)
+
+    async def amark_blocked(self, user_id, iso_time, reason=None):
+        return await self._run(self.mark_blocked, user_id, iso_time, reason)